@@ -7,12 +7,18 @@ __version__ = "0.1.0"
 
 from .safety_checker import SafetyChecker
 from .intent_recognizer import IntentRecognizer
+from .intent_rules import RuleRecognizer
+from .intent_cache import IntentCache
+from .intent_embeddings import EmbeddingClassifier
 from .tool_router import ToolRouter
 from .logger import AgentLogger
 
 __all__ = [
     'SafetyChecker',
     'IntentRecognizer', 
+    'RuleRecognizer',
+    'IntentCache',
+    'EmbeddingClassifier',
     'ToolRouter',
     'AgentLogger'
 ]
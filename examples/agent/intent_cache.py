@@ -0,0 +1,245 @@
+"""
+IntentCache - LRU + TTL cache of recognized intents
+Lets repeated commands ("list examples", "run dir") skip recognition entirely
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+
+# Intents that may be cached; free-text payloads (file content, Python
+# code) are never cached
+CACHEABLE_INTENTS = ['execute_command', 'read_file', 'list_directory', 'chat']
+
+# Only chat carries no parameters, so only chat shares an entry across
+# inputs that differ in case or spacing; every other intent is keyed on the
+# exact (trimmed) input so its parameters are replayed verbatim
+NORMALIZED_INTENTS = ['chat']
+
+# Results below this confidence are not cached; it sits above the regex
+# fallback's 0.6 so fallback guesses are never replayed
+MIN_CONFIDENCE = 0.7
+
+
+def normalize_input(user_input: str) -> str:
+    """
+    Normalize a chat message for use as a cache key
+
+    Case-folds and collapses whitespace, so "Hello  there" and
+    "hello there" share one entry.
+    """
+    return ' '.join(user_input.split()).casefold()
+
+
+def _exact_key(user_input: str) -> str:
+    return 'exact:' + user_input.strip()
+
+
+def _normalized_key(user_input: str) -> str:
+    return 'norm:' + normalize_input(user_input)
+
+
+class IntentCache:
+    """Bounded, expiring map from command to recognition result"""
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_seconds: Optional[float] = 86400,
+        persist_path: Optional[str] = None,
+    ):
+        """
+        Initialize IntentCache
+
+        Args:
+            max_entries: Maximum number of cached commands (least recently
+                used entries are evicted first)
+            ttl_seconds: Entry lifetime in seconds (None never expires)
+            persist_path: JSON file to load at start and write on save()
+                so the cache survives agent sessions (None keeps it in memory)
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.persist_path = Path(persist_path) if persist_path else None
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.loaded = 0
+
+        if self.persist_path is not None:
+            self._load()
+
+    def _is_fresh(self, entry: Dict, now: float) -> bool:
+        return self.ttl is None or now - entry['stored_at'] < self.ttl
+
+    def get(self, user_input: str) -> Optional[Dict]:
+        """
+        Look up a command
+
+        Args:
+            user_input: Natural language command from user
+
+        Returns:
+            Copy of the cached result (intent, parameters, confidence), or
+            None on a miss or expired entry
+        """
+        now = time.time()
+        with self._lock:
+            for key in (_exact_key(user_input), _normalized_key(user_input)):
+                entry = self._entries.get(key)
+                if entry is not None and not self._is_fresh(entry, now):
+                    del self._entries[key]
+                    self.expired += 1
+                    entry = None
+                if entry is not None:
+                    break
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            result = entry['result']
+            return {
+                'intent': result['intent'],
+                'parameters': dict(result['parameters']),
+                'confidence': result['confidence'],
+            }
+
+    def put(self, user_input: str, result: Dict) -> bool:
+        """
+        Store a recognition result if it is safe to reuse
+
+        Args:
+            user_input: Natural language command from user
+            result: Result from IntentRecognizer
+
+        Returns:
+            Whether the result was cached
+        """
+        confidence = result.get('confidence')
+        if (
+            result.get('intent') not in CACHEABLE_INTENTS
+            or not isinstance(confidence, (int, float))
+            or confidence < MIN_CONFIDENCE
+        ):
+            return False
+
+        if result['intent'] in NORMALIZED_INTENTS:
+            key = _normalized_key(user_input)
+        else:
+            key = _exact_key(user_input)
+        entry = {
+            'result': {
+                'intent': result['intent'],
+                'parameters': dict(result.get('parameters', {})),
+                'confidence': result['confidence'],
+            },
+            'stored_at': time.time(),
+        }
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return True
+
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+
+    @staticmethod
+    def _valid_entry(item) -> bool:
+        """Whether a persisted [key, entry] pair has the shape put() writes"""
+        if not isinstance(item, (list, tuple)) or len(item) != 2:
+            return False
+        key, entry = item
+        if not isinstance(key, str) or not isinstance(entry, dict):
+            return False
+        result = entry.get('result')
+        return (
+            isinstance(entry.get('stored_at'), (int, float))
+            and isinstance(result, dict)
+            and result.get('intent') in CACHEABLE_INTENTS
+            and isinstance(result.get('parameters'), dict)
+            and isinstance(result.get('confidence'), (int, float))
+        )
+
+    def _load(self):
+        try:
+            with open(self.persist_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        items = data.get('entries') if isinstance(data, dict) else None
+        if not isinstance(items, list):
+            return
+
+        now = time.time()
+        # Stored oldest first, so re-inserting keeps the LRU order; malformed
+        # entries (hand-edited or foreign files) are skipped
+        for item in items:
+            if not self._valid_entry(item):
+                continue
+            key, entry = item
+            if self._is_fresh(entry, now):
+                self._entries[key] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self.loaded = len(self._entries)
+
+    def save(self):
+        """Write live entries to persist_path (no-op without one)"""
+        if self.persist_path is None:
+            return
+
+        now = time.time()
+        with self._lock:
+            entries = [[key, entry] for key, entry in self._entries.items() if self._is_fresh(entry, now)]
+        self.persist_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.persist_path.with_name(self.persist_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'entries': entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.persist_path)
+
+    def stats(self) -> Dict:
+        """
+        Get cache statistics
+
+        Returns:
+            Dictionary with hits, misses, hit_rate, expired, evictions,
+            entries, loaded (entries restored from disk) and max_entries
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else None,
+            'expired': self.expired,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'loaded': self.loaded,
+            'max_entries': self.max_entries,
+        }
+
+
+# Example usage and testing
+if __name__ == "__main__":
+    cache = IntentCache(max_entries=2, ttl_seconds=60)
+
+    cache.put("run dir", {'intent': 'execute_command', 'parameters': {'command': 'dir'}, 'confidence': 0.95})
+    cache.put("Hello", {'intent': 'chat', 'parameters': {}, 'confidence': 0.95})
+
+    print("=== Lookups ===")
+    for text in [" run dir ", "RUN dir", "hello", "read a.md"]:
+        print(f"{text!r} -> {cache.get(text)}")
+    print(f"Stats: {cache.stats()}")
@@ -0,0 +1,271 @@
+"""
+EmbeddingClassifier - Nearest-neighbour intent classification with a small embedding model
+Embeds labeled exemplar commands once into an on-disk index and classifies input by cosine top-k
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import openvino_genai as ov_genai
+
+try:
+    from pipeline_factory import DEFAULT_CACHE_ROOT, get_cache_dir, model_fingerprint
+except ImportError:  # imported as examples.agent.* from the project root
+    from examples.pipeline_factory import DEFAULT_CACHE_ROOT, get_cache_dir, model_fingerprint
+
+
+DEFAULT_EXEMPLARS_PATH = "config/intent_exemplars.yaml"
+DEFAULT_INDEX_DIR = "./models/.intent_index"
+
+
+def load_exemplars(path: str = DEFAULT_EXEMPLARS_PATH) -> Dict[str, List[str]]:
+    """
+    Load labeled exemplar commands
+
+    Args:
+        path: YAML file mapping intent -> list of example commands
+
+    Returns:
+        Dictionary of intent to exemplar texts
+    """
+    import yaml
+
+    with open(path, 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f) or {}
+    return {intent: [str(text) for text in texts or []] for intent, texts in data.items()}
+
+
+def _entry_key(intent: str, text: str) -> str:
+    """Stable key of one exemplar"""
+    return hashlib.sha1(f"{intent}\0{text}".encode('utf-8')).hexdigest()
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows so a dot product is the cosine similarity"""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class ExemplarIndex:
+    """
+    On-disk matrix of normalized exemplar embeddings
+
+    Stored per embedding model under index_dir/<model fingerprint>/ as
+    vectors.npy plus entries.json (intent, text, key per row). sync()
+    embeds only exemplars that are not in the index yet and drops rows
+    whose exemplar was removed.
+    """
+
+    def __init__(self, index_dir: str, model_path: str):
+        """
+        Args:
+            index_dir: Root directory for index files
+            model_path: Embedding model path (its fingerprint keys the index)
+        """
+        self.dir = Path(index_dir) / f"{Path(model_path).resolve().name}-{model_fingerprint(model_path)}"
+        self.entries: List[Dict] = []
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self._load()
+
+    def _load(self):
+        entries_file = self.dir / "entries.json"
+        vectors_file = self.dir / "vectors.npy"
+        if not (entries_file.exists() and vectors_file.exists()):
+            return
+        try:
+            with open(entries_file, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            vectors = np.load(vectors_file)
+        except (OSError, ValueError):
+            return
+        if len(entries) == len(vectors):
+            self.entries, self.vectors = entries, vectors
+
+    def _save(self):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        # Write to temp files first so an interrupted save never leaves a mismatched pair
+        tmp_vectors = self.dir / "vectors.tmp.npy"
+        tmp_entries = self.dir / "entries.json.tmp"
+        np.save(tmp_vectors, self.vectors)
+        with open(tmp_entries, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_vectors, self.dir / "vectors.npy")
+        os.replace(tmp_entries, self.dir / "entries.json")
+
+    def sync(self, exemplars: Dict[str, List[str]], embed) -> int:
+        """
+        Bring the index in line with the exemplar set
+
+        Args:
+            exemplars: Dictionary of intent to exemplar texts
+            embed: Callable mapping a list of texts to a list of vectors
+
+        Returns:
+            Number of newly embedded exemplars
+        """
+        wanted = {
+            _entry_key(intent, text): (intent, text)
+            for intent, texts in exemplars.items()
+            for text in texts
+        }
+        keep = [i for i, entry in enumerate(self.entries) if entry['key'] in wanted]
+        known = {self.entries[i]['key'] for i in keep}
+        added = [(key, intent, text) for key, (intent, text) in wanted.items() if key not in known]
+
+        if not added and len(keep) == len(self.entries):
+            return 0
+
+        entries = [self.entries[i] for i in keep]
+        vectors = [self.vectors[keep]] if keep else []
+        if added:
+            new_vectors = _normalize(np.asarray(embed([text for _, _, text in added]), dtype=np.float32))
+            entries += [{'key': key, 'intent': intent, 'text': text} for key, intent, text in added]
+            vectors.append(new_vectors)
+
+        self.entries = entries
+        self.vectors = np.concatenate(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+        self._save()
+        return len(added)
+
+    def search(self, query: np.ndarray, top_k: int) -> List[Tuple[Dict, float]]:
+        """
+        Cosine top-k over the whole index
+
+        Args:
+            query: Normalized query vector
+            top_k: Number of neighbours to return
+
+        Returns:
+            List of (entry, similarity) sorted by similarity, highest first
+        """
+        if not self.entries:
+            return []
+        scores = self.vectors @ query
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.entries[i], float(scores[i])) for i in top]
+
+
+class EmbeddingClassifier:
+    """Classifies commands by their nearest labeled exemplars"""
+
+    def __init__(
+        self,
+        model_path: str,
+        device: str = "CPU",
+        exemplars_path: str = DEFAULT_EXEMPLARS_PATH,
+        index_dir: str = DEFAULT_INDEX_DIR,
+        cache_dir: Optional[str] = DEFAULT_CACHE_ROOT,
+        top_k: int = 5,
+        threshold: float = 0.8,
+    ):
+        """
+        Initialize EmbeddingClassifier
+
+        Args:
+            model_path: Path to OpenVINO text embedding model
+            device: Device to run on (CPU recommended; the model is small)
+            exemplars_path: YAML file of labeled exemplar commands
+            index_dir: Directory for the on-disk exemplar index
+            cache_dir: Compiled model cache root (None disables caching)
+            top_k: Number of neighbours that vote on the intent
+            threshold: Minimum cosine similarity of the best neighbour for
+                the classification to count as confident
+        """
+        properties = {}
+        if cache_dir:
+            compiled_dir = get_cache_dir(model_path, device, cache_dir)
+            compiled_dir.mkdir(parents=True, exist_ok=True)
+            properties['CACHE_DIR'] = str(compiled_dir)
+
+        self.pipe = ov_genai.TextEmbeddingPipeline(model_path, device, **properties)
+        self.exemplars_path = exemplars_path
+        self.top_k = top_k
+        self.threshold = threshold
+        self.index = ExemplarIndex(index_dir, model_path)
+        self.refresh()
+
+    def refresh(self) -> int:
+        """
+        Re-read the exemplar file and embed any new exemplars
+
+        Returns:
+            Number of newly embedded exemplars
+        """
+        return self.index.sync(load_exemplars(self.exemplars_path), self.pipe.embed_documents)
+
+    def add_exemplars(self, intent: str, texts: List[str]) -> int:
+        """
+        Add exemplars for an intent and persist them to the exemplar file
+        (the file is rewritten, so YAML comments are not kept)
+
+        Args:
+            intent: Intent label
+            texts: Example commands for that intent
+
+        Returns:
+            Number of newly embedded exemplars
+        """
+        import yaml
+
+        exemplars = load_exemplars(self.exemplars_path)
+        current = exemplars.setdefault(intent, [])
+        current.extend(text for text in texts if text not in current)
+        with open(self.exemplars_path, 'w', encoding='utf-8') as f:
+            yaml.safe_dump(exemplars, f, allow_unicode=True, sort_keys=False)
+        return self.index.sync(exemplars, self.pipe.embed_documents)
+
+    def classify(self, text: str) -> Dict:
+        """
+        Classify one command
+
+        Args:
+            text: Natural language command
+
+        Returns:
+            Dictionary with:
+            - intent: Intent with the highest summed similarity among the top-k
+            - score: Best cosine similarity for that intent
+            - confident: Whether score reaches the threshold
+            - neighbours: List of (exemplar text, intent, similarity)
+        """
+        query = _normalize(np.asarray(self.pipe.embed_query(text), dtype=np.float32))
+        neighbours = self.index.search(query, self.top_k)
+        if not neighbours:
+            return {'intent': None, 'score': 0.0, 'confident': False, 'neighbours': []}
+
+        votes: Dict[str, float] = {}
+        best: Dict[str, float] = {}
+        for entry, score in neighbours:
+            votes[entry['intent']] = votes.get(entry['intent'], 0.0) + score
+            best[entry['intent']] = max(best.get(entry['intent'], -1.0), score)
+
+        intent = max(votes, key=votes.get)
+        return {
+            'intent': intent,
+            'score': best[intent],
+            'confident': best[intent] >= self.threshold,
+            'neighbours': [(entry['text'], entry['intent'], score) for entry, score in neighbours],
+        }
+
+
+# Example usage and testing
+if __name__ == "__main__":
+    import sys
+    import time
+
+    model_path = sys.argv[1] if len(sys.argv) > 1 else "./models/bge-small-en-v1.5-ov"
+
+    classifier = EmbeddingClassifier(model_path)
+    print(f"✓ Index: {len(classifier.index.entries)} exemplars in {classifier.index.dir}")
+
+    for text in ["run dir", "show me what's inside README.md", "what's 3 times 7", "hi there"]:
+        start = time.perf_counter()
+        result = classifier.classify(text)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{text!r} -> {result['intent']} ({result['score']:.3f}, {elapsed:.1f} ms)")
@@ -5,9 +5,70 @@ Parses natural language commands into structured tool calls
 
 import re
 import json
-from typing import Dict, Optional
+import time
+from typing import Dict, List, Optional, Tuple
 import openvino_genai as ov_genai
 
+try:
+    from .intent_rules import RuleRecognizer
+except ImportError:  # run directly as a script
+    from intent_rules import RuleRecognizer
+
+try:
+    from pipeline_factory import DEFAULT_CACHE_ROOT, PipelineRegistry, get_registry
+except ImportError:  # imported as examples.agent.* from the project root
+    from examples.pipeline_factory import DEFAULT_CACHE_ROOT, PipelineRegistry, get_registry
+
+
+class JsonStopStreamer:
+    """
+    Streamer that cancels generation as soon as the first top-level JSON
+    object closes, so the model stops after the intent instead of rambling
+    """
+    
+    def __init__(self):
+        self.chunks = []
+        self.length = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.end = None
+    
+    def __call__(self, subword: str) -> bool:
+        """Consume one decoded subword; returning True stops generation"""
+        if self.end is not None:
+            return True
+        for i, ch in enumerate(subword):
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == '\\':
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"' and self.depth:
+                self.in_string = True
+            elif ch == '{':
+                self.depth += 1
+            elif ch == '}' and self.depth:
+                self.depth -= 1
+                if self.depth == 0:
+                    self.end = self.length + i + 1
+                    break
+        self.chunks.append(subword)
+        self.length += len(subword)
+        return self.end is not None
+    
+    @property
+    def done(self) -> bool:
+        """Whether a complete JSON object has been seen"""
+        return self.end is not None
+    
+    def text(self) -> str:
+        """Streamed text up to and including the closing brace"""
+        text = ''.join(self.chunks)
+        return text[:self.end] if self.end is not None else text
+
 
 class IntentRecognizer:
     """Recognizes user intent from natural language using Llama"""
@@ -35,23 +96,163 @@ IMPORTANT:
 - Match the exact parameter names shown above
 
 JSON format: {"intent":"tool","parameters":{...},"confidence":0.9}"""
+    
+    # Recognition tiers in the order they are tried
+    TIERS = ['cache', 'rules', 'embedding', 'llm']
+    
+    # Expected parameters for each intent; also the intent enum of the output schema
+    EXPECTED_PARAMS = {
+        'execute_command': ['command'],
+        'read_file': ['path'],
+        'write_file': ['path', 'content'],
+        'list_directory': ['path'],
+        'run_python': ['code'],
+        'chat': []  # No parameters for chat
+    }
 
-    def __init__(self, model_path: str, device: str = "CPU"):
+    def __init__(
+        self,
+        model_path: str,
+        device: str = "CPU",
+        cache_dir: Optional[str] = DEFAULT_CACHE_ROOT,
+        registry: Optional[PipelineRegistry] = None,
+        prefix_caching: bool = True,
+        kv_cache_size_gb: int = 1,
+        use_rules: bool = True,
+        constrained: bool = True,
+        classifier=None,
+        cache=None,
+    ):
         """
         Initialize IntentRecognizer with Llama model
         
         Args:
             model_path: Path to OpenVINO model
             device: Device to run on (CPU, GPU, NPU)
+            cache_dir: Compiled model cache root (None disables caching)
+            registry: Pipeline registry to share loaded models through
+                (defaults to the process-wide registry)
+            prefix_caching: Load a continuous-batching pipeline with prefix
+                caching so the KV blocks of SYSTEM_PROMPT are computed once
+                and reused by every recognize() call
+            kv_cache_size_gb: KV cache size for the prefix-caching pipeline
+            use_rules: Answer unambiguous commands with RuleRecognizer and
+                only call the LLM for input no rule matches
+            constrained: Constrain generation to the intent JSON schema (when
+                the runtime supports structured output) and stop as soon as
+                the JSON object closes
+            classifier: Optional EmbeddingClassifier; confident nearest-neighbour
+                matches skip intent generation and only use the LLM to extract
+                parameters for intents that have them
+            cache: Optional IntentCache consulted before every other tier;
+                results from the other tiers are stored back into it
         """
         try:
-            self.pipe = ov_genai.LLMPipeline(model_path, device)
-            self.config = ov_genai.GenerationConfig()
-            self.config.max_new_tokens = 200
-            self.config.temperature = 0.1  # Low temperature for more deterministic output
-            self.config.do_sample = False
+            registry = registry or get_registry()
+            scheduler = None
+            if prefix_caching:
+                scheduler = {"enable_prefix_caching": True, "cache_size": kv_cache_size_gb}
+            self.pipe, self.load_info = registry.get(
+                model_path, device, cache_root=cache_dir, scheduler=scheduler
+            )
+            self.prefix_caching = prefix_caching
+            self.constrained = constrained
+            self.config = self._make_config(self.intent_schema())
+            self._param_configs = {}
         except Exception as e:
             raise RuntimeError(f"Failed to initialize Llama model: {e}")
+        
+        self.rules = RuleRecognizer() if use_rules else None
+        self.classifier = classifier
+        self.cache = cache
+        self.tier_stats = {tier: {'hits': 0, 'total_ms': 0.0} for tier in self.TIERS}
+        
+        if self.prefix_caching:
+            self._warm_prefix()
+    
+    def _build_prompt(self, user_input: str) -> str:
+        """Build the recognition prompt; SYSTEM_PROMPT must stay the leading prefix"""
+        return f"""{self.SYSTEM_PROMPT}
+
+User command: {user_input}
+
+JSON response:"""
+    
+    def _make_config(self, schema: Optional[Dict] = None):
+        """Build a greedy generation config, constrained to schema when supported"""
+        config = ov_genai.GenerationConfig()
+        config.max_new_tokens = 200
+        config.temperature = 0.1  # Low temperature for more deterministic output
+        config.do_sample = False
+        if self.constrained and schema and hasattr(ov_genai, 'StructuredOutputConfig'):
+            config.structured_output = ov_genai.StructuredOutputConfig(
+                json_schema=json.dumps(schema)
+            )
+        return config
+    
+    @classmethod
+    def parameters_schema(cls, intent: str) -> Dict:
+        """JSON schema of the parameters object for one intent"""
+        keys = cls.EXPECTED_PARAMS[intent]
+        return {
+            'type': 'object',
+            'properties': {key: {'type': 'string'} for key in keys},
+            'required': keys,
+            'additionalProperties': False,
+        }
+    
+    @classmethod
+    def intent_schema(cls) -> Dict:
+        """
+        JSON schema of a recognition result: one alternative per intent,
+        each with exactly the parameter keys from EXPECTED_PARAMS
+        """
+        alternatives = []
+        for intent in cls.EXPECTED_PARAMS:
+            alternatives.append({
+                'type': 'object',
+                'properties': {
+                    'intent': {'enum': [intent]},
+                    'parameters': cls.parameters_schema(intent),
+                    'confidence': {'type': 'number', 'minimum': 0, 'maximum': 1},
+                },
+                'required': ['intent', 'parameters', 'confidence'],
+                'additionalProperties': False,
+            })
+        return {'anyOf': alternatives}
+    
+    def _generate(self, prompt: str, config=None, streamer=None) -> str:
+        """Run one generation on either pipeline type and return the text"""
+        config = config or self.config
+        if self.prefix_caching:
+            # ContinuousBatchingPipeline takes lists and returns GenerationResults
+            if streamer is not None:
+                result = self.pipe.generate([prompt], [config], streamer)[0]
+            else:
+                result = self.pipe.generate([prompt], [config])[0]
+            return result.m_generation_ids[0]
+        return str(self.pipe.generate(prompt, config, streamer))
+    
+    def _generate_batch(self, prompts: List[str]) -> List[str]:
+        """Generate for several prompts in one call and return the texts in order"""
+        if self.prefix_caching:
+            results = self.pipe.generate(prompts, [self.config] * len(prompts))
+            return [result.m_generation_ids[0] for result in results]
+        return list(self.pipe.generate(prompts, self.config).texts)
+    
+    def _warm_prefix(self):
+        """
+        Prefill SYSTEM_PROMPT once so its KV blocks are already cached
+        when the first real command arrives
+        """
+        config = ov_genai.GenerationConfig()
+        config.max_new_tokens = 1
+        config.do_sample = False
+        try:
+            self._generate(self._build_prompt(""), config)
+        except Exception:
+            # Warm-up is an optimization only; recognize() still works cold
+            pass
     
     def recognize(self, user_input: str) -> Dict:
         """
@@ -66,32 +267,238 @@ JSON format: {"intent":"tool","parameters":{...},"confidence":0.9}"""
             - parameters: Tool parameters
             - confidence: Confidence score (0.0-1.0)
             - raw_response: Raw model output for debugging
+            - tier: Which tier answered ('cache', 'rules', 'embedding' or 'llm')
+            - latency_ms: Recognition time in milliseconds
         """
+        start = time.perf_counter()
+        if self.cache is not None:
+            result = self.cache.get(user_input)
+            if result is not None:
+                return self._record_tier('cache', result, start)
+        
+        tier, result = self._recognize_uncached(user_input)
+        return self._finish(user_input, tier, result, start)
+    
+    def _recognize_uncached(self, user_input: str) -> Tuple[str, Dict]:
+        """Run the rules, embedding and LLM tiers; returns (tier, result)"""
+        if self.rules is not None:
+            result = self.rules.match(user_input)
+            if result is not None:
+                return 'rules', result
+        
+        if self.classifier is not None:
+            result = self._recognize_embedding(user_input)
+            if result is not None:
+                return 'embedding', result
+        
+        return 'llm', self._recognize_llm(user_input)
+    
+    def _recognize_llm(self, user_input: str) -> Dict:
+        """Recognize intent by generating with the LLM"""
         try:
             # Build prompt
-            prompt = f"""{self.SYSTEM_PROMPT}
-
-User command: {user_input}
-
-JSON response:"""
-            
-            # Get Llama's response
-            response = self.pipe.generate(prompt, self.config)
-            raw_response = response.strip()
+            prompt = self._build_prompt(user_input)
             
-            # Try to extract JSON from response, pass original input for fallback
-            result = self._parse_response(raw_response, user_input)
-            result['raw_response'] = raw_response
+            # Get Llama's response, cancelling once the JSON object closes
+            streamer = JsonStopStreamer() if self.constrained else None
+            response = self._generate(prompt, streamer=streamer)
+            if streamer is not None and streamer.done:
+                response = streamer.text()
             
-            return result
+            return self._llm_result(response, user_input)
             
         except Exception as e:
-            return {
-                'intent': 'error',
-                'parameters': {},
-                'confidence': 0.0,
-                'error': str(e)
+            return self._error_result(e)
+    
+    def _llm_result(self, response: str, user_input: str) -> Dict:
+        """Parse one LLM response, passing the original input for fallback"""
+        raw_response = response.strip()
+        result = self._parse_response(raw_response, user_input)
+        result['raw_response'] = raw_response
+        return result
+    
+    @staticmethod
+    def _error_result(error: Exception) -> Dict:
+        """Result returned when recognition itself fails"""
+        return {
+            'intent': 'error',
+            'parameters': {},
+            'confidence': 0.0,
+            'error': str(error)
+        }
+    
+    def recognize_many(self, inputs: List[str], batch_size: int = 16) -> List[Dict]:
+        """
+        Recognize intents for many commands, batching the LLM tier
+        
+        Cache, rule and embedding tiers run per command as in recognize();
+        every command that still needs the LLM is generated together, up to
+        batch_size prompts per call. All prompts share the SYSTEM_PROMPT
+        prefix, so with prefix caching its KV blocks are computed once for
+        the whole batch.
+        
+        Args:
+            inputs: Natural language commands
+            batch_size: Maximum prompts per generate call
+            
+        Returns:
+            List of results in the same order as inputs (same fields as
+            recognize(); latency_ms of LLM results is the batch time
+            divided by the batch size)
+        """
+        results: List[Optional[Dict]] = [None] * len(inputs)
+        pending: Dict[str, List[int]] = {}
+        
+        for i, user_input in enumerate(inputs):
+            start = time.perf_counter()
+            if self.cache is not None:
+                cached = self.cache.get(user_input)
+                if cached is not None:
+                    results[i] = self._record_tier('cache', cached, start)
+                    continue
+            
+            if self.rules is not None:
+                result = self.rules.match(user_input)
+                if result is not None:
+                    results[i] = self._finish(user_input, 'rules', result, start)
+                    continue
+            
+            if self.classifier is not None:
+                result = self._recognize_embedding(user_input)
+                if result is not None:
+                    results[i] = self._finish(user_input, 'embedding', result, start)
+                    continue
+            
+            # Identical commands are generated once
+            pending.setdefault(user_input, []).append(i)
+        
+        unique = list(pending)
+        for offset in range(0, len(unique), max(1, batch_size)):
+            batch = unique[offset:offset + batch_size]
+            start = time.perf_counter()
+            try:
+                responses = self._generate_batch([self._build_prompt(text) for text in batch])
+                batch_results = []
+                for user_input, response in zip(batch, responses):
+                    if self.constrained:
+                        # Batched calls cannot be cancelled per request; trim after the fact
+                        stop = JsonStopStreamer()
+                        stop(response)
+                        response = stop.text()
+                    batch_results.append(self._llm_result(response, user_input))
+            except Exception as e:
+                batch_results = [self._error_result(e) for _ in batch]
+            
+            served = sum(len(pending[user_input]) for user_input in batch)
+            share_ms = (time.perf_counter() - start) * 1000 / served
+            for user_input, result in zip(batch, batch_results):
+                self._cache_result(user_input, result)
+                for i in pending[user_input]:
+                    copy = dict(result, parameters=dict(result['parameters']))
+                    results[i] = self._count_tier('llm', copy, share_ms)
+        
+        return results
+    
+    def _finish(self, user_input: str, tier: str, result: Dict, start: float) -> Dict:
+        """Store a fresh result in the cache and record its tier"""
+        self._cache_result(user_input, result)
+        return self._record_tier(tier, result, start)
+    
+    def _cache_result(self, user_input: str, result: Dict):
+        """Offer a result to the cache; a cache failure never fails recognition"""
+        if self.cache is None:
+            return
+        try:
+            self.cache.put(user_input, result)
+        except Exception:
+            pass
+    
+    def _recognize_embedding(self, user_input: str) -> Optional[Dict]:
+        """
+        Classify with the embedding index; returns None when the match is
+        not confident or parameter extraction fails, so the LLM tier runs
+        """
+        try:
+            match = self.classifier.classify(user_input)
+            intent = match['intent']
+            if not match['confident'] or intent not in self.EXPECTED_PARAMS:
+                return None
+            
+            parameters = {}
+            if self.EXPECTED_PARAMS[intent]:
+                parameters = self._extract_parameters(user_input, intent)
+                if parameters is None:
+                    return None
+        except Exception:
+            return None
+        
+        return {
+            'intent': intent,
+            'parameters': parameters,
+            'confidence': match['score'],
+        }
+    
+    def _extract_parameters(self, user_input: str, intent: str) -> Optional[Dict]:
+        """
+        Generate only the parameters object for a known intent
+
+        The intent is written into the prompt after the shared SYSTEM_PROMPT
+        prefix, so the model starts directly at the parameters object.
+        """
+        if intent not in self._param_configs:
+            self._param_configs[intent] = self._make_config(self.parameters_schema(intent))
+        prompt = f'{self._build_prompt(user_input)} {{"intent": "{intent}", "parameters": '
+        
+        streamer = JsonStopStreamer()
+        response = self._generate(prompt, self._param_configs[intent], streamer)
+        if streamer.done:
+            response = streamer.text()
+        
+        json_match = re.search(r'\{.*\}', response, re.DOTALL)
+        if not json_match:
+            return None
+        try:
+            parameters = json.loads(json_match.group(0))
+        except json.JSONDecodeError:
+            return None
+        if not isinstance(parameters, dict) or not all(
+            key in parameters for key in self.EXPECTED_PARAMS[intent]
+        ):
+            return None
+        return self._validate_parameters(intent, parameters)
+    
+    def _record_tier(self, tier: str, result: Dict, start: float) -> Dict:
+        """Attach tier and latency since start to a result and update per-tier stats"""
+        return self._count_tier(tier, result, (time.perf_counter() - start) * 1000)
+    
+    def _count_tier(self, tier: str, result: Dict, elapsed_ms: float) -> Dict:
+        """Attach tier and latency to a result and update per-tier stats"""
+        stats = self.tier_stats[tier]
+        stats['hits'] += 1
+        stats['total_ms'] += elapsed_ms
+        result['tier'] = tier
+        result['latency_ms'] = elapsed_ms
+        return result
+    
+    def get_tier_stats(self) -> Dict:
+        """
+        Get per-tier hit counts and latencies
+        
+        Returns:
+            Dictionary keyed by tier with hits, total_ms, avg_ms and share
+            (fraction of all recognitions answered by that tier)
+        """
+        total_hits = sum(stats['hits'] for stats in self.tier_stats.values())
+        report = {}
+        for tier, stats in self.tier_stats.items():
+            hits = stats['hits']
+            report[tier] = {
+                'hits': hits,
+                'total_ms': stats['total_ms'],
+                'avg_ms': stats['total_ms'] / hits if hits else None,
+                'share': hits / total_hits if total_hits else None,
             }
+        return report
     
     def _parse_response(self, response: str, user_input: str = "") -> Dict:
         """
@@ -111,11 +518,18 @@ JSON response:"""
                 json_str = json_match.group(0)
                 parsed = json.loads(json_str)
                 
-                # Validate required fields
-                if 'intent' in parsed:
-                    intent = parsed.get('intent', 'unknown')
-                    parameters = parsed.get('parameters', {})
-                    confidence = parsed.get('confidence', 0.5)
+                # Validate required fields against the intent schema
+                if not isinstance(parsed, dict):
+                    parsed = {}
+                intent = parsed.get('intent')
+                parameters = parsed.get('parameters', {})
+                if (
+                    isinstance(intent, str)
+                    and intent in self.EXPECTED_PARAMS
+                    and isinstance(parameters, dict)
+                    and all(key in parameters for key in self.EXPECTED_PARAMS[intent])
+                ):
+                    confidence = self._coerce_confidence(parsed.get('confidence', 0.5))
                     
                     # Validate parameters based on intent
                     validated_params = self._validate_parameters(intent, parameters)
@@ -139,6 +553,19 @@ JSON response:"""
             else:
                 return self._fallback_recognition(response)
     
+    @staticmethod
+    def _coerce_confidence(value) -> float:
+        """Clamp a model-reported confidence to 0.0-1.0 (0.5 when it is not a number)"""
+        if isinstance(value, bool):
+            return 0.5
+        try:
+            confidence = float(value)
+        except (TypeError, ValueError):
+            return 0.5
+        if confidence != confidence:  # NaN
+            return 0.5
+        return min(max(confidence, 0.0), 1.0)
+    
     def _validate_parameters(self, intent: str, parameters: Dict) -> Dict:
         """
         Validate and clean parameters based on intent
@@ -150,20 +577,10 @@ JSON response:"""
         Returns:
             Validated parameters dictionary
         """
-        # Define expected parameters for each intent
-        expected_params = {
-            'execute_command': ['command'],
-            'read_file': ['path'],
-            'write_file': ['path', 'content'],
-            'list_directory': ['path'],
-            'run_python': ['code'],
-            'chat': []  # No parameters for chat
-        }
-        
-        if intent not in expected_params:
+        if intent not in self.EXPECTED_PARAMS:
             return parameters
         
-        expected = expected_params[intent]
+        expected = self.EXPECTED_PARAMS[intent]
         
         # For chat, always return empty dict
         if intent == 'chat':
@@ -253,15 +670,20 @@ if __name__ == "__main__":
         ]
         
         print("\n=== Intent Recognition Tests ===")
-        for user_input in test_inputs:
+        for user_input, result in zip(test_inputs, recognizer.recognize_many(test_inputs)):
             print(f"\nUser: {user_input}")
-            result = recognizer.recognize(user_input)
             print(f"Intent: {result['intent']}")
             print(f"Parameters: {result['parameters']}")
             print(f"Confidence: {result['confidence']:.2f}")
+            print(f"Tier: {result['tier']} ({result['latency_ms']:.2f} ms)")
             if 'error' in result:
                 print(f"Error: {result['error']}")
         
+        print("\n=== Tier Stats ===")
+        for tier, stats in recognizer.get_tier_stats().items():
+            avg = f"{stats['avg_ms']:.2f} ms" if stats['avg_ms'] is not None else "-"
+            print(f"{tier}: {stats['hits']} hits, avg {avg}")
+        
     except Exception as e:
         print(f"✗ Error: {e}")
         print("Make sure the Llama model is available at:", model_path)
@@ -0,0 +1,209 @@
+"""
+RuleRecognizer - Deterministic fast path for formulaic agent commands
+Answers with compiled, anchored patterns and defers anything ambiguous to the LLM
+"""
+
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+# Commands that are safe to recognize from "run <cmd>" without the model
+KNOWN_COMMANDS = [
+    'dir', 'ls', 'pwd', 'cd', 'echo', 'type', 'cat', 'tree', 'where', 'which',
+    'whoami', 'hostname', 'ipconfig', 'ifconfig', 'ping', 'ver', 'date', 'time',
+    'systeminfo', 'tasklist', 'python', 'pip', 'git', 'set', 'env',
+]
+
+# File extensions that mark the first token of "run <x>" as a script
+SCRIPT_EXTENSIONS = ['bat', 'cmd', 'ps1', 'exe', 'sh', 'py']
+
+# Confidence reported for rule matches (above the LLM's typical 0.8-0.9)
+RULE_CONFIDENCE = 0.95
+
+# Words that mark a natural-language tail ("run dir and tell me ...") rather
+# than a command argument; such inputs are left to the LLM
+_PROSE_WORDS = [
+    'and', 'then', 'or', 'but', 'so', 'tell', 'show', 'give', 'me', 'my', 'you',
+    'your', 'which', 'what', 'who', 'how', 'why', 'when', 'where', 'is', 'are',
+    'the', 'a', 'an', 'it', 'its', 'that', 'this', 'if', 'to', 'for', 'of',
+    'with', 'please',
+]
+
+# Paths never start with '-' ("ls -la" is a command, not a path)
+_PATH = r'(?P<path>"[^"]+"|\'[^\']+\'|(?!-)\S+)'
+_FILE = r'(?P<path>"[^"]+"|\'[^\']+\'|[^\s"\']+\.\w+)'
+
+# Shell operators chain, pipe, redirect or substitute commands. They are
+# rejected everywhere in a command, quoted or not (cmd.exe does not treat
+# single quotes as quoting), so the KNOWN_COMMANDS allowlist cannot be
+# chained past; such inputs are left to the LLM and the safety checker
+SHELL_OPERATORS = '&|;<>$`'
+_SAFE = r'[^\s"\'' + re.escape(SHELL_OPERATORS) + r']'
+_SAFE_QUOTED = r'[^"\'' + re.escape(SHELL_OPERATORS) + r']'
+_SCRIPT = r'(?:"' + _SAFE_QUOTED + r'+"|' + _SAFE + r'+)\.(?:' + '|'.join(SCRIPT_EXTENSIONS) + r')'
+_ARG = (
+    r'(?:"' + _SAFE_QUOTED + r'*"|\'' + _SAFE_QUOTED + r'*\'|'
+    r'(?!(?:' + '|'.join(_PROSE_WORDS) + r')(?:\s|$))' + _SAFE + r'+)'
+)
+_COMMAND = (
+    r'(?P<command>(?:' + '|'.join(KNOWN_COMMANDS) + r'|' + _SCRIPT + r')'
+    r'(?:\s+' + _ARG + r')*?)'
+)
+
+
+def _unquote(value: str) -> str:
+    """Strip one level of matching quotes"""
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in '"\'':
+        return value[1:-1]
+    return value
+
+
+def _list_parameters(m: re.Match) -> Optional[Dict]:
+    """
+    Parameters for the list rule
+
+    A bare word is only taken as a path when the input calls it a folder
+    ("list files in examples", "list examples folder"); on its own
+    ("list examples", "list processes") the rule declines, so the result
+    never depends on the directory the agent runs in.
+    """
+    path = m.group('path')
+    if path is None:
+        return {'path': '.'}
+    bare = not path.startswith(('"', "'")) and not re.search(r'[\\/.:~]', path)
+    if bare and not (m.group('cue') or m.group('suffix')):
+        return None
+    return {'path': _unquote(path)}
+
+
+class RuleRecognizer:
+    """
+    Recognizes unambiguous commands with anchored regular expressions
+
+    Every rule must match the whole input; anything that does not match
+    exactly is left to the LLM tier, so precision is favoured over recall.
+    """
+
+    def __init__(self):
+        """Compile the rule table"""
+        self.rules: List[Tuple[str, re.Pattern, Callable[[re.Match], Optional[Dict]]]] = [
+            (
+                'run_python',
+                re.compile(r'^(?:run\s+)?python\s*:\s*(?P<code>.+)$', re.IGNORECASE | re.DOTALL),
+                lambda m: {'code': m.group('code').strip()},
+            ),
+            (
+                'run_python',
+                re.compile(r'^(?:calculate|calc|compute)\s+(?P<expr>[\d\s+\-*/().%]+?)\s*[?=]?$', re.IGNORECASE),
+                lambda m: {'code': f"print({m.group('expr').strip()})"},
+            ),
+            (
+                'execute_command',
+                re.compile(r'^(?:run|execute|exec)\s+' + _COMMAND + r'(?:\s+command)?$', re.IGNORECASE),
+                lambda m: {'command': m.group('command').strip()},
+            ),
+            (
+                'read_file',
+                re.compile(
+                    r'^(?:read|show|cat|display|open|view)\s+(?:the\s+)?(?:file\s+)?' + _FILE + r'$',
+                    re.IGNORECASE,
+                ),
+                lambda m: {'path': _unquote(m.group('path'))},
+            ),
+            (
+                'write_file',
+                re.compile(
+                    r'^(?:create|write)\s+(?:(?:a|the)\s+)?(?:file\s+)?(?:to\s+)?' + _FILE
+                    + r'\s+with(?:\s+content)?\s+(?P<content>.+)$',
+                    re.IGNORECASE | re.DOTALL,
+                ),
+                lambda m: {'path': _unquote(m.group('path')), 'content': _unquote(m.group('content'))},
+            ),
+            (
+                'list_directory',
+                re.compile(
+                    r'^(?:list|ls)(?P<cue>\s+(?:all\s+)?files)?(?:\s+in)?(?:\s+the)?(?:\s+(?:current|this))?'
+                    r'(?:\s+(?!(?:current|this|folder|directory|dir)$)' + _PATH + r')?'
+                    r'(?:\s+(?P<suffix>folder|directory|dir))?$',
+                    re.IGNORECASE,
+                ),
+                _list_parameters,
+            ),
+            (
+                'chat',
+                re.compile(
+                    r'^(?:hi|hello|hey|help|thanks|thank\s+you|what\s+can\s+you\s+do)[\s!?.,]*$',
+                    re.IGNORECASE,
+                ),
+                lambda m: {},
+            ),
+        ]
+
+    def match(self, user_input: str) -> Optional[Dict]:
+        """
+        Match user input against the rule table
+
+        Args:
+            user_input: Natural language command from user
+
+        Returns:
+            Intent dictionary (intent, parameters, confidence), or None when
+            no rule matches the whole input
+        """
+        text = ' '.join(user_input.split())
+        if not text:
+            return None
+
+        for intent, pattern, build in self.rules:
+            match = pattern.match(text)
+            if not match:
+                continue
+            parameters = build(match)
+            # A builder returns None when the match is not a safe reading
+            if parameters is not None:
+                return {
+                    'intent': intent,
+                    'parameters': parameters,
+                    'confidence': RULE_CONFIDENCE,
+                }
+        return None
+
+
+# Example usage and testing
+if __name__ == "__main__":
+    rules = RuleRecognizer()
+
+    test_inputs = [
+        "run dir",
+        "run dir command",
+        "execute test.bat",
+        "run C:\\path\\to\\file.bat",
+        "read README.md",
+        "show config.yaml",
+        "list examples",
+        "list files in examples directory",
+        "calculate 2+2",
+        "run python: print('hi')",
+        "create test.txt with content 'hello world'",
+        "hello",
+        "run the tests and tell me what failed",
+        "show directory",
+        "list files",
+        "list the current folder",
+        "run dir and tell me which file is biggest",
+        "run git status",
+        "run dir /s",
+        "list processes",
+        "ls -la",
+        "run dir && del /q *",
+        "exec echo $(whoami)",
+    ]
+
+    print("=== Rule Recognition Tests ===")
+    for user_input in test_inputs:
+        result = rules.match(user_input)
+        if result:
+            print(f"✓ {user_input!r} -> {result['intent']} {result['parameters']}")
+        else:
+            print(f"· {user_input!r} -> (LLM)")
@@ -60,6 +60,47 @@ class AgentLogger:
             f.write(f"Recognized Intent: {intent_result.get('intent', 'unknown')}\n")
             f.write(f"Parameters: {intent_result.get('parameters', {})}\n")
             f.write(f"Confidence: {intent_result.get('confidence', 0.0):.2f}\n")
+            if 'tier' in intent_result:
+                f.write(f"Tier: {intent_result['tier']} ({intent_result.get('latency_ms', 0.0):.2f} ms)\n")
+            f.write("-" * 80 + "\n\n")
+    
+    def log_intent_stats(self, tier_stats: Dict):
+        """
+        Log per-tier intent recognition statistics
+        
+        Args:
+            tier_stats: Result from IntentRecognizer.get_tier_stats()
+        """
+        if not self.enabled:
+            return
+        
+        with open(self.log_file, 'a', encoding='utf-8') as f:
+            f.write(f"[{self._format_timestamp()}] INTENT STATS\n")
+            for tier, stats in tier_stats.items():
+                avg = f"{stats['avg_ms']:.2f} ms" if stats['avg_ms'] is not None else "-"
+                share = f"{stats['share'] * 100:.1f}%" if stats['share'] is not None else "-"
+                f.write(f"{tier}: {stats['hits']} hits ({share}), avg {avg}\n")
+            f.write("-" * 80 + "\n\n")
+    
+    def log_cache_stats(self, cache_stats: Dict):
+        """
+        Log intent cache statistics
+        
+        Args:
+            cache_stats: Result from IntentCache.stats()
+        """
+        if not self.enabled:
+            return
+        
+        rate = f"{cache_stats['hit_rate'] * 100:.1f}%" if cache_stats['hit_rate'] is not None else "-"
+        with open(self.log_file, 'a', encoding='utf-8') as f:
+            f.write(f"[{self._format_timestamp()}] INTENT CACHE\n")
+            f.write(f"Hits: {cache_stats['hits']}\n")
+            f.write(f"Misses: {cache_stats['misses']}\n")
+            f.write(f"Hit Rate: {rate}\n")
+            f.write(f"Expired: {cache_stats['expired']}\n")
+            f.write(f"Evictions: {cache_stats['evictions']}\n")
+            f.write(f"Entries: {cache_stats['entries']}/{cache_stats['max_entries']} (loaded {cache_stats['loaded']})\n")
             f.write("-" * 80 + "\n\n")
     
     def log_execution(self, tool: str, parameters: Dict, result: Dict):
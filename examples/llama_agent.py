@@ -10,10 +10,12 @@ from pathlib import Path
 # Import agent components
 from agent.safety_checker import SafetyChecker
 from agent.intent_recognizer import IntentRecognizer
+from agent.intent_cache import IntentCache
 from agent.tool_router import ToolRouter
 from agent.logger import AgentLogger
 from agent.executors.command import CommandExecutor
 from agent.executors.file import FileOperator
+from pipeline_factory import DEFAULT_CACHE_ROOT
 
 
 class LlamaAgent:
@@ -39,7 +41,49 @@ class LlamaAgent:
         print("  Loading Llama model for intent recognition...")
         model_path = self.config['model']['path']
         device = self.config['model']['device']
-        self.recognizer = IntentRecognizer(model_path, device)
+        cache_dir = self.config['model'].get('cache_dir', DEFAULT_CACHE_ROOT)
+        intent_config = self.config.get('intent', {})
+        classifier = None
+        embedding_config = intent_config.get('embedding', {})
+        if embedding_config.get('enabled', False):
+            from agent.intent_embeddings import EmbeddingClassifier
+            
+            print("  Loading embedding model for intent classification...")
+            classifier = EmbeddingClassifier(
+                embedding_config['model_path'],
+                embedding_config.get('device', 'CPU'),
+                exemplars_path=embedding_config.get('exemplars', 'config/intent_exemplars.yaml'),
+                index_dir=embedding_config.get('index_dir', './models/.intent_index'),
+                cache_dir=cache_dir,
+                top_k=embedding_config.get('top_k', 5),
+                threshold=embedding_config.get('threshold', 0.8),
+            )
+            print(f"  Exemplar index: {len(classifier.index.entries)} commands")
+        
+        self.intent_cache = None
+        cache_config = intent_config.get('cache', {})
+        if cache_config.get('enabled', True):
+            self.intent_cache = IntentCache(
+                max_entries=cache_config.get('max_entries', 512),
+                ttl_seconds=cache_config.get('ttl_seconds', 86400),
+                persist_path=cache_config.get('persist_path'),
+            )
+            if self.intent_cache.loaded:
+                print(f"  Intent cache: {self.intent_cache.loaded} commands restored")
+        self.recognizer = IntentRecognizer(
+            model_path,
+            device,
+            cache_dir=cache_dir,
+            prefix_caching=self.config['model'].get('prefix_caching', True),
+            kv_cache_size_gb=self.config['model'].get('kv_cache_size_gb', 1),
+            use_rules=intent_config.get('rules', True),
+            constrained=intent_config.get('constrained', True),
+            classifier=classifier,
+            cache=self.intent_cache,
+        )
+        load_info = self.recognizer.load_info
+        cache_state = {True: 'hit', False: 'miss'}.get(load_info['cache_hit'], 'disabled')
+        print(f"  Model loaded in {load_info['load_time']:.2f}s (compiled cache: {cache_state})")
         
         print("  Initializing tool router...")
         self.router = ToolRouter()
@@ -228,7 +272,10 @@ class LlamaAgent:
             intent = intent_result['intent']
             confidence = intent_result['confidence']
             
-            print(f"   Intent: {intent} (confidence: {confidence:.2f})")
+            print(
+                f"   Intent: {intent} (confidence: {confidence:.2f}, "
+                f"{intent_result['tier']}: {intent_result['latency_ms']:.1f} ms)"
+            )
             
             # Route and execute
             print("   Executing...")
@@ -244,6 +291,26 @@ class LlamaAgent:
             self.logger.log_error('LlamaAgent', error_msg)
             return f"❌ {error_msg}"
     
+    def _end_session(self):
+        """Report intent recognition stats and close the session log"""
+        tier_stats = self.recognizer.get_tier_stats()
+        print("\n📊 Intent recognition:")
+        for tier, stats in tier_stats.items():
+            avg = f"{stats['avg_ms']:.1f} ms" if stats['avg_ms'] is not None else "-"
+            print(f"   {tier}: {stats['hits']} hits, avg {avg}")
+        self.logger.log_intent_stats(tier_stats)
+        if self.intent_cache is not None:
+            cache_stats = self.intent_cache.stats()
+            rate = f"{cache_stats['hit_rate'] * 100:.1f}%" if cache_stats['hit_rate'] is not None else "-"
+            print(f"   cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses ({rate})")
+            self.logger.log_cache_stats(cache_stats)
+            try:
+                self.intent_cache.save()
+            except OSError as e:
+                print(f"   ⚠️  Intent cache not saved: {e}")
+                self.logger.log_error('IntentCache', str(e))
+        self.logger.log_session_end()
+    
     def run(self):
         """Run interactive agent loop"""
         print("=" * 80)
@@ -266,7 +333,7 @@ class LlamaAgent:
                 # Check for exit commands
                 if user_input.lower() in ['quit', 'exit', 'bye', 'q']:
                     print("\n👋 Goodbye! Ending session...")
-                    self.logger.log_session_end()
+                    self._end_session()
                     break
                 
                 if not user_input:
@@ -280,11 +347,11 @@ class LlamaAgent:
         
         except KeyboardInterrupt:
             print("\n\n👋 Session interrupted. Goodbye!")
-            self.logger.log_session_end()
+            self._end_session()
         except Exception as e:
             print(f"\n❌ Fatal error: {e}")
             self.logger.log_error('run', str(e))
-            self.logger.log_session_end()
+            self._end_session()
 
 
 def main():
@@ -3,16 +3,30 @@ Llama 批量推理測試
 使用 OpenVINO GenAI API 測試多個問題
 
 執行方式：
-    python examples/llama_batch_inference.py          # CPU 模式
-    python examples/llama_batch_inference.py GPU      # GPU 模式
-    python examples/llama_batch_inference.py --custom # 自訂問題
+    python examples/llama_batch_inference.py                 # CPU 模式
+    python examples/llama_batch_inference.py GPU             # GPU 模式
+    python examples/llama_batch_inference.py --custom        # 自訂問題
+    python examples/llama_batch_inference.py --batch-size 8  # 真正的批次生成
+    python examples/llama_batch_inference.py --continuous    # 連續批次引擎
+    python examples/llama_batch_inference.py --input prompts.jsonl  # 串流處理大量問題，可續跑
+    python examples/llama_batch_inference.py --workers 2     # 多程序，每個程序綁定一個 NUMA 節點
+    python examples/llama_batch_inference.py --draft-model ./models/tinyllama-openvino-int4  # speculative decoding
 """
 
-import openvino_genai as ov_genai
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
 import sys
 import os
 import time
-from typing import List, Dict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import islice
+from typing import Iterator, List, Dict, Optional, Set, Tuple
+
+from pipeline_factory import describe_load, get_registry, speculative_stats
+from response_cache import ResponseCache, effective_generation_config, is_deterministic, load_cache_settings
 
 def get_default_prompts() -> List[str]:
     """獲取預設測試問題集"""
@@ -43,11 +57,593 @@ def get_custom_prompts() -> List[str]:
     
     return prompts if prompts else get_default_prompts()
 
+# 所有模式共用的生成參數
+GENERATION_KWARGS = {"temperature": 0.7, "top_p": 0.9}
+
+
+def generation_config(max_tokens: int, assistant_tokens: Optional[int] = None) -> Dict:
+    """實際使用的生成參數（也是回應快取鍵的一部分）
+    
+    Args:
+        max_tokens: 最大生成 token 數
+        assistant_tokens: speculative decoding 每步由草稿模型提出的 token 數
+    """
+    config = {"max_new_tokens": max_tokens, **GENERATION_KWARGS}
+    if assistant_tokens:
+        config["num_assistant_tokens"] = assistant_tokens
+    return config
+
+
+def speculative_fields(output) -> Dict:
+    """speculative decoding 的接受率欄位（非 speculative 時為空）"""
+    stats = speculative_stats(output)
+    return {"acceptance_rate": stats["acceptance_rate"]} if stats else {}
+
+
+def count_tokens(tokenizer, text: str, add_special_tokens: bool = True) -> Optional[int]:
+    """以 pipeline 的 tokenizer 計算 token 數，無法計算時回傳 None"""
+    try:
+        try:
+            encoded = tokenizer.encode(text, add_special_tokens=add_special_tokens)
+        except TypeError:
+            # 舊版 tokenizer 不支援 add_special_tokens
+            encoded = tokenizer.encode(text)
+        return int(encoded.input_ids.shape[1])
+    except Exception:
+        return None
+
+
+def get_tokenizer(pipe):
+    try:
+        return pipe.get_tokenizer()
+    except Exception:
+        return None
+
+
+def prompt_length(pipe, prompt: str) -> int:
+    """取得提示詞的 token 長度（tokenizer 不可用時退回字數，僅供分組使用）"""
+    length = count_tokens(get_tokenizer(pipe), prompt)
+    return length if length is not None else len(prompt.split())
+
+
+class LatencyRecorder:
+    """generate 的 streamer 回呼，記錄每段輸出的時間點
+    
+    回呼以解碼後的文字片段觸發，片段數不一定等於 token 數；TTFT 取第一個
+    片段的時間，每 token 延遲以第一個片段之後的時間除以其餘 token 數計算。
+    """
+    
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.first = None
+        self.last = None
+    
+    def __call__(self, subword: str) -> bool:
+        now = time.perf_counter()
+        if self.first is None:
+            self.first = now
+        self.last = now
+        return False  # False 表示繼續生成
+    
+    def ttft_ms(self) -> Optional[float]:
+        return (self.first - self.start) * 1000 if self.first is not None else None
+    
+    def tpot_ms(self, output_tokens: Optional[int], end: Optional[float] = None) -> Optional[float]:
+        end = end if end is not None else self.last
+        if self.first is None or not output_tokens or output_tokens < 2:
+            return None
+        return (end - self.first) * 1000 / (output_tokens - 1)
+
+
+def build_result(
+    index: int,
+    prompt: str,
+    text: str,
+    elapsed: float,
+    input_tokens: Optional[int],
+    output_tokens: Optional[int],
+    ttft_ms: Optional[float] = None,
+    tpot_ms: Optional[float] = None,
+    **extra
+) -> Dict:
+    """整理單題結果（token 數為 tokenizer / perf metrics 的實際值；近似值另以 output_tokens_approx 標示）"""
+    return {
+        "index": index,
+        "prompt": prompt,
+        "result": text,
+        "time": elapsed,
+        **extra,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "tokens_per_sec": output_tokens / elapsed if output_tokens and elapsed > 0 else None,
+        "ttft_ms": ttft_ms,
+        "tpot_ms": tpot_ms
+    }
+
+
+def apportion_tokens(estimates: List[Optional[int]], total: int) -> List[int]:
+    """依各題的估計值比例分配整批的實際 token 數（最大餘數法），分配結果的加總等於 total"""
+    weights = [max(count or 0, 0) for count in estimates]
+    if not weights:
+        return []
+    weight_sum = sum(weights)
+    if weight_sum == 0:
+        weights = [1] * len(weights)
+        weight_sum = len(weights)
+    
+    shares = [total * weight / weight_sum for weight in weights]
+    counts = [int(share) for share in shares]
+    by_remainder = sorted(range(len(shares)), key=lambda i: shares[i] - counts[i], reverse=True)
+    for i in by_remainder[:total - sum(counts)]:
+        counts[i] += 1
+    return counts
+
+
+def print_token_line(result: Dict):
+    """顯示單題的 token 數與延遲（近似的輸出 token 數以 ≈ 標示）"""
+    approx = "≈" if result.get("output_tokens_approx") else ""
+    parts = [f"🔢 輸入 {result['input_tokens']} / 輸出 {approx}{result['output_tokens']} tokens"]
+    if result["tokens_per_sec"] is not None:
+        parts.append(f"⚡ {result['tokens_per_sec']:.1f} tokens/秒")
+    if result["ttft_ms"] is not None:
+        parts.append(f"TTFT {result['ttft_ms']:.0f} ms")
+    if result["tpot_ms"] is not None:
+        parts.append(f"每 token {result['tpot_ms']:.1f} ms")
+    if result.get("acceptance_rate") is not None:
+        parts.append(f"接受率 {result['acceptance_rate'] * 100:.0f}%")
+    print("，".join(parts))
+
+
+def make_batches(lengths: List[int], batch_size: int, bucket: bool = True) -> List[List[int]]:
+    """將問題索引分組為批次
+    
+    Args:
+        lengths: 每個問題的長度
+        batch_size: 每批問題數
+        bucket: 是否依長度排序後分組，讓長度相近的問題同批以減少 padding
+        
+    Returns:
+        每批的問題索引列表
+    """
+    order = list(range(len(lengths)))
+    if bucket:
+        order.sort(key=lambda i: lengths[i])
+    return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+def run_serial(
+    pipe,
+    prompts: List[str],
+    max_tokens: int,
+    assistant_tokens: Optional[int] = None
+) -> List[Dict]:
+    """逐個處理問題（每題一次 generate），以 streamer 回呼量測 TTFT 與每 token 延遲"""
+    tokenizer = get_tokenizer(pipe)
+    config = generation_config(max_tokens, assistant_tokens)
+    results = []
+    for i, prompt in enumerate(prompts, 1):
+        print(f"[{i}/{len(prompts)}] {prompt}")
+        print("-" * 70)
+        
+        # 執行推理
+        start_time = time.time()
+        try:
+            recorder = LatencyRecorder()
+            # 以單元素列表呼叫才會回傳帶有 perf_metrics / extended_perf_metrics 的 DecodedResults
+            output = pipe.generate([prompt], streamer=recorder, **config)
+            elapsed = time.time() - start_time
+            text = output.texts[0]
+            
+            # 優先使用 perf metrics 的實際 token 數，否則以 tokenizer 計算
+            perf_metrics = getattr(output, "perf_metrics", None)
+            if perf_metrics is not None:
+                input_tokens = perf_metrics.get_num_input_tokens()
+                output_tokens = perf_metrics.get_num_generated_tokens()
+            else:
+                input_tokens = count_tokens(tokenizer, prompt)
+                output_tokens = count_tokens(tokenizer, text, add_special_tokens=False)
+            
+            result = build_result(
+                i, prompt, text, elapsed, input_tokens, output_tokens,
+                ttft_ms=recorder.ttft_ms(),
+                tpot_ms=recorder.tpot_ms(output_tokens),
+                **speculative_fields(output)
+            )
+            
+            print(f"回答: {text}")
+            print(f"⏱️  耗時: {elapsed:.2f} 秒")
+            print_token_line(result)
+            print()
+            
+            results.append(result)
+            
+        except Exception as e:
+            print(f"❌ 錯誤: {e}\n")
+            results.append({
+                "index": i,
+                "prompt": prompt,
+                "result": None,
+                "error": str(e)
+            })
+    
+    return results
+
+
+def run_batched(
+    pipe,
+    prompts: List[str],
+    max_tokens: int,
+    batch_size: int,
+    bucket: bool = True,
+    assistant_tokens: Optional[int] = None
+) -> List[Dict]:
+    """以單次 generate 呼叫處理一整批問題
+    
+    結果依原始問題順序回傳；每題的 time 為所屬批次的延遲。批次生成不支援
+    streamer，無法取得單題的 TTFT 與每 token 延遲（ttft_ms / tpot_ms 為 None），
+    該批次 perf metrics 的值另存於 batch_ttft_ms / batch_tpot_ms。各題的輸出 token 數
+    為近似值（output_tokens_approx 為 True），但同批加總等於 perf metrics 的實際生成數。
+    """
+    tokenizer = get_tokenizer(pipe)
+    config = generation_config(max_tokens, assistant_tokens)
+    lengths = [prompt_length(pipe, prompt) for prompt in prompts]
+    batches = make_batches(lengths, batch_size, bucket)
+    results: List[Dict] = [None] * len(prompts)
+    
+    for batch_id, indices in enumerate(batches, 1):
+        batch_prompts = [prompts[i] for i in indices]
+        print(f"[批次 {batch_id}/{len(batches)}] {len(indices)} 題，"
+              f"長度 {min(lengths[i] for i in indices)}-{max(lengths[i] for i in indices)}")
+        
+        start_time = time.time()
+        try:
+            decoded = pipe.generate(batch_prompts, **config)
+            elapsed = time.time() - start_time
+            
+            perf_metrics = getattr(decoded, "perf_metrics", None)
+            batch_ttft_ms = perf_metrics.get_ttft().mean if perf_metrics is not None else None
+            batch_tpot_ms = perf_metrics.get_tpot().mean if perf_metrics is not None else None
+            # 接受率為整批的統計
+            speculative = speculative_fields(decoded)
+            
+            # DecodedResults 沒有各題的 token ids：整批的實際生成數取自 perf metrics，
+            # 各題的輸出 token 數為依重新編碼長度分配的近似值（output_tokens_approx）
+            estimates = [count_tokens(tokenizer, text, add_special_tokens=False) for text in decoded.texts]
+            if perf_metrics is not None:
+                batch_tokens = perf_metrics.get_num_generated_tokens()
+                output_counts = apportion_tokens(estimates, batch_tokens)
+            else:
+                output_counts = estimates
+                batch_tokens = sum(count or 0 for count in estimates)
+            
+            for i, text, output_tokens in zip(indices, decoded.texts, output_counts):
+                results[i] = build_result(
+                    i + 1, prompts[i], text, elapsed,
+                    count_tokens(tokenizer, prompts[i]), output_tokens,
+                    batch=batch_id, batch_ttft_ms=batch_ttft_ms, batch_tpot_ms=batch_tpot_ms,
+                    output_tokens_approx=True, **speculative
+                )
+            
+            batch_line = (f"⏱️  耗時: {elapsed:.2f} 秒，🔢 {batch_tokens} tokens，"
+                          f"⚡ {batch_tokens/elapsed:.1f} tokens/秒")
+            if batch_ttft_ms is not None:
+                batch_line += f"，批次 TTFT {batch_ttft_ms:.0f} ms，批次每 token {batch_tpot_ms:.1f} ms"
+            print(batch_line + "\n")
+            
+        except Exception as e:
+            print(f"❌ 錯誤: {e}\n")
+            for i in indices:
+                results[i] = {
+                    "index": i + 1,
+                    "prompt": prompts[i],
+                    "result": None,
+                    "batch": batch_id,
+                    "error": str(e)
+                }
+    
+    for r in results:
+        if "error" not in r:
+            print(f"[{r['index']}/{len(prompts)}] {r['prompt']}")
+            print(f"回答: {r['result']}")
+            print_token_line(r)
+            print()
+    
+    return results
+
+
+def continuous_config(pipe, max_tokens: int, assistant_tokens: Optional[int] = None):
+    """ContinuousBatchingPipeline 使用的 GenerationConfig"""
+    config = pipe.get_config()
+    for name, value in generation_config(max_tokens, assistant_tokens).items():
+        setattr(config, name, value)
+    return config
+
+
+def handle_result(
+    handle,
+    index: int,
+    prompt: str,
+    tokenizer,
+    submitted_at: float,
+    first_token_at: Optional[float],
+    finished_at: float
+) -> Dict:
+    """將已結束的請求整理為單題結果（time 為從送出到完成的延遲）"""
+    import openvino_genai as ov_genai
+    
+    status = handle.get_status()
+    if status != ov_genai.GenerationStatus.FINISHED:
+        return {
+            "index": index,
+            "prompt": prompt,
+            "result": None,
+            "error": f"generation status: {status}"
+        }
+    
+    generated_ids = handle.read_all()[0].generated_ids
+    text = tokenizer.decode(generated_ids)
+    output_tokens = len(generated_ids)
+    
+    ttft_ms = tpot_ms = None
+    if first_token_at is not None:
+        ttft_ms = (first_token_at - submitted_at) * 1000
+        if output_tokens > 1:
+            tpot_ms = (finished_at - first_token_at) * 1000 / (output_tokens - 1)
+    
+    return build_result(
+        index, prompt, text, finished_at - submitted_at, count_tokens(tokenizer, prompt), output_tokens,
+        ttft_ms=ttft_ms, tpot_ms=tpot_ms
+    )
+
+
+def run_continuous(
+    pipe,
+    prompts: List[str],
+    max_tokens: int,
+    assistant_tokens: Optional[int] = None
+) -> List[Dict]:
+    """以 ContinuousBatchingPipeline 處理所有問題
+    
+    所有問題一次排入佇列，由排程器逐步（step）推進；序列一結束就釋放
+    KV cache 區塊，讓佇列中的下一題立即加入，不必等待同批最長的生成。
+    每題的 time 為從送出到完成的延遲，TTFT 為從送出到第一個 token 可讀取的時間。
+    逐步（step）介面的結果不含 extended perf metrics，因此無法提供草稿接受率。
+    """
+    import openvino_genai as ov_genai
+    
+    config = continuous_config(pipe, max_tokens, assistant_tokens)
+    
+    start_time = time.time()
+    handles = {i: pipe.add_request(i, prompt, config) for i, prompt in enumerate(prompts)}
+    first_token_at = {}
+    finished_at = {}
+    steps = 0
+    
+    while pipe.has_non_finished_requests():
+        pipe.step()
+        steps += 1
+        now = time.time()
+        for i, handle in handles.items():
+            if i not in first_token_at and (handle.can_read() or i in finished_at):
+                first_token_at[i] = now
+            if i not in finished_at and handle.get_status() != ov_genai.GenerationStatus.RUNNING:
+                finished_at[i] = now
+                print(f"[{len(finished_at)}/{len(prompts)}] 問題 {i + 1} 完成"
+                      f"（{now - start_time:.2f} 秒，第 {steps} 步）")
+    
+    end_time = time.time()
+    print(f"\n🔁 排程步數: {steps}\n")
+    if assistant_tokens:
+        print("📝 continuous batching 模式無法取得草稿接受率\n")
+    
+    tokenizer = pipe.get_tokenizer()
+    results = []
+    for i, prompt in enumerate(prompts):
+        result = handle_result(
+            handles[i], i + 1, prompt, tokenizer, start_time,
+            first_token_at.get(i), finished_at.get(i, end_time)
+        )
+        results.append(result)
+        if "error" in result:
+            continue
+        print(f"[{i + 1}/{len(prompts)}] {prompt}")
+        print(f"回答: {result['result']}")
+        print_token_line(result)
+        print()
+    
+    return results
+
+
+def iter_continuous(
+    pipe,
+    items: Iterator[Tuple[object, str]],
+    max_tokens: int,
+    assistant_tokens: Optional[int] = None,
+    max_in_flight: int = 32
+) -> Iterator[Tuple[object, Dict]]:
+    """以 ContinuousBatchingPipeline 串流處理 (key, prompt)，產出 (key, 結果)
+    
+    佇列中最多同時有 max_in_flight 題；任一題結束就立即產出其結果並從
+    items 補入下一題，佇列不必等待同組最長的生成。結果依完成順序產出。
+    """
+    import openvino_genai as ov_genai
+    
+    config = continuous_config(pipe, max_tokens, assistant_tokens)
+    tokenizer = pipe.get_tokenizer()
+    in_flight: Dict[int, Tuple[object, str, object, float]] = {}
+    first_token_at: Dict[int, float] = {}
+    next_request = 0
+    exhausted = False
+    
+    while True:
+        while not exhausted and len(in_flight) < max_in_flight:
+            item = next(items, None)
+            if item is None:
+                exhausted = True
+                break
+            key, prompt = item
+            in_flight[next_request] = (key, prompt, pipe.add_request(next_request, prompt, config), time.time())
+            next_request += 1
+        if not in_flight:
+            break
+        
+        pipe.step()
+        now = time.time()
+        for request_id in list(in_flight):
+            key, prompt, handle, submitted_at = in_flight[request_id]
+            running = handle.get_status() == ov_genai.GenerationStatus.RUNNING
+            if request_id not in first_token_at and (handle.can_read() or not running):
+                first_token_at[request_id] = now
+            if not running:
+                del in_flight[request_id]
+                yield key, handle_result(
+                    handle, request_id + 1, prompt, tokenizer, submitted_at,
+                    first_token_at.pop(request_id), now
+                )
+
+
+def run_engine(
+    pipe,
+    prompts: List[str],
+    max_tokens: int,
+    batch_size: int = 1,
+    bucket: bool = True,
+    scheduler: Optional[Dict] = None,
+    assistant_tokens: Optional[int] = None
+) -> List[Dict]:
+    """依設定選擇逐題、批次或連續批次模式"""
+    if scheduler is not None:
+        return run_continuous(pipe, prompts, max_tokens, assistant_tokens)
+    if batch_size > 1:
+        return run_batched(pipe, prompts, max_tokens, batch_size, bucket, assistant_tokens)
+    return run_serial(pipe, prompts, max_tokens, assistant_tokens)
+
+
+def run_cached(
+    cache: Optional[ResponseCache],
+    pipe,
+    model_path: str,
+    device: str,
+    prompts: List[str],
+    max_tokens: int,
+    runner
+) -> List[Dict]:
+    """先查回應快取，只把未命中的問題交給 runner(prompts)
+    
+    取樣生成（模型預設或參數開啟 do_sample）不使用快取。命中的結果 time 為 0、cached 為 True。
+    確定性解碼下 speculative decoding 的輸出與一般解碼相同，因此快取鍵不含
+    草稿模型設定。
+    """
+    config = generation_config(max_tokens)
+    if cache is None or not is_deterministic(effective_generation_config(pipe, config)):
+        return runner(prompts)
+    
+    keys = [cache.make_key(model_path, device, prompt, config) for prompt in prompts]
+    results: List[Dict] = [None] * len(prompts)
+    misses = []
+    for i, (prompt, key) in enumerate(zip(prompts, keys)):
+        payload = cache.get(key)
+        if payload is None:
+            misses.append(i)
+            continue
+        extra = {"output_tokens_approx": True} if payload.get("output_tokens_approx") else {}
+        results[i] = build_result(
+            i + 1, prompt, payload["text"], 0.0,
+            payload.get("input_tokens"), payload.get("output_tokens"), cached=True, **extra
+        )
+    
+    if len(misses) < len(prompts):
+        print(f"♻️  回應快取命中 {len(prompts) - len(misses)}/{len(prompts)} 題\n")
+    
+    if misses:
+        fresh = runner([prompts[i] for i in misses])
+        for i, result in zip(misses, fresh):
+            result["index"] = i + 1
+            results[i] = result
+            if "error" not in result:
+                cache.put(keys[i], {
+                    "text": result["result"],
+                    "input_tokens": result["input_tokens"],
+                    "output_tokens": result["output_tokens"],
+                    "output_tokens_approx": result.get("output_tokens_approx", False)
+                }, model_path)
+    
+    return results
+
+
+def mean_of(results: List[Dict], key: str) -> Optional[float]:
+    values = [r[key] for r in results if r.get(key) is not None]
+    return sum(values) / len(values) if values else None
+
+
+def print_statistics(results: List[Dict], wall_time: float) -> Dict:
+    """顯示統計並回傳總覽（wall_time 為整體實際耗時）"""
+    print("=" * 70)
+    print("📊 統計結果")
+    print("=" * 70)
+    
+    successful = [r for r in results if "error" not in r]
+    failed = [r for r in results if "error" in r]
+    total_tokens = sum(r["output_tokens"] or 0 for r in successful)
+    total_input = sum(r["input_tokens"] or 0 for r in successful)
+    
+    print(f"\n✅ 成功: {len(successful)}/{len(results)}")
+    if failed:
+        print(f"❌ 失敗: {len(failed)}/{len(results)}")
+    
+    summary = {
+        "wall_time": wall_time,
+        "input_tokens": total_input,
+        "total_tokens": total_tokens,
+        "tokens_per_sec": 0.0,
+        "avg_ttft_ms": mean_of(successful, "ttft_ms"),
+        "avg_tpot_ms": mean_of(successful, "tpot_ms"),
+        # 靜態批次只有整批的 perf metrics，與單題 TTFT 分開統計
+        "avg_batch_ttft_ms": mean_of(successful, "batch_ttft_ms"),
+        "avg_batch_tpot_ms": mean_of(successful, "batch_tpot_ms"),
+        "acceptance_rate": mean_of(successful, "acceptance_rate")
+    }
+    if successful and wall_time > 0:
+        summary["tokens_per_sec"] = total_tokens / wall_time
+        
+        print(f"\n⏱️  總耗時: {wall_time:.2f} 秒")
+        print(f"📈 平均每題: {wall_time/len(successful):.2f} 秒")
+        print(f"🔢 總 tokens: 輸入 {total_input} / 輸出 {total_tokens}")
+        print(f"⚡ 平均速度: {summary['tokens_per_sec']:.1f} tokens/秒")
+        if summary["avg_ttft_ms"] is not None:
+            print(f"⏳ 平均 TTFT: {summary['avg_ttft_ms']:.0f} ms")
+        if summary["avg_tpot_ms"] is not None:
+            print(f"⏱️  平均每 token: {summary['avg_tpot_ms']:.1f} ms")
+        if summary["avg_batch_ttft_ms"] is not None:
+            print(f"⏳ 批次 TTFT（整批指標）: {summary['avg_batch_ttft_ms']:.0f} ms，"
+                  f"批次每 token: {summary['avg_batch_tpot_ms']:.1f} ms")
+        if summary["acceptance_rate"] is not None:
+            print(f"📝 草稿接受率: {summary['acceptance_rate'] * 100:.1f}%")
+        
+        # 最快和最慢
+        fastest = min(successful, key=lambda x: x["time"])
+        slowest = max(successful, key=lambda x: x["time"])
+        
+        print(f"\n🚀 最快: {fastest['time']:.2f}秒 (問題 {fastest['index']})")
+        print(f"🐌 最慢: {slowest['time']:.2f}秒 (問題 {slowest['index']})")
+    
+    print("=" * 70 + "\n")
+    return summary
+
+
 def batch_inference(
     model_path: str,
     prompts: List[str],
     device: str = "CPU",
-    max_tokens: int = 100
+    max_tokens: int = 100,
+    batch_size: int = 1,
+    bucket: bool = True,
+    compare_serial: bool = False,
+    scheduler: Optional[Dict] = None,
+    cache: Optional[ResponseCache] = None,
+    draft_model: Optional[str] = None,
+    assistant_tokens: int = 5,
+    compare_plain: bool = False
 ) -> List[Dict]:
     """執行批量推理
     
@@ -56,6 +652,14 @@ def batch_inference(
         prompts: 問題列表
         device: 推理設備
         max_tokens: 最大生成 token 數
+        batch_size: 每次 generate 處理的問題數（1 表示逐題處理）
+        bucket: 批次模式下是否依長度分組
+        compare_serial: 批次模式下是否先執行逐題模式作為基準並比較吞吐量
+        scheduler: SchedulerConfig 欄位；指定時改用連續批次引擎（忽略 batch_size）
+        cache: 回應快取；執行比較時不使用，以免影響比較
+        draft_model: 草稿模型路徑；指定時以 speculative decoding 生成
+        assistant_tokens: 草稿模型每步提出的 token 數
+        compare_plain: speculative 模式下是否先以一般解碼執行作為基準
         
     Returns:
         結果列表，包含問題、答案和執行時間
@@ -64,98 +668,86 @@ def batch_inference(
     print("🦙 Llama 批量推理測試")
     print("=" * 70)
     print(f"📁 模型: {model_path}")
+    if draft_model:
+        print(f"📝 草稿模型: {draft_model}（每步 {assistant_tokens} tokens）")
     print(f"🖥️  設備: {device}")
     print(f"📊 問題數量: {len(prompts)}")
     print(f"🔢 最大 tokens: {max_tokens}")
+    if scheduler is not None:
+        settings = ", ".join(f"{k}={v}" for k, v in scheduler.items() if v is not None)
+        print(f"🔁 連續批次引擎（{settings or '預設排程設定'}）")
+    elif batch_size > 1:
+        print(f"📦 批次大小: {batch_size}（{'依長度分組' if bucket else '原始順序'}）")
     print("=" * 70 + "\n")
     
-    try:
+    batched = scheduler is not None or batch_size > 1
+    compare_serial = compare_serial and batched
+    compare_plain = compare_plain and draft_model is not None
+    if cache is not None and (compare_serial or compare_plain):
+        print("⚠️  比較模式會停用回應快取\n")
+        cache = None
+    
+    def run_pass(serial: bool, draft: Optional[str]):
+        """載入對應的 pipeline 並執行一輪，回傳 (結果, 統計)"""
+        engine_scheduler = None if serial else scheduler
+        
         # 載入模型
         print("⏳ 載入模型中...")
-        start_load = time.time()
-        pipe = ov_genai.LLMPipeline(model_path, device)
-        load_time = time.time() - start_load
-        print(f"✅ 模型載入完成！(耗時: {load_time:.2f} 秒)\n")
+        pipe, load_info = get_registry().get(
+            model_path, device, scheduler=engine_scheduler, draft_model=draft
+        )
+        print(f"✅ 模型載入完成！({describe_load(load_info)})\n")
         
+        if serial:
+            title = "逐題"
+        elif engine_scheduler is not None:
+            title = "連續批次"
+        else:
+            title = f"批次大小 {batch_size}"
+        if draft:
+            title += "，speculative decoding"
         print("=" * 70)
-        print("🚀 開始批量推理")
+        print(f"🚀 開始批量推理（{title}）")
         print("=" * 70 + "\n")
         
-        results = []
-        total_time = 0
-        total_tokens = 0
-        
-        # 逐個處理問題
-        for i, prompt in enumerate(prompts, 1):
-            print(f"[{i}/{len(prompts)}] {prompt}")
-            print("-" * 70)
-            
-            # 執行推理
-            start_time = time.time()
-            try:
-                result = pipe.generate(
-                    prompt,
-                    max_new_tokens=max_tokens,
-                    temperature=0.7,
-                    top_p=0.9
-                )
-                elapsed = time.time() - start_time
-                
-                # 估算 token 數（簡單估計：字數 / 0.75）
-                estimated_tokens = len(result.split()) / 0.75
-                
-                print(f"回答: {result}")
-                print(f"⏱️  耗時: {elapsed:.2f} 秒")
-                print(f"🔢 約 {int(estimated_tokens)} tokens")
-                print(f"⚡ 速度: {estimated_tokens/elapsed:.1f} tokens/秒\n")
-                
-                results.append({
-                    "index": i,
-                    "prompt": prompt,
-                    "result": result,
-                    "time": elapsed,
-                    "tokens": int(estimated_tokens),
-                    "tokens_per_sec": estimated_tokens / elapsed
-                })
-                
-                total_time += elapsed
-                total_tokens += estimated_tokens
-                
-            except Exception as e:
-                print(f"❌ 錯誤: {e}\n")
-                results.append({
-                    "index": i,
-                    "prompt": prompt,
-                    "result": None,
-                    "error": str(e)
-                })
-        
-        # 顯示統計
-        print("=" * 70)
-        print("📊 統計結果")
-        print("=" * 70)
+        start = time.time()
+        results = run_cached(
+            cache, pipe, model_path, device, prompts, max_tokens,
+            lambda todo: run_engine(
+                pipe, todo, max_tokens, 1 if serial else batch_size, bucket,
+                engine_scheduler, assistant_tokens if draft else None
+            )
+        )
+        return results, print_statistics(results, time.time() - start)
+    
+    try:
+        baseline = None
+        if compare_serial:
+            _, baseline = run_pass(serial=True, draft=draft_model)
+            labels = ("逐題", "批次")
+        elif compare_plain:
+            _, baseline = run_pass(serial=not batched, draft=None)
+            labels = ("一般解碼", "Speculative")
         
-        successful = [r for r in results if "error" not in r]
-        failed = [r for r in results if "error" in r]
+        results, summary = run_pass(serial=not batched, draft=draft_model)
         
-        print(f"\n✅ 成功: {len(successful)}/{len(prompts)}")
-        if failed:
-            print(f"❌ 失敗: {len(failed)}/{len(prompts)}")
+        if baseline and baseline["tokens_per_sec"] > 0:
+            speedup = summary["tokens_per_sec"] / baseline["tokens_per_sec"]
+            print("=" * 70)
+            print(f"⚖️  {labels[1]} vs {labels[0]}")
+            print("=" * 70)
+            for label, stats in zip(labels, (baseline, summary)):
+                line = f"{label}: {stats['wall_time']:.2f} 秒，{stats['tokens_per_sec']:.1f} tokens/秒"
+                if stats["avg_tpot_ms"] is not None:
+                    line += f"，每 token {stats['avg_tpot_ms']:.1f} ms"
+                print(line)
+            print(f"🚀 吞吐量提升: {speedup:.2f}x")
+            if baseline["avg_tpot_ms"] and summary["avg_tpot_ms"]:
+                print(f"⏱️  每 token 延遲: {baseline['avg_tpot_ms'] / summary['avg_tpot_ms']:.2f}x 更快")
+            print("=" * 70 + "\n")
         
-        if successful:
-            print(f"\n⏱️  總耗時: {total_time:.2f} 秒")
-            print(f"📈 平均每題: {total_time/len(successful):.2f} 秒")
-            print(f"🔢 總 tokens: {int(total_tokens)}")
-            print(f"⚡ 平均速度: {total_tokens/total_time:.1f} tokens/秒")
-            
-            # 最快和最慢
-            fastest = min(successful, key=lambda x: x["time"])
-            slowest = max(successful, key=lambda x: x["time"])
-            
-            print(f"\n🚀 最快: {fastest['time']:.2f}秒 (問題 {fastest['index']})")
-            print(f"🐌 最慢: {slowest['time']:.2f}秒 (問題 {slowest['index']})")
-        
-        print("=" * 70 + "\n")
+        if cache is not None:
+            print(f"♻️  回應快取: {cache.describe()}\n")
         
         return results
         
@@ -167,37 +759,570 @@ def batch_inference(
         print(f"\n❌ 錯誤: {e}")
         sys.exit(1)
 
+def iter_prompt_file(path: str) -> Iterator[Tuple[str, str]]:
+    """逐行讀取問題檔，產生 (id, prompt)
+    
+    .jsonl / .json：每行一個物件，含 prompt（或 text）與可選的 id；
+    也可以是單純的 JSON 字串。其他副檔名：每個非空行為一題。
+    未指定 id 時以行號作為 id。
+    """
+    is_json = os.path.splitext(path)[1].lower() in (".jsonl", ".json")
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            if not is_json:
+                yield str(line_no), line
+                continue
+            
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"⚠️  略過第 {line_no} 行（JSON 格式錯誤: {e}）")
+                continue
+            if isinstance(record, str):
+                yield str(line_no), record
+                continue
+            prompt = record.get("prompt", record.get("text"))
+            if not prompt:
+                print(f"⚠️  略過第 {line_no} 行（缺少 prompt）")
+                continue
+            yield str(record.get("id", line_no)), prompt
+
+
+def load_completed_ids(path: str) -> Set[str]:
+    """讀取結果檔中已成功完成的 id（失敗的題目會在續跑時重試）"""
+    completed = set()
+    if not os.path.exists(path):
+        return completed
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if "error" not in record and "id" in record:
+                completed.add(str(record["id"]))
+    return completed
+
+
+def open_results_file(path: str):
+    """以附加模式開啟結果檔；上次中斷留下的不完整末行會先截掉"""
+    if os.path.exists(path):
+        with open(path, "rb+") as f:
+            data_end = f.seek(0, os.SEEK_END)
+            if data_end:
+                # 從檔尾往回找最後一個換行
+                pos = data_end
+                while pos > 0:
+                    step = min(4096, pos)
+                    f.seek(pos - step)
+                    chunk = f.read(step)
+                    newline = chunk.rfind(b"\n")
+                    if newline != -1:
+                        pos = pos - step + newline + 1
+                        break
+                    pos -= step
+                if pos != data_end:
+                    print(f"⚠️  截掉結果檔末尾不完整的 {data_end - pos} 位元組")
+                    f.truncate(pos)
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    return open(path, "a", encoding="utf-8")
+
+
+def parse_cpu_list(text: str) -> List[int]:
+    """解析 sysfs 的 CPU 清單格式（例如 "0-3,8-11"）"""
+    cpus = []
+    for part in text.strip().split(","):
+        if not part:
+            continue
+        if "-" in part:
+            low, high = part.split("-")
+            cpus.extend(range(int(low), int(high) + 1))
+        else:
+            cpus.append(int(part))
+    return cpus
+
+
+def format_cpu_list(cpus: List[int]) -> str:
+    """parse_cpu_list 的反向（例如 [0, 1, 2, 3, 8] -> "0-3,8"）"""
+    ranges = []
+    for cpu in sorted(cpus):
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ",".join(f"{low}-{high}" if low != high else str(low) for low, high in ranges)
+
+
+def read_numa_nodes() -> List[List[int]]:
+    """讀取各 NUMA 節點的 CPU（僅保留本程序可用的 CPU；非 Linux 回傳空列表）"""
+    allowed = set(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else None
+    nodes = []
+    node_root = "/sys/devices/system/node"
+    if not os.path.isdir(node_root):
+        return nodes
+    for name in sorted(os.listdir(node_root)):
+        if not (name.startswith("node") and name[4:].isdigit()):
+            continue
+        try:
+            with open(os.path.join(node_root, name, "cpulist"), "r") as f:
+                cpus = parse_cpu_list(f.read())
+        except OSError:
+            continue
+        if allowed is not None:
+            cpus = [cpu for cpu in cpus if cpu in allowed]
+        if cpus:
+            nodes.append(cpus)
+    return nodes
+
+
+def split_evenly(items: List[int], parts: int) -> List[List[int]]:
+    """將列表切成 parts 段連續區間（長度差最多 1）"""
+    size, extra = divmod(len(items), parts)
+    chunks, start = [], 0
+    for i in range(parts):
+        end = start + size + (1 if i < extra else 0)
+        chunks.append(items[start:end])
+        start = end
+    return chunks
+
+
+def plan_worker_cpus(workers: int, pin: str = "auto") -> List[Optional[List[int]]]:
+    """規劃每個 worker 的 CPU 集合
+    
+    Args:
+        workers: worker 數
+        pin: "auto"（worker 數為 NUMA 節點數的倍數時，每個節點平分給
+            workers / 節點數 個 worker，否則同 cores）、"cores"（可用 CPU
+            平均切成連續區段）、"none"（不綁定）
+        
+    Returns:
+        每個 worker 的 CPU 列表；不綁定時為 None
+    """
+    if pin == "none" or not hasattr(os, "sched_setaffinity"):
+        return [None] * workers
+    
+    nodes = read_numa_nodes()
+    if pin == "auto" and len(nodes) > 1 and workers % len(nodes) == 0:
+        per_node = workers // len(nodes)
+        return [chunk for cpus in nodes for chunk in split_evenly(cpus, per_node)]
+    
+    cpus = sorted(os.sched_getaffinity(0))
+    if len(cpus) < workers:
+        print(f"⚠️  可用 CPU（{len(cpus)}）少於 worker 數，不綁定 CPU")
+        return [None] * workers
+    return split_evenly(cpus, workers)
+
+
+def _failed_report(
+    worker_id: int,
+    cpus: Optional[List[int]],
+    shard: List[Tuple[int, str]],
+    error: str,
+    log: str = ""
+) -> Dict:
+    """worker 失敗時的報告：該 worker 的每題都記為失敗"""
+    return {
+        "worker": worker_id,
+        "pid": None,
+        "cpus": cpus,
+        "error": error,
+        "log": log,
+        "results": [
+            {"index": index, "prompt": prompt, "result": None, "worker": worker_id, "error": error}
+            for index, prompt in shard
+        ]
+    }
+
+
+def _shard_worker(
+    worker_id: int,
+    cpus: Optional[List[int]],
+    model_path: str,
+    device: str,
+    shard: List[Tuple[int, str]],
+    max_tokens: int,
+    batch_size: int,
+    bucket: bool,
+    scheduler: Optional[Dict],
+    cache_settings: Optional[Dict] = None,
+    draft_model: Optional[str] = None,
+    assistant_tokens: Optional[int] = None
+) -> Dict:
+    """worker 程序：綁定 CPU、載入自己的 pipeline，處理分配到的問題
+    
+    逐題輸出收集在 log 中而不直接印出（多個 worker 的輸出會交錯）；
+    例外不會拋出，而是記錄在回傳報告的 error 與 log，其他 worker 的結果不受影響。
+    """
+    log = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(log):
+            properties = {}
+            if cpus:
+                # 先綁定再載入模型，權重依 first-touch 配置在本節點的記憶體
+                os.sched_setaffinity(0, cpus)
+                properties["INFERENCE_NUM_THREADS"] = len(cpus)
+            
+            # 各 worker 開啟同一個快取檔，由 SQLite 協調並行寫入
+            cache = ResponseCache(**cache_settings) if cache_settings else None
+            prompts = [prompt for _, prompt in shard]
+            pipe, load_info = get_registry().get(
+                model_path, device, scheduler=scheduler, draft_model=draft_model, **properties
+            )
+            start = time.time()
+            results = run_cached(
+                cache, pipe, model_path, device, prompts, max_tokens,
+                lambda todo: run_engine(pipe, todo, max_tokens, batch_size, bucket, scheduler, assistant_tokens)
+            )
+            end = time.time()
+    except Exception as e:
+        return _failed_report(worker_id, cpus, shard, f"{type(e).__name__}: {e}", log.getvalue())
+    
+    for (index, _), result in zip(shard, results):
+        result["index"] = index
+        result["worker"] = worker_id
+    
+    return {
+        "worker": worker_id,
+        "pid": os.getpid(),
+        "cpus": cpus,
+        "load_time": load_info["load_time"],
+        "start": start,
+        "end": end,
+        "cache": cache.stats() if cache is not None else None,
+        "log": log.getvalue(),
+        "results": results
+    }
+
+
+def sharded_inference(
+    model_path: str,
+    prompts: List[str],
+    device: str = "CPU",
+    max_tokens: int = 100,
+    workers: int = 2,
+    pin: str = "auto",
+    batch_size: int = 1,
+    bucket: bool = True,
+    scheduler: Optional[Dict] = None,
+    cache_settings: Optional[Dict] = None,
+    draft_model: Optional[str] = None,
+    assistant_tokens: int = 5
+) -> List[Dict]:
+    """多程序批量推理
+    
+    問題以交錯方式（第 i 題給 worker i % N）分配給 N 個 worker 程序，每個
+    程序綁定自己的 CPU 集合並載入獨立的 pipeline；結果依原始順序合併。
+    某個 worker 失敗（例外或程序被終止，例如 OOM）時，其問題記為失敗，
+    已完成的 worker 結果照常保留。
+    
+    Returns:
+        結果列表（與 batch_inference 相同，另含 worker 欄位）
+    """
+    cpu_plan = plan_worker_cpus(workers, pin)
+    shards = [
+        [(i + 1, prompt) for i, prompt in enumerate(prompts) if i % workers == w]
+        for w in range(workers)
+    ]
+    
+    print("=" * 70)
+    print("🦙 Llama 批量推理測試（多程序）")
+    print("=" * 70)
+    print(f"📁 模型: {model_path}")
+    print(f"🖥️  設備: {device}")
+    print(f"📊 問題數量: {len(prompts)}")
+    print(f"👷 Worker 數: {workers}")
+    for w, cpus in enumerate(cpu_plan):
+        binding = f"CPU {format_cpu_list(cpus)}（{len(cpus)} 核）" if cpus else "不綁定"
+        print(f"   worker {w}: {len(shards[w])} 題，{binding}")
+    print("=" * 70 + "\n")
+    
+    print("⏳ 各 worker 載入模型並推理中...\n")
+    reports = []
+    # spawn：子程序不繼承父程序已載入的 OpenVINO 執行緒與記憶體。每個 worker
+    # 使用自己的單程序 executor：某個程序被終止時只有它的 future 拋出
+    # BrokenProcessPool（而不是永遠等待），其他 worker 不受牽連
+    context = multiprocessing.get_context("spawn")
+    with contextlib.ExitStack() as stack:
+        futures = {}
+        for w in range(workers):
+            if not shards[w]:
+                continue
+            pool = stack.enter_context(ProcessPoolExecutor(max_workers=1, mp_context=context))
+            future = pool.submit(
+                _shard_worker, w, cpu_plan[w], model_path, device, shards[w], max_tokens, batch_size,
+                bucket, scheduler, cache_settings, draft_model, assistant_tokens if draft_model else None
+            )
+            futures[future] = w
+        for future in as_completed(futures):
+            w = futures[future]
+            try:
+                reports.append(future.result())
+            except Exception as e:
+                reports.append(_failed_report(w, cpu_plan[w], shards[w], f"{type(e).__name__}: {e}"))
+    reports.sort(key=lambda report: report["worker"])
+    
+    results = sorted((r for report in reports for r in report["results"]), key=lambda r: r["index"])
+    
+    print("=" * 70)
+    print("👷 各 worker 結果")
+    print("=" * 70)
+    for report in reports:
+        if "error" in report:
+            print(f"worker {report['worker']}: ❌ 失敗，{len(report['results'])} 題未完成（{report['error']}）")
+            if report["log"]:
+                print("    最後輸出:")
+                for line in report["log"].rstrip().splitlines()[-10:]:
+                    print(f"    | {line}")
+            continue
+        ok = [r for r in report["results"] if "error" not in r]
+        tokens = sum(r["output_tokens"] or 0 for r in ok)
+        elapsed = report["end"] - report["start"]
+        print(f"worker {report['worker']} (pid {report['pid']}): "
+              f"{len(ok)}/{len(report['results'])} 題，載入 {report['load_time']:.2f} 秒，"
+              f"推理 {elapsed:.2f} 秒，{tokens} tokens，"
+              f"{tokens / elapsed if elapsed > 0 else 0:.1f} tokens/秒")
+        if report["cache"] is not None:
+            print(f"    ♻️  快取命中 {report['cache']['hits']} / 未命中 {report['cache']['misses']}")
+    print()
+    
+    # 整體吞吐量以最早開始推理到最晚結束的時間計算（不含模型載入與失敗的 worker）
+    finished = [report for report in reports if "error" not in report]
+    wall_time = (
+        max(r["end"] for r in finished) - min(r["start"] for r in finished)
+        if finished else 0.0
+    )
+    print_statistics(results, wall_time)
+    return results
+
+
+def stream_continuous(
+    pipe,
+    pending: Iterator[Tuple[str, str]],
+    write_record,
+    cache: Optional[ResponseCache],
+    model_path: str,
+    device: str,
+    max_tokens: int,
+    assistant_tokens: Optional[int] = None,
+    max_in_flight: int = 32
+):
+    """串流模式的連續批次：快取命中立即寫入，其餘題目持續補入佇列，每題完成即寫入"""
+    config = generation_config(max_tokens)
+    use_cache = cache is not None and is_deterministic(effective_generation_config(pipe, config))
+    
+    def misses() -> Iterator[Tuple[Tuple[str, str, Optional[str]], str]]:
+        for pid, prompt in pending:
+            key = None
+            if use_cache:
+                key = cache.make_key(model_path, device, prompt, config)
+                payload = cache.get(key)
+                if payload is not None:
+                    write_record(pid, build_result(
+                        0, prompt, payload["text"], 0.0,
+                        payload.get("input_tokens"), payload.get("output_tokens"), cached=True
+                    ))
+                    continue
+            # 問題檔的 id 可能重複，以 (id, 問題, 快取鍵) 作為請求的識別
+            yield (pid, prompt, key), prompt
+    
+    for (pid, prompt, key), result in iter_continuous(pipe, misses(), max_tokens, assistant_tokens, max_in_flight):
+        write_record(pid, result)
+        status = "❌" if "error" in result else "✅"
+        print(f"{status} {pid}: {prompt[:50]}（{result.get('time', 0.0):.2f} 秒）")
+        if key is not None and "error" not in result:
+            cache.put(key, {
+                "text": result["result"],
+                "input_tokens": result["input_tokens"],
+                "output_tokens": result["output_tokens"]
+            }, model_path)
+    if assistant_tokens:
+        print("\n📝 continuous batching 模式無法取得草稿接受率")
+    print()
+
+
+def stream_inference(
+    model_path: str,
+    input_path: str,
+    output_path: str,
+    device: str = "CPU",
+    max_tokens: int = 100,
+    batch_size: int = 1,
+    bucket: bool = True,
+    scheduler: Optional[Dict] = None,
+    chunk_size: int = 32,
+    cache: Optional[ResponseCache] = None,
+    draft_model: Optional[str] = None,
+    assistant_tokens: int = 5
+) -> Dict:
+    """串流處理問題檔，每題完成後立即附加到結果 JSONL
+    
+    問題檔逐行讀取、結果不保留在記憶體，記憶體用量與問題數量無關。
+    重新執行時略過結果檔中已成功完成的 id，中斷後可直接續跑。
+    
+    Args:
+        input_path: 問題檔（.jsonl 或純文字）
+        output_path: 結果 JSONL（附加寫入）
+        chunk_size: 連續批次模式佇列中同時處理的問題數上限；批次模式每次
+            讀入的問題數（在此範圍內依長度分組）；逐題模式固定為 1
+        
+    Returns:
+        統計總覽
+    """
+    completed = load_completed_ids(output_path)
+    
+    print("=" * 70)
+    print("🦙 Llama 批量推理（串流模式）")
+    print("=" * 70)
+    print(f"📁 模型: {model_path}")
+    print(f"🖥️  設備: {device}")
+    print(f"📄 問題檔: {input_path}")
+    print(f"💾 結果檔: {output_path}")
+    if completed:
+        print(f"⏭️  已完成 {len(completed)} 題，將略過")
+    print("=" * 70 + "\n")
+    
+    print("⏳ 載入模型中...")
+    pipe, load_info = get_registry().get(model_path, device, scheduler=scheduler, draft_model=draft_model)
+    print(f"✅ 模型載入完成！({describe_load(load_info)})\n")
+    
+    if not draft_model:
+        assistant_tokens = None
+    
+    pending = ((pid, prompt) for pid, prompt in iter_prompt_file(input_path) if pid not in completed)
+    totals = {"done": 0, "failed": 0, "skipped": len(completed), "input_tokens": 0, "output_tokens": 0}
+    
+    start = time.time()
+    with open_results_file(output_path) as out:
+        def write_record(pid: str, result: Dict):
+            # 以問題檔的 id 取代批次內的序號；每題寫完即落盤，程序中斷也不會遺失已完成的結果
+            record = {"id": pid, **{k: v for k, v in result.items() if k != "index"}}
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            os.fsync(out.fileno())
+            
+            if "error" in record:
+                totals["failed"] += 1
+            else:
+                totals["done"] += 1
+                totals["input_tokens"] += record["input_tokens"] or 0
+                totals["output_tokens"] += record["output_tokens"] or 0
+        
+        if scheduler is not None:
+            stream_continuous(
+                pipe, pending, write_record, cache, model_path, device,
+                max_tokens, assistant_tokens, max(1, chunk_size)
+            )
+        else:
+            # 批次模式一次讀入數個批次，依長度分組才有作用
+            if batch_size > 1 and bucket:
+                group_size = max(batch_size, chunk_size // batch_size * batch_size)
+            else:
+                group_size = max(1, batch_size)
+            
+            while True:
+                group = list(islice(pending, group_size))
+                if not group:
+                    break
+                
+                results = run_cached(
+                    cache, pipe, model_path, device, [prompt for _, prompt in group], max_tokens,
+                    lambda todo: run_engine(pipe, todo, max_tokens, batch_size, bucket, None, assistant_tokens)
+                )
+                for (pid, _), result in zip(group, results):
+                    write_record(pid, result)
+                print(f"💾 已寫入 {totals['done'] + totals['failed']} 題"
+                      f"（成功 {totals['done']}，失敗 {totals['failed']}）\n")
+    
+    wall_time = time.time() - start
+    totals["wall_time"] = wall_time
+    totals["tokens_per_sec"] = totals["output_tokens"] / wall_time if wall_time > 0 else 0.0
+    
+    print("=" * 70)
+    print("📊 統計結果")
+    print("=" * 70)
+    print(f"\n✅ 本次成功: {totals['done']}")
+    if totals["failed"]:
+        print(f"❌ 本次失敗: {totals['failed']}（重新執行時會重試）")
+    if totals["skipped"]:
+        print(f"⏭️  先前已完成: {totals['skipped']}")
+    print(f"\n⏱️  總耗時: {wall_time:.2f} 秒")
+    print(f"🔢 總 tokens: 輸入 {totals['input_tokens']} / 輸出 {totals['output_tokens']}")
+    print(f"⚡ 平均速度: {totals['tokens_per_sec']:.1f} tokens/秒")
+    if cache is not None:
+        print(f"♻️  回應快取: {cache.describe()}")
+    print("=" * 70 + "\n")
+    return totals
+
 def main():
     """主函數"""
-    # 預設設定
-    model_path = "./models/open_llama_7b_v2-int4-ov"
-    device = "CPU"
-    use_custom = False
-    
-    # 解析命令行參數
-    if len(sys.argv) > 1:
-        arg = sys.argv[1].upper()
-        if arg in ["--CUSTOM", "-C", "CUSTOM"]:
-            use_custom = True
-        elif arg in ["--HELP", "-H", "HELP"]:
-            print("""
-🦙 Llama 批量推理測試 - 使用說明
-
-用法:
-    python examples/llama_batch_inference.py [設備|選項]
-
-參數:
-    設備        推理設備 (CPU, GPU, NPU)，預設為 CPU
-    --custom    使用自訂問題集
-
+    parser = argparse.ArgumentParser(
+        description="🦙 Llama 批量推理測試",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
 範例:
-    python examples/llama_batch_inference.py           # 使用預設問題集 (CPU)
-    python examples/llama_batch_inference.py GPU       # 使用 GPU
-    python examples/llama_batch_inference.py --custom  # 自訂問題
-            """)
-            sys.exit(0)
-        else:
-            device = arg
+    python examples/llama_batch_inference.py                       # 使用預設問題集 (CPU)
+    python examples/llama_batch_inference.py GPU                   # 使用 GPU
+    python examples/llama_batch_inference.py --custom              # 自訂問題
+    python examples/llama_batch_inference.py --batch-size 4        # 每次 generate 處理 4 題
+    python examples/llama_batch_inference.py --batch-size 4 --compare-serial
+    python examples/llama_batch_inference.py --continuous --max-num-batched-tokens 512 --cache-size 2
+    python examples/llama_batch_inference.py --input prompts.jsonl --output-jsonl results.jsonl --continuous
+    python examples/llama_batch_inference.py --workers 2 --pin auto   # 雙路伺服器：每個 NUMA 節點一個程序
+    python examples/llama_batch_inference.py --draft-model ./models/tinyllama-openvino-int4 --compare-plain
+        """
+    )
+    parser.add_argument("device", nargs="?", default="CPU", help="推理設備 (CPU, GPU, NPU)，預設為 CPU")
+    parser.add_argument("--custom", "-c", action="store_true", help="使用自訂問題集")
+    parser.add_argument("--model", default="./models/open_llama_7b_v2-int4-ov", help="模型路徑")
+    parser.add_argument("--max-tokens", type=int, default=100, help="最大生成 token 數（預設：100）")
+    parser.add_argument("--batch-size", type=int, default=1, help="每次 generate 處理的問題數（預設：1，逐題）")
+    parser.add_argument("--no-bucket", action="store_true", help="批次模式下不依長度分組")
+    parser.add_argument("--compare-serial", action="store_true", help="先以逐題模式執行作為基準，比較吞吐量")
+    
+    cb_group = parser.add_argument_group("連續批次引擎（ContinuousBatchingPipeline）")
+    cb_group.add_argument("--continuous", action="store_true", help="使用連續批次引擎（忽略 --batch-size）")
+    cb_group.add_argument("--max-num-batched-tokens", type=int, default=None, help="每個排程步驟最多處理的 token 數")
+    cb_group.add_argument("--cache-size", type=int, default=None, help="KV cache 大小（GB）")
+    cb_group.add_argument("--max-num-seqs", type=int, default=None, help="同時執行的序列數上限")
+    cb_group.add_argument("--no-split-fuse", action="store_true", help="停用 dynamic split-fuse（改為 prefill 優先）")
+    parser.add_argument("--output", "-o", default=None, help="結果 JSON 檔案（指定時不再詢問是否保存）")
+    
+    stream_group = parser.add_argument_group("串流模式（非互動，可續跑）")
+    stream_group.add_argument("--input", "-i", default=None, help="問題檔（.jsonl 每行含 id / prompt，或純文字每行一題）")
+    stream_group.add_argument("--output-jsonl", default=None, help="結果 JSONL（預設：<問題檔>.results.jsonl）")
+    stream_group.add_argument("--chunk-size", type=int, default=32, help="連續批次模式佇列中同時處理的問題數上限；批次模式每次讀入、依長度分組的問題數（預設：32）")
+    
+    spec_group = parser.add_argument_group("Speculative decoding")
+    spec_group.add_argument("--draft-model", default=None,
+                            help="草稿模型路徑（例如 ./models/tinyllama-openvino-int4）")
+    spec_group.add_argument("--assistant-tokens", type=int, default=5, help="草稿模型每步提出的 token 數（預設：5）")
+    spec_group.add_argument("--compare-plain", action="store_true", help="先以一般解碼執行作為基準，比較速度")
+    
+    cache_group = parser.add_argument_group("回應快取（僅確定性解碼）")
+    cache_group.add_argument("--response-cache", nargs="?", const="", default=None, metavar="PATH",
+                             help="啟用回應快取；未指定路徑時使用 config.yaml 的 response_cache.path")
+    cache_group.add_argument("--cache-max-mb", type=float, default=None,
+                             help="快取大小上限（MB），超過時淘汰最久未使用的項目")
+    
+    worker_group = parser.add_argument_group("多程序模式")
+    worker_group.add_argument("--workers", type=int, default=1, help="worker 程序數，每個程序載入獨立的 pipeline（預設：1）")
+    worker_group.add_argument("--pin", choices=["auto", "cores", "none"], default="auto",
+                              help="CPU 綁定方式：auto 依 NUMA 節點、cores 平分 CPU、none 不綁定（預設：auto）")
+    args = parser.parse_args()
+    
+    if args.workers > 1 and (args.input or args.compare_serial or args.compare_plain):
+        parser.error("--workers 不支援 --input、--compare-serial 與 --compare-plain")
+    if args.compare_serial and args.compare_plain:
+        parser.error("--compare-serial 與 --compare-plain 不能同時使用")
+    if args.draft_model and not os.path.exists(args.draft_model):
+        parser.error(f"草稿模型不存在 {args.draft_model}")
+    
+    model_path = args.model
+    device = args.device.upper()
     
     # 檢查模型
     if not os.path.exists(model_path):
@@ -205,21 +1330,93 @@ def main():
         print("請先下載模型，參考 LLAMA_SETUP_PLAN.md")
         sys.exit(1)
     
+    scheduler = None
+    if args.continuous:
+        scheduler = {
+            "max_num_batched_tokens": args.max_num_batched_tokens,
+            "cache_size": args.cache_size,
+            "max_num_seqs": args.max_num_seqs,
+            "dynamic_split_fuse": not args.no_split_fuse,
+        }
+    
+    cache_settings = None
+    if args.response_cache is not None:
+        settings = load_cache_settings()
+        cache_settings = {
+            "path": args.response_cache or settings["path"],
+            "max_size_mb": args.cache_max_mb if args.cache_max_mb is not None else settings["max_size_mb"],
+        }
+    cache = ResponseCache(**cache_settings) if cache_settings and args.workers <= 1 else None
+    
+    # 串流模式
+    if args.input:
+        if not os.path.exists(args.input):
+            print(f"❌ 錯誤：問題檔不存在 {args.input}")
+            sys.exit(1)
+        output_path = args.output_jsonl or f"{os.path.splitext(args.input)[0]}.results.jsonl"
+        stream_inference(
+            model_path,
+            args.input,
+            output_path,
+            device,
+            max_tokens=args.max_tokens,
+            batch_size=args.batch_size,
+            bucket=not args.no_bucket,
+            scheduler=scheduler,
+            chunk_size=args.chunk_size,
+            cache=cache,
+            draft_model=args.draft_model,
+            assistant_tokens=args.assistant_tokens
+        )
+        return
+    
     # 獲取問題集
-    prompts = get_custom_prompts() if use_custom else get_default_prompts()
+    prompts = get_custom_prompts() if args.custom else get_default_prompts()
     
     if not prompts:
         print("❌ 沒有問題可處理")
         sys.exit(1)
     
     # 執行批量推理
-    results = batch_inference(model_path, prompts, device)
+    if args.workers > 1:
+        results = sharded_inference(
+            model_path,
+            prompts,
+            device,
+            max_tokens=args.max_tokens,
+            workers=args.workers,
+            pin=args.pin,
+            batch_size=args.batch_size,
+            bucket=not args.no_bucket,
+            scheduler=scheduler,
+            cache_settings=cache_settings,
+            draft_model=args.draft_model,
+            assistant_tokens=args.assistant_tokens
+        )
+    else:
+        results = batch_inference(
+            model_path,
+            prompts,
+            device,
+            max_tokens=args.max_tokens,
+            batch_size=args.batch_size,
+            bucket=not args.no_bucket,
+            compare_serial=args.compare_serial,
+            scheduler=scheduler,
+            cache=cache,
+            draft_model=args.draft_model,
+            assistant_tokens=args.assistant_tokens,
+            compare_plain=args.compare_plain
+        )
     
     # 可選：保存結果
-    save_results = input("是否保存結果到檔案？ (y/N): ").strip().lower()
-    if save_results == 'y':
-        import json
-        output_file = f"batch_results_{int(time.time())}.json"
+    output_file = args.output
+    if output_file is None:
+        save_results = input("是否保存結果到檔案？ (y/N): ").strip().lower()
+        if save_results == 'y':
+            output_file = f"batch_results_{int(time.time())}.json"
+    
+    if output_file:
         with open(output_file, 'w', encoding='utf-8') as f:
             json.dump(results, f, indent=2, ensure_ascii=False)
         print(f"\n💾 結果已保存到: {output_file}")
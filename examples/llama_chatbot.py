@@ -5,12 +5,21 @@ Llama 交互式聊天機器人
 執行方式：
     python examples/llama_chatbot.py          # CPU 模式
     python examples/llama_chatbot.py GPU      # GPU 模式
+    python examples/llama_chatbot.py --chat   # 多輪對話（保留上下文）
+    python examples/llama_chatbot.py --draft-model=./models/tinyllama-openvino-int4   # speculative decoding
     python examples/llama_chatbot.py --help   # 顯示幫助
 """
 
-import openvino_genai as ov_genai
 import sys
 import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from pipeline_factory import describe_load, get_registry, speculative_stats
+from response_cache import ResponseCache, effective_generation_config, is_deterministic, load_cache_settings
+
+# 聊天回應的生成參數
+GENERATION_KWARGS = {"max_new_tokens": 150, "temperature": 0.7, "top_p": 0.9}
 
 def print_help():
     """顯示幫助訊息"""
@@ -18,53 +27,348 @@ def print_help():
 🦙 Llama 聊天機器人 - 使用說明
 
 用法:
-    python examples/llama_chatbot.py [設備]
+    python examples/llama_chatbot.py [設備] [--chat] [--context-budget=N] [--overflow=window|summarize]
+                                     [--draft-model=路徑] [--assistant-tokens=N] [--compare-plain]
+                                     [--no-stream] [--show-latency] [--response-cache[=路徑]]
 
 參數:
-    設備    推理設備 (CPU, GPU, NPU)，預設為 CPU
+    設備                 推理設備 (CPU, GPU, NPU)，預設為 CPU
+    --chat              多輪對話：以 start_chat / finish_chat 保留 KV cache，
+                        每輪只需 prefill 新輸入
+    --context-budget    多輪對話的上下文預算（tokens），預設 2048
+    --overflow          超過預算時的處理方式：window 保留最近幾輪（預設）、
+                        summarize 摘要先前對話後重新開始
+    --draft-model       草稿模型路徑（例如 TinyLlama），以 speculative decoding 生成
+                        （--chat 模式不顯示草稿接受率）
+    --assistant-tokens  草稿模型每步提出的 token 數，預設 5
+    --compare-plain     每輪另以一般解碼生成一次，比較速度（不支援 --chat）
+    --no-stream         等待完整回應後才顯示（預設逐 token 串流輸出）
+    --show-latency      每輪回應後顯示 TTFT 與 token 間延遲
+    --response-cache    重複的問題直接取回先前的回答（僅確定性解碼）；
+                        未指定路徑時使用 config.yaml 的 response_cache.path
 
 範例:
     python examples/llama_chatbot.py           # 使用 CPU
     python examples/llama_chatbot.py GPU       # 使用 GPU
+    python examples/llama_chatbot.py --chat --overflow=summarize   # 多輪對話，超過預算時摘要
+    python examples/llama_chatbot.py --draft-model=./models/tinyllama-openvino-int4 --show-latency --compare-plain
+    python examples/llama_chatbot.py --show-latency     # 顯示每輪延遲
+    python examples/llama_chatbot.py --response-cache   # 啟用回應快取
     python examples/llama_chatbot.py --help    # 顯示此幫助
 
 聊天指令:
     - 直接輸入問題開始對話
+    - 輸入 'reset' 清除多輪對話的上下文
     - 輸入 'quit', 'exit', 'bye' 退出
     - Ctrl+C 也可以退出
     """
     print(help_text)
 
-def chat_bot(model_path: str, device: str = "CPU"):
+class TokenPrinter:
+    """streamer 回呼：即時輸出生成的文字並記錄時間點"""
+    
+    def __init__(self, echo: bool = True):
+        self.echo = echo
+        self.start = time.perf_counter()
+        self.times: List[float] = []
+    
+    def __call__(self, subword: str) -> bool:
+        self.times.append(time.perf_counter())
+        if self.echo:
+            print(subword, end="", flush=True)
+        return False  # False 表示繼續生成
+    
+    def latency(self, num_tokens: Optional[int] = None) -> Dict:
+        """
+        計算本輪延遲
+        
+        Args:
+            num_tokens: 實際生成的 token 數；回呼以文字片段觸發，片段數
+                可能少於 token 數，有實際值時以實際值平均
+        
+        Returns:
+            dict: ttft_ms、itl_ms（token 間平均延遲）、tokens
+        """
+        if not self.times:
+            return {"ttft_ms": None, "itl_ms": None, "tokens": num_tokens or 0}
+        tokens = num_tokens or len(self.times)
+        span = self.times[-1] - self.times[0]
+        return {
+            "ttft_ms": (self.times[0] - self.start) * 1000,
+            "itl_ms": span * 1000 / (tokens - 1) if tokens > 1 else None,
+            "tokens": tokens,
+        }
+
+
+def generate_reply(pipe, prompt: str, streamer, chat: bool = False, **kwargs) -> Tuple[str, Optional[object]]:
+    """
+    生成一次回應
+    
+    以字串呼叫 generate 只會回傳文字；以單元素列表呼叫才會回傳帶有
+    perf_metrics / extended_perf_metrics 的 DecodedResults。對話模式
+    （start_chat）不接受列表輸入，此時沒有指標可取。
+    
+    Returns:
+        tuple: (回應文字, DecodedResults 或 None)
+    """
+    if chat:
+        return str(pipe.generate(prompt, streamer=streamer, **kwargs)), None
+    output = pipe.generate([prompt], streamer=streamer, **kwargs)
+    return output.texts[0], output
+
+
+def format_latency(latency: Dict) -> str:
+    parts = []
+    if latency["ttft_ms"] is not None:
+        parts.append(f"TTFT {latency['ttft_ms']:.0f} ms")
+    if latency["itl_ms"] is not None:
+        parts.append(f"token 間 {latency['itl_ms']:.1f} ms")
+    parts.append(f"{latency['tokens']} tokens")
+    if latency.get("acceptance_rate") is not None:
+        parts.append(f"草稿接受率 {latency['acceptance_rate'] * 100:.0f}%")
+    if latency.get("speedup") is not None:
+        parts.append(f"速度為一般解碼的 {latency['speedup']:.2f}x")
+    return "，".join(parts)
+
+
+def print_session_summary(turns: List[Dict], cache: Optional[ResponseCache], show_latency: bool):
+    """離開時顯示本次對話的平均延遲與快取統計"""
+    if show_latency and turns:
+        average = {}
+        for name in ["ttft_ms", "itl_ms", "acceptance_rate", "speedup"]:
+            values = [turn[name] for turn in turns if turn.get(name) is not None]
+            average[name] = sum(values) / len(values) if values else None
+        average["tokens"] = sum(turn["tokens"] for turn in turns)
+        print(f"\n⏱️  {len(turns)} 輪平均: {format_latency(average)}")
+    if cache is not None:
+        print(f"\n♻️  回應快取: {cache.describe()}")
+
+
+class ChatSession:
+    """
+    以 start_chat / finish_chat 進行多輪對話
+    
+    對話期間 pipeline 保留先前輪次的 KV cache，每輪只需 prefill 新輸入。
+    累計 token 數（以 tokenizer 計算，不含 chat template 的少量標記）加上
+    本輪輸入與最大生成長度超過預算時，依 policy 壓縮上下文後重新開始對話：
+    
+    - window：保留最近、合計不超過一半預算的輪次
+    - summarize：請模型摘要先前的對話，以摘要作為新對話的 system message
+    
+    壓縮後保留的內容會放進 system message，只在重新開始時 prefill 一次。
+    """
+    
+    SUMMARY_PROMPT = (
+        "Summarize the following conversation in a few sentences, keeping names, "
+        "facts and open questions:\n\n{transcript}\n\nSummary:"
+    )
+    
+    def __init__(
+        self,
+        pipe,
+        context_budget: int = 2048,
+        policy: str = "window",
+        generation_kwargs: Dict = GENERATION_KWARGS
+    ):
+        if policy not in ("window", "summarize"):
+            raise ValueError(f"未知的 overflow 策略: {policy}")
+        self.pipe = pipe
+        self.tokenizer = pipe.get_tokenizer()
+        self.context_budget = context_budget
+        self.policy = policy
+        self.generation_kwargs = generation_kwargs
+        self.max_new_tokens = generation_kwargs["max_new_tokens"]
+        self.system_message = ""
+        self.system_tokens = 0
+        self.history: List[Dict] = []
+        self.compactions = 0
+        self.pipe.start_chat()
+    
+    def count_tokens(self, text: str) -> int:
+        try:
+            encoded = self.tokenizer.encode(text, add_special_tokens=False)
+        except TypeError:
+            encoded = self.tokenizer.encode(text)
+        return int(encoded.input_ids.shape[1])
+    
+    def history_tokens(self) -> int:
+        return self.system_tokens + sum(turn["tokens"] for turn in self.history)
+    
+    def prepare(self, user_input: str) -> Optional[str]:
+        """
+        送出新輸入前檢查預算，必要時壓縮上下文
+        
+        Returns:
+            壓縮時回傳說明文字，否則回傳 None
+        """
+        needed = self.history_tokens() + self.count_tokens(user_input) + self.max_new_tokens
+        if needed <= self.context_budget or not self.history:
+            return None
+        
+        dropped = len(self.history)
+        if self.policy == "summarize":
+            note = self._summarize()
+        else:
+            note = None
+        if note is None:
+            note = self._slide_window()
+        
+        self.compactions += 1
+        self.pipe.finish_chat()
+        self.pipe.start_chat(self.system_message)
+        return f"{note}（原 {dropped} 輪，{needed} tokens 超過預算 {self.context_budget}）"
+    
+    def record(self, user_input: str, response: str):
+        """記錄完成的一輪"""
+        self.history.append({
+            "user": user_input,
+            "assistant": response,
+            "tokens": self.count_tokens(user_input) + self.count_tokens(response),
+        })
+    
+    def reset(self):
+        """清除上下文並重新開始對話"""
+        self.history = []
+        self.system_message = ""
+        self.system_tokens = 0
+        self.pipe.finish_chat()
+        self.pipe.start_chat()
+    
+    def close(self):
+        self.pipe.finish_chat()
+    
+    @staticmethod
+    def _transcript(turns: List[Dict]) -> str:
+        return "\n".join(f"User: {turn['user']}\nAssistant: {turn['assistant']}" for turn in turns)
+    
+    def _set_system_message(self, text: str):
+        self.system_message = text
+        self.system_tokens = self.count_tokens(text) if text else 0
+    
+    def _slide_window(self) -> str:
+        kept, total = [], 0
+        for turn in reversed(self.history):
+            if total + turn["tokens"] > self.context_budget // 2:
+                break
+            kept.insert(0, turn)
+            total += turn["tokens"]
+        
+        self._set_system_message(
+            f"Conversation so far:\n{self._transcript(kept)}" if kept else ""
+        )
+        # 保留的輪次已併入 system message，不再另外計算
+        self.history = []
+        return f"🧹 上下文已滑動，保留最近 {len(kept)} 輪"
+    
+    def _summarize(self) -> Optional[str]:
+        transcript = self._transcript(self.history)
+        if self.system_message:
+            transcript = f"{self.system_message}\n{transcript}"
+        
+        # 摘要不屬於對話內容，先結束對話再生成
+        self.pipe.finish_chat()
+        try:
+            summary = str(self.pipe.generate(
+                self.SUMMARY_PROMPT.format(transcript=transcript),
+                **self.generation_kwargs
+            )).strip()
+        except Exception:
+            summary = ""
+        finally:
+            # prepare() 會再 finish_chat 一次，保持 start / finish 成對
+            self.pipe.start_chat()
+        
+        if not summary:
+            return None
+        self.history = []
+        self._set_system_message(f"Summary of the conversation so far: {summary}")
+        return f"🧹 先前對話已摘要（{self.system_tokens} tokens）"
+
+
+def chat_bot(
+    model_path: str,
+    device: str = "CPU",
+    cache: Optional[ResponseCache] = None,
+    stream: bool = True,
+    show_latency: bool = False,
+    chat: bool = False,
+    context_budget: int = 2048,
+    overflow: str = "window",
+    draft_model: Optional[str] = None,
+    assistant_tokens: int = 5,
+    compare_plain: bool = False
+):
     """交互式聊天機器人
     
     Args:
         model_path: 模型路徑
         device: 推理設備 (CPU, GPU, NPU)
+        cache: 回應快取（每輪回應只取決於當輪輸入，可直接以輸入為鍵）
+        stream: 是否逐 token 輸出回應
+        show_latency: 是否在每輪回應後顯示 TTFT 與 token 間延遲
+        chat: 是否啟用多輪對話（見 ChatSession）
+        context_budget: 多輪對話的上下文預算（tokens）
+        overflow: 超過預算時的處理方式（window / summarize）
+        draft_model: 草稿模型路徑；指定時以 speculative decoding 生成
+        assistant_tokens: 草稿模型每步提出的 token 數
+        compare_plain: 每輪另以一般解碼生成一次並比較速度（多輪對話時不支援）
     """
+    generation_kwargs = dict(GENERATION_KWARGS)
+    if draft_model:
+        generation_kwargs["num_assistant_tokens"] = assistant_tokens
+    compare_plain = compare_plain and bool(draft_model) and not chat
+
     print("=" * 70)
     print("🦙 Llama 聊天機器人 - OpenVINO GenAI")
     print("=" * 70)
     print(f"📁 模型: {model_path}")
+    if draft_model:
+        print(f"📝 草稿模型: {draft_model}（每步 {assistant_tokens} tokens）")
+        if chat:
+            print("   多輪對話模式無法取得草稿接受率")
     print(f"🖥️  設備: {device}")
+    if chat:
+        print(f"🧵 多輪對話: 上下文預算 {context_budget} tokens，超過時 {overflow}")
     print("=" * 70)
     
+    session = None
     try:
         # 載入模型
         print("\n⏳ 載入模型中...")
-        pipe = ov_genai.LLMPipeline(model_path, device)
-        print("✅ 模型載入完成！\n")
+        # 多輪對話的歷史存在 pipeline 內，不與登錄表的其他使用者共用
+        pipe, load_info = get_registry().get(model_path, device, draft_model=draft_model, shared=not chat)
+        print(f"✅ 模型載入完成！({describe_load(load_info)})\n")
+        
+        # 多輪對話的回應取決於先前內容，不能只以當輪輸入為快取鍵；
+        # 模型預設開啟 do_sample 時也不快取
+        if cache is not None and (
+            chat or not is_deterministic(effective_generation_config(pipe, GENERATION_KWARGS))
+        ):
+            cache = None
+        
+        plain_pipe = None
+        if compare_plain:
+            print("⏳ 載入一般解碼的 pipeline（比較用）...")
+            plain_pipe, plain_info = get_registry().get(model_path, device)
+            print(f"✅ 載入完成！({describe_load(plain_info)})\n")
         
         print("=" * 70)
         print("💬 開始對話（輸入 'quit' 退出）")
         print("=" * 70 + "\n")
         
+        if chat:
+            session = ChatSession(pipe, context_budget, overflow, generation_kwargs)
+        
+        # 每輪的延遲記錄
+        turns: List[Dict] = []
+        
         # 對話循環
         while True:
             # 獲取用戶輸入
             try:
                 user_input = input("You: ").strip()
             except (EOFError, KeyboardInterrupt):
+                print_session_summary(turns, cache, show_latency)
                 print("\n\n👋 再見！")
                 break
             
@@ -72,21 +376,70 @@ def chat_bot(model_path: str, device: str = "CPU"):
             if not user_input:
                 continue
             
+            if session is not None and user_input.lower() == 'reset':
+                session.reset()
+                print("\n🧹 已清除對話上下文\n")
+                continue
+            
             # 檢查退出指令
             if user_input.lower() in ['quit', 'exit', 'bye', 'q']:
+                print_session_summary(turns, cache, show_latency)
                 print("\n👋 再見！")
                 break
             
             # 生成回應
-            print("\n🦙 Llama: ", end="", flush=True)
             try:
-                response = pipe.generate(
-                    user_input,
-                    max_new_tokens=150,
-                    temperature=0.7,
-                    top_p=0.9
+                if session is not None:
+                    note = session.prepare(user_input)
+                    if note:
+                        print(f"\n{note}")
+                
+                print("\n🦙 Llama: ", end="", flush=True)
+                key = None
+                if cache is not None:
+                    key = cache.make_key(model_path, device, user_input, GENERATION_KWARGS)
+                    cached = cache.get(key)
+                    if cached is not None:
+                        print(cached["text"] + "  ♻️\n")
+                        continue
+                
+                # 不串流時仍透過回呼記錄延遲，只是不即時輸出
+                printer = TokenPrinter(echo=stream)
+                response, output = generate_reply(
+                    pipe, user_input, printer, chat=session is not None, **generation_kwargs
                 )
-                print(response + "\n")
+                print("\n" if stream else response + "\n")
+                
+                perf_metrics = getattr(output, "perf_metrics", None)
+                latency = printer.latency(
+                    perf_metrics.get_num_generated_tokens() if perf_metrics is not None else None
+                )
+                stats = speculative_stats(output)
+                if stats is not None:
+                    latency["acceptance_rate"] = stats["acceptance_rate"]
+                if plain_pipe is not None:
+                    # 以相同輸入執行一般解碼，比較 token 間延遲
+                    plain_printer = TokenPrinter(echo=False)
+                    _, plain_output = generate_reply(plain_pipe, user_input, plain_printer, **GENERATION_KWARGS)
+                    plain_metrics = getattr(plain_output, "perf_metrics", None)
+                    plain_latency = plain_printer.latency(
+                        plain_metrics.get_num_generated_tokens() if plain_metrics is not None else None
+                    )
+                    if plain_latency["itl_ms"] and latency["itl_ms"]:
+                        latency["speedup"] = plain_latency["itl_ms"] / latency["itl_ms"]
+                turns.append(latency)
+                
+                if session is not None:
+                    session.record(user_input, response)
+                    latency["context_tokens"] = session.history_tokens()
+                if show_latency:
+                    text = format_latency(latency)
+                    if session is not None:
+                        text += f"，上下文 {latency['context_tokens']}/{context_budget} tokens"
+                    print(f"⏱️  {text}\n")
+                
+                if cache is not None:
+                    cache.put(key, {"text": response}, model_path)
             except Exception as e:
                 print(f"\n❌ 生成錯誤: {e}\n")
                 
@@ -101,6 +454,9 @@ def chat_bot(model_path: str, device: str = "CPU"):
         print("2. 如使用 GPU，確認驅動已安裝")
         print("3. 檢查可用設備: python -c \"import openvino as ov; print(ov.Core().available_devices)\"")
         sys.exit(1)
+    finally:
+        if session is not None:
+            session.close()
 
 def main():
     """主函數"""
@@ -108,13 +464,48 @@ def main():
     model_path = "./models/open_llama_7b_v2-int4-ov"
     device = "CPU"
     
+    cache_path = None
+    stream = True
+    show_latency = False
+    chat = False
+    context_budget = 2048
+    overflow = "window"
+    draft_model = None
+    assistant_tokens = 5
+    compare_plain = False
+    
     # 解析命令行參數
-    if len(sys.argv) > 1:
-        if sys.argv[1] in ["--help", "-h", "help"]:
+    args = sys.argv[1:]
+    while args:
+        arg = args.pop(0)
+        if arg in ["--help", "-h", "help"]:
             print_help()
             sys.exit(0)
+        elif arg == "--chat":
+            chat = True
+        elif arg.startswith("--context-budget="):
+            context_budget = int(arg.split("=", 1)[1])
+        elif arg.startswith("--overflow="):
+            overflow = arg.split("=", 1)[1]
+            if overflow not in ("window", "summarize"):
+                print("❌ 錯誤：--overflow 只能是 window 或 summarize")
+                sys.exit(1)
+        elif arg.startswith("--draft-model="):
+            draft_model = arg.split("=", 1)[1]
+        elif arg.startswith("--assistant-tokens="):
+            assistant_tokens = int(arg.split("=", 1)[1])
+        elif arg == "--compare-plain":
+            compare_plain = True
+        elif arg == "--no-stream":
+            stream = False
+        elif arg == "--show-latency":
+            show_latency = True
+        elif arg == "--response-cache":
+            cache_path = ""
+        elif arg.startswith("--response-cache="):
+            cache_path = arg.split("=", 1)[1]
         else:
-            device = sys.argv[1].upper()
+            device = arg.upper()
     
     # 檢查模型是否存在
     if not os.path.exists(model_path):
@@ -124,8 +515,29 @@ def main():
         print("\n或參考 LLAMA_SETUP_PLAN.md 獲取更多資訊")
         sys.exit(1)
     
+    if draft_model and not os.path.exists(draft_model):
+        print(f"❌ 錯誤：草稿模型不存在 {draft_model}")
+        sys.exit(1)
+    
+    cache = None
+    if cache_path is not None:
+        settings = load_cache_settings()
+        cache = ResponseCache(cache_path or settings["path"], settings["max_size_mb"])
+    
     # 啟動聊天機器人
-    chat_bot(model_path, device)
+    chat_bot(
+        model_path,
+        device,
+        cache,
+        stream=stream,
+        show_latency=show_latency,
+        chat=chat,
+        context_budget=context_budget,
+        overflow=overflow,
+        draft_model=draft_model,
+        assistant_tokens=assistant_tokens,
+        compare_plain=compare_plain
+    )
 
 if __name__ == "__main__":
     main()
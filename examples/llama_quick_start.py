@@ -7,10 +7,11 @@ Llama 模型快速開始
     python examples/llama_quick_start.py --device GPU
 """
 
-import openvino_genai as ov_genai
 import sys
 import os
 
+from pipeline_factory import describe_load, get_registry
+
 def main():
     """快速開始範例"""
     # 設定
@@ -40,8 +41,8 @@ def main():
     try:
         # 載入模型
         print("⏳ 載入模型中...")
-        pipe = ov_genai.LLMPipeline(model_path, device)
-        print("✅ 模型載入完成！\n")
+        pipe, load_info = get_registry().get(model_path, device)
+        print(f"✅ 模型載入完成！({describe_load(load_info)})\n")
         
         # 測試問題
         prompt = "What is artificial intelligence?"
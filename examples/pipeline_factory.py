@@ -0,0 +1,429 @@
+"""
+共用的 LLMPipeline 建立工具
+為所有範例與 AI Agent 提供一致的模型載入方式
+
+啟用 OpenVINO 編譯快取（CACHE_DIR），快取目錄依模型雜湊、設備與
+runtime 版本區分，熱啟動時可直接載入編譯好的 blob，略過圖形編譯。
+
+快取根目錄預設為 ./models/.ov_cache，可用環境變數 OV_CACHE_DIR 覆寫，
+設為空字串則停用快取。
+
+PipelineRegistry 讓同一程序內的範例與 Agent 共用已載入的 pipeline，
+並在常駐記憶體（RSS）超過預算時淘汰最久未使用的 pipeline。
+
+傳入 scheduler 設定時改為建立 ContinuousBatchingPipeline（連續批次引擎）；
+傳入 draft_model 時附加草稿模型，啟用 speculative decoding。
+"""
+
+import gc
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+DEFAULT_CACHE_ROOT = os.getenv("OV_CACHE_DIR", "./models/.ov_cache")
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_CONFIG_PATH = str(PROJECT_ROOT / "config" / "config.yaml")
+
+# 表示「使用登錄表預設的快取根目錄」
+_REGISTRY_DEFAULT = object()
+
+
+def model_fingerprint(model_path: str) -> str:
+    """
+    計算模型識別碼
+
+    對 openvino_model.xml 內容做雜湊，權重檔只納入大小與修改時間，
+    避免每次啟動都要讀取數 GB 的 .bin 檔案。
+    """
+    model_dir = Path(model_path)
+    digest = hashlib.sha1()
+
+    xml_file = model_dir / "openvino_model.xml"
+    if xml_file.exists():
+        digest.update(xml_file.read_bytes())
+
+    for name in ["openvino_model.bin", "openvino_tokenizer.xml", "openvino_detokenizer.xml"]:
+        path = model_dir / name
+        if path.exists():
+            stat = path.stat()
+            digest.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8"))
+
+    return digest.hexdigest()[:12]
+
+
+def runtime_version() -> str:
+    """取得 OpenVINO GenAI 版本（不同版本的編譯 blob 不可共用）"""
+    import openvino_genai as ov_genai
+    return getattr(ov_genai, "__version__", "unknown")
+
+
+def get_cache_dir(model_path: str, device: str, cache_root: str = DEFAULT_CACHE_ROOT) -> Path:
+    """取得模型 / 設備 / runtime 版本對應的快取目錄"""
+    model_name = Path(model_path).resolve().name
+    device_name = device.upper().replace(":", "_").replace(",", "_")
+    version = runtime_version().replace("/", "_")
+    return Path(cache_root) / f"{model_name}-{model_fingerprint(model_path)}" / device_name / version
+
+
+def _cache_entries(cache_dir: Path) -> Dict[str, int]:
+    """列出快取目錄中的檔案與大小"""
+    if not cache_dir.exists():
+        return {}
+    return {path.name: path.stat().st_size for path in cache_dir.iterdir() if path.is_file()}
+
+
+def make_scheduler_config(scheduler: Dict):
+    """
+    由 dict 建立 SchedulerConfig
+
+    常用欄位：max_num_batched_tokens、cache_size（KV cache 大小，GB）、
+    dynamic_split_fuse、max_num_seqs、enable_prefix_caching；值為 None 的欄位
+    保留預設值。
+    """
+    import openvino_genai as ov_genai
+
+    config = ov_genai.SchedulerConfig()
+    for name, value in scheduler.items():
+        if value is None:
+            continue
+        if not hasattr(config, name):
+            raise ValueError(f"未知的 SchedulerConfig 欄位: {name}")
+        setattr(config, name, value)
+    return config
+
+
+def create_pipeline(
+    model_path: str,
+    device: str = "CPU",
+    cache_root: Optional[str] = DEFAULT_CACHE_ROOT,
+    scheduler: Optional[Dict] = None,
+    draft_model: Optional[str] = None,
+    **properties,
+) -> Tuple[object, Dict]:
+    """
+    建立 LLMPipeline，並回報編譯快取是否命中
+
+    Args:
+        model_path: 模型路徑
+        device: 推理設備 (CPU, GPU, NPU)
+        cache_root: 快取根目錄，None 或空字串表示停用快取
+        scheduler: SchedulerConfig 欄位；指定時建立 ContinuousBatchingPipeline
+        draft_model: 草稿模型路徑；指定時啟用 speculative decoding（生成時需設定
+            num_assistant_tokens 或 assistant_confidence_threshold）
+        **properties: 其他傳給 LLMPipeline 的屬性
+
+    Returns:
+        (pipeline, 載入資訊)；載入資訊包含 load_time（秒）、cache_dir、
+        cache_hit（True / False，停用快取時為 None）
+    """
+    import openvino_genai as ov_genai
+
+    info = {"load_time": None, "cache_dir": None, "cache_hit": None}
+
+    before = {}
+    if cache_root:
+        cache_dir = get_cache_dir(model_path, device, cache_root)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        before = _cache_entries(cache_dir)
+        properties.setdefault("CACHE_DIR", str(cache_dir))
+        info["cache_dir"] = str(cache_dir)
+
+    start = time.perf_counter()
+    if draft_model:
+        properties["draft_model"] = ov_genai.draft_model(draft_model, device)
+    if scheduler is not None:
+        pipe = ov_genai.ContinuousBatchingPipeline(
+            model_path, make_scheduler_config(scheduler), device, properties
+        )
+    else:
+        pipe = ov_genai.LLMPipeline(model_path, device, **properties)
+    info["load_time"] = time.perf_counter() - start
+
+    if cache_root:
+        # 載入前已有 blob 且沒有寫入新檔案，代表直接使用了快取
+        after = _cache_entries(Path(info["cache_dir"]))
+        info["cache_hit"] = bool(before) and after == before
+
+    return pipe, info
+
+
+def describe_load(info: Dict) -> str:
+    """將載入資訊格式化為一行說明"""
+    text = f"耗時: {info['load_time']:.2f} 秒"
+    if info.get("cache_hit") is True:
+        text += "，編譯快取命中"
+    elif info.get("cache_hit") is False:
+        text += "，編譯快取未命中（已寫入快取）"
+    return text
+
+
+def speculative_stats(output) -> Optional[Dict]:
+    """
+    從 generate 結果取得 speculative decoding 的草稿接受情況
+
+    Returns:
+        dict: accepted_tokens、draft_tokens、acceptance_rate；結果不含
+        extended_perf_metrics（非 speculative 或舊版 runtime）時回傳 None
+    """
+    metrics = getattr(output, "extended_perf_metrics", None)
+    if metrics is None:
+        return None
+    try:
+        accepted = metrics.get_num_accepted_tokens()
+        drafted = metrics.draft_model_metrics.get_num_generated_tokens()
+    except AttributeError:
+        return None
+    return {
+        "accepted_tokens": accepted,
+        "draft_tokens": drafted,
+        "acceptance_rate": accepted / drafted if drafted else None,
+    }
+
+
+def current_rss() -> Optional[int]:
+    """取得目前程序的常駐記憶體（位元組），無法取得時回傳 None"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def estimate_model_size(model_path: str) -> int:
+    """以模型檔案大小估計載入後的記憶體用量"""
+    model_dir = Path(model_path)
+    if not model_dir.is_dir():
+        return 0
+    return sum(path.stat().st_size for path in model_dir.glob("*.bin"))
+
+
+def load_memory_budget(config_path: str = DEFAULT_CONFIG_PATH) -> Optional[float]:
+    """從 config.yaml 的 models.max_model_size_gb 讀取記憶體預算（GB）"""
+    try:
+        import yaml
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = yaml.safe_load(f) or {}
+    except (ImportError, OSError):
+        return None
+    return (config.get("models") or {}).get("max_model_size_gb")
+
+
+class PipelineRegistry:
+    """
+    程序內共用的 LLMPipeline 登錄表
+
+    以 (模型路徑, 設備, 屬性) 為鍵發放 pipeline；載入新 pipeline 前若預估
+    RSS 會超過預算，依 LRU 順序淘汰既有 pipeline。淘汰只會移除登錄表的
+    參考，呼叫端仍持有的 pipeline 要等呼叫端釋放後才會真正回收記憶體。
+
+    模型載入（含編譯）時不持有登錄表的鎖：同一個鍵的其他呼叫端等待該次
+    載入完成，其他鍵的查詢與載入不受影響。
+
+    同一個鍵的所有呼叫端拿到同一個 pipeline 物件。pipeline 有狀態：
+    start_chat() / finish_chat() 的對話歷史存在 pipeline 內，共用的
+    pipeline 不可用於多輪對話，否則其他呼叫端會看到不屬於自己的歷史；
+    多輪對話請以 get(..., shared=False) 取得獨立的 pipeline。
+    """
+
+    def __init__(
+        self,
+        memory_budget_gb: Optional[float] = None,
+        cache_root: Optional[str] = DEFAULT_CACHE_ROOT,
+    ):
+        """
+        Args:
+            memory_budget_gb: RSS 預算（GB），None 表示不限制
+            cache_root: 編譯快取根目錄（傳給 create_pipeline）
+        """
+        self.memory_budget = int(memory_budget_gb * 1024 ** 3) if memory_budget_gb else None
+        self.cache_root = cache_root
+        self._entries: "OrderedDict[tuple, Dict]" = OrderedDict()
+        # 載入中的鍵 -> (完成事件, 預估大小)
+        self._loading: Dict[tuple, Tuple[threading.Event, int]] = {}
+        self._loads_started = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(
+        model_path: str,
+        device: str,
+        properties: Dict,
+        scheduler: Optional[Dict] = None,
+        draft_model: Optional[str] = None,
+    ) -> tuple:
+        # 屬性值可能是不可雜湊的物件，以 repr 作為鍵
+        props = tuple(sorted((name, repr(value)) for name, value in properties.items()))
+        sched = tuple(sorted(scheduler.items())) if scheduler is not None else None
+        draft = str(Path(draft_model).resolve()) if draft_model else None
+        return (str(Path(model_path).resolve()), device.upper(), props, sched, draft)
+
+    def get(
+        self,
+        model_path: str,
+        device: str = "CPU",
+        cache_root=_REGISTRY_DEFAULT,
+        scheduler: Optional[Dict] = None,
+        draft_model: Optional[str] = None,
+        shared: bool = True,
+        **properties,
+    ) -> Tuple[object, Dict]:
+        """
+        取得 pipeline，未載入時建立
+
+        Args:
+            cache_root: 編譯快取根目錄，未指定時使用登錄表的設定
+            scheduler: SchedulerConfig 欄位；指定時取得 ContinuousBatchingPipeline
+            draft_model: 草稿模型路徑；指定時取得 speculative decoding pipeline
+            shared: False 時建立不登錄、不與其他呼叫端共用的 pipeline
+                （多輪對話使用；不計入記憶體預算）
+            **properties: 傳給 LLMPipeline 的屬性（也是登錄表鍵的一部分）
+
+        Returns:
+            (pipeline, 載入資訊)；載入資訊同 create_pipeline，另含 registry_hit
+        """
+        if cache_root is _REGISTRY_DEFAULT:
+            cache_root = self.cache_root
+        if not shared:
+            pipe, info = create_pipeline(
+                model_path, device, cache_root=cache_root, scheduler=scheduler,
+                draft_model=draft_model, **properties
+            )
+            return pipe, dict(info, registry_hit=False)
+
+        key = self.make_key(model_path, device, properties, scheduler, draft_model)
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    info = dict(entry["info"], registry_hit=True, load_time=0.0)
+                    return entry["pipe"], info
+
+                loading = self._loading.get(key)
+                if loading is None:
+                    self.misses += 1
+                    incoming = estimate_model_size(model_path)
+                    if draft_model:
+                        incoming += estimate_model_size(draft_model)
+                    self._make_room(incoming)
+                    done = threading.Event()
+                    self._loading[key] = (done, incoming)
+                    self._loads_started += 1
+                    started = self._loads_started
+                    overlapped = len(self._loading) > 1
+                    break
+            # 同一個鍵正在由其他呼叫端載入：等待後重新查詢（載入失敗時改由本呼叫端重試）
+            loading[0].wait()
+
+        pipe = None
+        try:
+            rss_before = current_rss()
+            pipe, info = create_pipeline(
+                model_path, device, cache_root=cache_root, scheduler=scheduler,
+                draft_model=draft_model, **properties
+            )
+            rss_after = current_rss()
+        finally:
+            with self._lock:
+                del self._loading[key]
+                if pipe is not None:
+                    # 與其他載入重疊時 RSS 差值包含別的模型，改用檔案大小估計
+                    overlapped = overlapped or self._loads_started != started or bool(self._loading)
+                    size = (
+                        max(rss_after - rss_before, 0)
+                        if not overlapped and rss_before is not None and rss_after is not None
+                        else incoming
+                    )
+                    self._entries[key] = {"pipe": pipe, "info": info, "size": size}
+            done.set()
+        return pipe, dict(info, registry_hit=False)
+
+    def _make_room(self, incoming_size: int):
+        """
+        淘汰最久未使用的 pipeline，直到預估 RSS 不超過預算
+
+        以登錄時量得的各 pipeline 大小估計可釋放的記憶體，而不是每次淘汰後
+        重新讀取 RSS：呼叫端仍持有的 pipeline 被淘汰後 RSS 不會下降，
+        重新讀取會讓迴圈清空整個登錄表。
+        """
+        if self.memory_budget is None:
+            return
+        rss = current_rss()
+        if rss is None:
+            return
+        # 其他正在載入的 pipeline 尚未完全反映在 RSS 中
+        projected = rss + incoming_size + sum(size for _, size in self._loading.values())
+        while self._entries and projected > self.memory_budget:
+            projected -= self._evict_oldest()
+
+    def _evict_oldest(self) -> int:
+        """淘汰最久未使用的 pipeline，回傳其大小估計（位元組）"""
+        key, entry = self._entries.popitem(last=False)
+        size = entry["size"]
+        del entry
+        gc.collect()
+        self.evictions += 1
+        return size
+
+    def release(
+        self,
+        model_path: str,
+        device: str = "CPU",
+        scheduler: Optional[Dict] = None,
+        draft_model: Optional[str] = None,
+        **properties,
+    ) -> bool:
+        """主動移除指定的 pipeline"""
+        key = self.make_key(model_path, device, properties, scheduler, draft_model)
+        with self._lock:
+            if self._entries.pop(key, None) is None:
+                return False
+            gc.collect()
+            return True
+
+    def clear(self):
+        """移除所有 pipeline"""
+        with self._lock:
+            self._entries.clear()
+            gc.collect()
+
+    def stats(self) -> Dict:
+        """回傳命中 / 未命中 / 淘汰次數與目前狀態"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "loaded": len(self._entries),
+                "loaded_bytes": sum(entry["size"] for entry in self._entries.values()),
+                "rss": current_rss(),
+                "memory_budget": self.memory_budget,
+            }
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> PipelineRegistry:
+    """取得程序共用的 PipelineRegistry（預算取自 config/config.yaml）"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = PipelineRegistry(memory_budget_gb=load_memory_budget())
+        return _registry
@@ -0,0 +1,223 @@
+"""
+生成結果快取（content-addressed）
+讓批量推理與聊天機器人重複執行相同問題時直接取回先前的回答
+
+快取鍵為 (模型雜湊, 設備, 提示詞, 生成參數) 的 SHA-256；只有確定性解碼
+（greedy / beam search，do_sample 未開啟）才會使用快取，取樣生成每次結果
+不同，不應重用。do_sample 以模型預設生成參數加上呼叫端參數後的實際值判斷。
+
+後端為 SQLite 單檔，總大小超過上限時依最後存取時間（LRU）淘汰。
+多個程序可以共用同一個快取檔（SQLite 以檔案鎖協調寫入）。
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from pipeline_factory import DEFAULT_CONFIG_PATH, model_fingerprint
+
+DEFAULT_CACHE_PATH = "./models/.response_cache.sqlite"
+DEFAULT_MAX_SIZE_MB = 512
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_access REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access);
+"""
+
+
+def effective_generation_config(pipe, overrides: Dict) -> Dict:
+    """
+    實際生效的生成參數
+
+    generate 以 pipeline 的預設 GenerationConfig（來自模型的
+    generation_config.json）為基礎再套用呼叫端的參數；許多聊天模型
+    預設即開啟 do_sample，只看呼叫端的參數會誤判為確定性解碼。
+
+    Args:
+        pipe: LLMPipeline 或 ContinuousBatchingPipeline
+        overrides: 呼叫端傳給 generate 的參數
+    """
+    getter = getattr(pipe, "get_generation_config", None) or getattr(pipe, "get_config", None)
+    effective = {}
+    if getter is not None:
+        base = getter()
+        for name in ("do_sample", "num_beams", "temperature", "top_p", "top_k", "max_new_tokens"):
+            value = getattr(base, name, None)
+            if value is not None:
+                effective[name] = value
+    effective.update(overrides)
+    return effective
+
+
+def is_deterministic(generation_config: Dict) -> bool:
+    """
+    生成參數是否為確定性解碼（未開啟 do_sample 時 temperature / top_p 不生效）
+
+    傳入 effective_generation_config() 的結果，模型預設的 do_sample 才會納入判斷
+    """
+    return not generation_config.get("do_sample", False)
+
+
+def load_cache_settings(config_path: str = DEFAULT_CONFIG_PATH) -> Dict:
+    """從 config.yaml 的 response_cache 區段讀取快取路徑與大小上限"""
+    settings = {"path": DEFAULT_CACHE_PATH, "max_size_mb": DEFAULT_MAX_SIZE_MB}
+    try:
+        import yaml
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = yaml.safe_load(f) or {}
+    except (ImportError, OSError):
+        return settings
+    settings.update({k: v for k, v in (config.get("response_cache") or {}).items() if v is not None})
+    return settings
+
+
+class ResponseCache:
+    """
+    SQLite 生成結果快取，用法：
+
+        cache = ResponseCache()
+        key = cache.make_key(model_path, device, prompt, config)
+        payload = cache.get(key)
+        if payload is None:
+            payload = {"text": pipe.generate(prompt, **config)}
+            cache.put(key, payload, model_path)
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_size_mb: float = DEFAULT_MAX_SIZE_MB):
+        """
+        Args:
+            path: SQLite 檔案路徑
+            max_size_mb: 快取內容總大小上限（MB），None 表示不限制
+        """
+        self.path = path
+        self.max_size = int(max_size_mb * 1024 * 1024) if max_size_mb else None
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._fingerprints: Dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+        self.puts = 0
+        self.evictions = 0
+
+    def model_hash(self, model_path: str) -> str:
+        """模型雜湊（同一程序內只計算一次）"""
+        resolved = str(Path(model_path).resolve())
+        if resolved not in self._fingerprints:
+            self._fingerprints[resolved] = model_fingerprint(model_path)
+        return self._fingerprints[resolved]
+
+    def make_key(self, model_path: str, device: str, prompt: str, generation_config: Dict) -> str:
+        """計算快取鍵"""
+        payload = json.dumps(
+            {
+                "model": self.model_hash(model_path),
+                "device": device.upper(),
+                "prompt": prompt,
+                "config": generation_config,
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """取得快取內容，未命中時回傳 None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE responses SET last_access = ?, hits = hits + 1 WHERE key = ?",
+                    (time.time(), key),
+                )
+            self.hits += 1
+            return json.loads(row[0])
+
+    def put(self, key: str, payload: Dict, model_path: str = ""):
+        """寫入快取，必要時淘汰最久未使用的項目"""
+        data = json.dumps(payload, ensure_ascii=False)
+        size = len(data.encode("utf-8"))
+        if self.max_size is not None and size > self.max_size:
+            return
+
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, payload, size, created, last_access, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (key, os.path.basename(str(model_path).rstrip("/\\")), data, size, now, now),
+            )
+            self.puts += 1
+            self._evict()
+
+    def _evict(self):
+        if self.max_size is None:
+            return
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_size:
+            return
+        rows = self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_access ASC"
+        ).fetchall()
+        victims = []
+        for key, size in rows:
+            if total <= self.max_size:
+                break
+            victims.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+        self.evictions += len(victims)
+
+    def clear(self):
+        """清空快取"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict:
+        """本程序的命中 / 未命中次數與快取檔目前狀態"""
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+            "puts": self.puts,
+            "evictions": self.evictions,
+            "entries": entries,
+            "size_bytes": total,
+            "max_size_bytes": self.max_size,
+        }
+
+    def describe(self) -> str:
+        """將統計格式化為一行說明"""
+        stats = self.stats()
+        rate = f"{stats['hit_rate'] * 100:.1f}%" if stats["hit_rate"] is not None else "-"
+        return (
+            f"命中 {stats['hits']} / 未命中 {stats['misses']}（命中率 {rate}），"
+            f"{stats['entries']} 筆，{stats['size_bytes'] / 1024 / 1024:.1f} MB"
+        )
+
+    def close(self):
+        self._conn.close()
@@ -24,13 +24,14 @@ def run_simple_inference(model_path: str, device: str = "CPU"):
         device: 推理設備 (CPU, GPU, NPU)
     """
     try:
-        import openvino_genai as ov_genai
+        from pipeline_factory import describe_load, get_registry
         
         print(f"正在載入模型: {model_path}")
         print(f"使用設備: {device}\n")
         
         # 載入模型
-        pipe = ov_genai.LLMPipeline(model_path, device)
+        pipe, load_info = get_registry().get(model_path, device)
+        print(f"模型載入完成（{describe_load(load_info)}）\n")
         
         # 測試問題
         prompts = [
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Benchmark 結果歷史記錄
+
+每次 run_benchmark.py 執行都會以一行 JSON 追加到歷史檔（append-only JSONL），
+記錄模型、設備、參數、git commit、主機指紋與 runtime 版本，供 compare 子命令比對回歸。
+
+host_id 只由硬體 / 作業系統識別資訊計算；Python 與 openvino-genai 版本另存於
+runtime 欄位，升級 runtime 前後的記錄仍可互相比較。
+"""
+
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DEFAULT_HISTORY_PATH = "./results/benchmark_history.jsonl"
+
+# 指標方向：True 表示數值越低越好
+LOWER_IS_BETTER = {
+    "load_time": True,
+    "cold_load_time": True,
+    "warm_load_time": True,
+    "ttft": True,
+    "tpot": True,
+    "generate_time": True,
+    "throughput": False,
+}
+
+# 計算 host_id 的主機欄位（不含 runtime 版本）
+HOST_ID_FIELDS = ["hostname", "system", "machine", "processor", "cpu_count"]
+
+# 決定「同一組設定」的參數欄位
+CONFIG_KEY_FIELDS = [
+    "model", "device", "prompt", "max_tokens", "num_warmup", "num_iter", "load_mode",
+]
+
+
+def _short_hash(data) -> str:
+    payload = json.dumps(data, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha1(payload).hexdigest()[:12]
+
+
+def get_git_commit() -> Optional[str]:
+    """取得目前的 git commit（非 git 目錄時回傳 None）"""
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            return None
+        return result.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def get_runtime_version() -> Optional[str]:
+    """取得已安裝的 openvino-genai 版本"""
+    try:
+        from importlib.metadata import version
+        return version("openvino-genai")
+    except Exception:
+        return None
+
+
+def get_host_fingerprint() -> Dict:
+    """收集主機資訊，host_id 為 HOST_ID_FIELDS 的雜湊值"""
+    fingerprint = {
+        "hostname": platform.node(),
+        "system": platform.system(),
+        "release": platform.release(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+    fingerprint["host_id"] = _short_hash({field: fingerprint[field] for field in HOST_ID_FIELDS})
+    return fingerprint
+
+
+def get_runtime_info() -> Dict:
+    """收集 runtime 版本（不影響 host_id）"""
+    return {
+        "python": platform.python_version(),
+        "openvino_genai": get_runtime_version(),
+    }
+
+
+def config_id(params: Dict, engine: str) -> str:
+    """計算設定識別碼（相同模型 / 設備 / 參數 / 引擎會得到相同值）"""
+    key = {field: params.get(field) for field in CONFIG_KEY_FIELDS}
+    key["model"] = os.path.basename(str(key["model"] or "").rstrip("/\\"))
+    key["engine"] = engine
+    return _short_hash(key)
+
+
+def make_record(results: List[Dict], summary: Optional[Dict] = None, tag: str = None) -> Dict:
+    """
+    將同一組設定的一或多次執行結果整理為一筆歷史記錄
+
+    有統計彙總時以中位數作為代表值，否則取各次執行平均值的平均。
+    """
+    first = results[0]
+    metrics = {}
+    for name in LOWER_IS_BETTER:
+        if summary and summary.get(name, {}).get("median") is not None:
+            metrics[name] = summary[name]["median"]
+            continue
+        values = [
+            r["metrics"][name]["mean"]
+            for r in results
+            if r.get("success") and r["metrics"].get(name, {}).get("mean") is not None
+        ]
+        metrics[name] = sum(values) / len(values) if values else None
+
+    host = get_host_fingerprint()
+    return {
+        "run_id": uuid.uuid4().hex[:12],
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "tag": tag,
+        "config_id": config_id(first["params"], first.get("engine", "exe")),
+        "host_id": host["host_id"],
+        "git_commit": get_git_commit(),
+        "engine": first.get("engine", "exe"),
+        "params": first["params"],
+        "success": any(r.get("success") for r in results),
+        "num_runs": len(results),
+        "metrics": metrics,
+        "summary": summary,
+        "host": host,
+        "runtime": get_runtime_info(),
+    }
+
+
+def append_record(record: Dict, history_path: str = DEFAULT_HISTORY_PATH):
+    """追加一筆記錄到歷史檔"""
+    Path(history_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(history_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def load_records(history_path: str = DEFAULT_HISTORY_PATH) -> List[Dict]:
+    """讀取所有歷史記錄（略過損壞的行）"""
+    if not os.path.exists(history_path):
+        return []
+
+    records = []
+    with open(history_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return records
+
+
+def _latest_by_key(records: List[Dict], match_host: bool) -> Dict:
+    latest = {}
+    for record in records:
+        if not record.get("success"):
+            continue
+        key = (record["config_id"], record["host_id"] if match_host else None)
+        if key not in latest or record["timestamp"] >= latest[key]["timestamp"]:
+            latest[key] = record
+    return latest
+
+
+def compare_records(
+    records: List[Dict],
+    baseline_tag: str,
+    candidate_tag: str = None,
+    threshold_pct: float = 5.0,
+    match_host: bool = True,
+) -> List[Dict]:
+    """
+    比較基準與候選記錄
+
+    Args:
+        records: load_records 的結果
+        baseline_tag: 基準記錄的 tag
+        candidate_tag: 候選記錄的 tag；None 表示使用每組設定最新的非基準記錄
+        threshold_pct: 變差超過此百分比即視為回歸
+        match_host: 是否只比較同一台主機的記錄
+
+    Returns:
+        list: 每組設定每個指標的比較結果
+    """
+    baseline = _latest_by_key([r for r in records if r.get("tag") == baseline_tag], match_host)
+    if candidate_tag is None:
+        candidates = [r for r in records if r.get("tag") != baseline_tag]
+    else:
+        candidates = [r for r in records if r.get("tag") == candidate_tag]
+    candidate = _latest_by_key(candidates, match_host)
+
+    comparisons = []
+    for key, base in baseline.items():
+        if key not in candidate:
+            continue
+        cand = candidate[key]
+        for name, lower_is_better in LOWER_IS_BETTER.items():
+            base_value = base["metrics"].get(name)
+            cand_value = cand["metrics"].get(name)
+            if not base_value or cand_value is None:
+                continue
+
+            change_pct = (cand_value - base_value) / base_value * 100.0
+            worse_pct = change_pct if lower_is_better else -change_pct
+            comparisons.append({
+                "config_id": base["config_id"],
+                "model": os.path.basename(str(base["params"].get("model", "")).rstrip("/\\")),
+                "device": base["params"].get("device"),
+                "max_tokens": base["params"].get("max_tokens"),
+                "metric": name,
+                "baseline": base_value,
+                "candidate": cand_value,
+                "change_pct": change_pct,
+                "regression": worse_pct > threshold_pct,
+                "baseline_run": base["run_id"],
+                "candidate_run": cand["run_id"],
+                "baseline_runtime": base["runtime"],
+                "candidate_runtime": cand["runtime"],
+            })
+    return comparisons
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark 統計彙總工具
+
+將多次迭代 / 多次程序啟動的量測值彙總為中位數、p90、p99、標準差
+與 bootstrap 信賴區間，並可選擇以 IQR 規則剔除離群值。
+僅使用標準函式庫，供 run_benchmark.py 匯入。
+"""
+
+import math
+import random
+import statistics
+from typing import Dict, List, Optional, Tuple
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """
+    計算百分位數（線性內插，與 numpy 預設相同）
+
+    Args:
+        values: 量測值
+        q: 百分位（0-100）
+    """
+    if not values:
+        return None
+
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100.0
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    if lower == upper:
+        return ordered[int(position)]
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def iqr_trim(values: List[float], k: float = 1.5) -> Tuple[List[float], List[float]]:
+    """
+    以 IQR 規則剔除離群值
+
+    超出 [Q1 - k*IQR, Q3 + k*IQR] 的值視為離群值。樣本少於 4 個時不剔除。
+
+    Returns:
+        (保留的值, 剔除的值)
+    """
+    if len(values) < 4:
+        return list(values), []
+
+    q1 = percentile(values, 25)
+    q3 = percentile(values, 75)
+    iqr = q3 - q1
+    low, high = q1 - k * iqr, q3 + k * iqr
+
+    kept = [v for v in values if low <= v <= high]
+    outliers = [v for v in values if v < low or v > high]
+    return kept, outliers
+
+
+def bootstrap_ci(
+    values: List[float],
+    confidence: float = 0.95,
+    n_resamples: int = 2000,
+    seed: int = 0,
+) -> Tuple[Optional[float], Optional[float]]:
+    """
+    以 bootstrap 百分位法估計平均值的信賴區間
+
+    Args:
+        values: 量測值
+        confidence: 信賴水準（例如 0.95）
+        n_resamples: 重抽樣次數
+        seed: 亂數種子（固定以便結果可重現）
+
+    Returns:
+        (下界, 上界)；樣本少於 2 個時回傳 (None, None)
+    """
+    if len(values) < 2:
+        return None, None
+
+    rng = random.Random(seed)
+    n = len(values)
+    means = sorted(
+        sum(rng.choice(values) for _ in range(n)) / n for _ in range(n_resamples)
+    )
+    alpha = (1.0 - confidence) / 2.0
+    return percentile(means, alpha * 100), percentile(means, (1.0 - alpha) * 100)
+
+
+def summarize(
+    values: List[float],
+    trim_outliers: bool = False,
+    confidence: float = 0.95,
+) -> Dict:
+    """
+    彙總單一指標的量測值
+
+    Returns:
+        dict: n, mean, median, p90, p99, stdev, min, max, ci_low, ci_high, outliers
+    """
+    values = [float(v) for v in values if v is not None]
+    outliers = []
+    if trim_outliers:
+        values, outliers = iqr_trim(values)
+
+    if not values:
+        return {
+            "n": 0, "mean": None, "median": None, "p90": None, "p99": None,
+            "stdev": None, "min": None, "max": None,
+            "ci_low": None, "ci_high": None, "outliers": outliers,
+        }
+
+    ci_low, ci_high = bootstrap_ci(values, confidence)
+    return {
+        "n": len(values),
+        "mean": statistics.fmean(values),
+        "median": statistics.median(values),
+        "p90": percentile(values, 90),
+        "p99": percentile(values, 99),
+        "stdev": statistics.stdev(values) if len(values) > 1 else 0.0,
+        "min": min(values),
+        "max": max(values),
+        "ci_low": ci_low,
+        "ci_high": ci_high,
+        "outliers": outliers,
+    }
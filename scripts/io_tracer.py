@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+模型載入 I/O 追蹤工具（Linux）
+
+在 LLMPipeline 載入期間以固定間隔取樣：
+- /proc/self/io：整個程序的讀取位元組數與 read 系統呼叫次數
+- /proc/self/fd + fdinfo：模型目錄內已開啟檔案的讀取位置
+- mincore：各檔案在 page cache 中的常駐頁面（涵蓋 mmap 方式讀取的權重檔）
+
+結果為每個檔案的時間軸與摘要（讀取量、首位元組時間、讀取推進量、
+循序比例），以及程序層級的平均 read 大小。取樣無法看到每一次 read，
+檔案層級的數值為近似值。
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from page_cache import PAGE_SIZE, model_files, resident_pages
+
+PROC_SELF = Path("/proc/self")
+
+
+def _read_proc_io() -> Optional[Dict[str, int]]:
+    """讀取 /proc/self/io"""
+    try:
+        with open(PROC_SELF / "io", "r") as f:
+            return {
+                key.strip(): int(value)
+                for key, value in (line.split(":", 1) for line in f if ":" in line)
+            }
+    except OSError:
+        return None
+
+
+def _open_file_positions(watch_dir: Path) -> Dict[str, int]:
+    """列出本程序在 watch_dir 內開啟的檔案及其目前讀取位置"""
+    positions = {}
+    try:
+        fds = os.listdir(PROC_SELF / "fd")
+    except OSError:
+        return positions
+
+    for fd in fds:
+        try:
+            target = os.readlink(PROC_SELF / "fd" / fd)
+            if not target.startswith(str(watch_dir) + os.sep):
+                continue
+            with open(PROC_SELF / "fdinfo" / fd, "r") as f:
+                for line in f:
+                    if line.startswith("pos:"):
+                        pos = int(line.split()[1])
+                        positions[target] = max(pos, positions.get(target, 0))
+                        break
+        except (OSError, ValueError):
+            continue
+    return positions
+
+
+class _FileTrace:
+    """單一檔案的追蹤狀態"""
+
+    def __init__(self, path: Path, baseline: Optional[bytes]):
+        self.path = path
+        self.size = path.stat().st_size
+        self.residency = baseline
+        self.initial_resident = baseline.count(1) * PAGE_SIZE if baseline else 0
+        self.opened_ms = None
+        self.first_byte_ms = None
+        self.last_pos = 0
+        self.fd_bytes = 0
+        self.fd_steps = 0
+        self.fd_seeks = 0
+        self.fd_advances = []
+        self.faulted_pages = 0
+        self.faulted_runs = 0
+        self.timeline = []
+
+    def update(self, t_ms: float, pos: Optional[int], residency: Optional[bytes]):
+        changed = False
+
+        if pos is not None:
+            if self.opened_ms is None:
+                self.opened_ms = t_ms
+                changed = True
+            if pos != self.last_pos:
+                delta = pos - self.last_pos
+                self.fd_steps += 1
+                if delta > 0:
+                    self.fd_bytes += delta
+                    self.fd_advances.append(delta)
+                else:
+                    self.fd_seeks += 1
+                self.last_pos = pos
+                changed = True
+
+        if residency is not None and self.residency is not None:
+            previous = int.from_bytes(self.residency, "little")
+            current = int.from_bytes(residency, "little")
+            new = current & ~previous
+            if new:
+                # 位元組 i 對應第 i 頁；new & ~(new << 8) 保留每段連續新頁面的起點
+                self.faulted_pages += new.bit_count()
+                self.faulted_runs += (new & ~(new << 8)).bit_count()
+                changed = True
+            self.residency = residency
+
+        if self.first_byte_ms is None and (self.fd_bytes or self.faulted_pages):
+            self.first_byte_ms = t_ms
+
+        if changed:
+            self.timeline.append({
+                "t_ms": round(t_ms, 2),
+                "fd_pos": pos,
+                "resident_bytes": (
+                    min(self.residency.count(1) * PAGE_SIZE, self.size)
+                    if self.residency is not None else None
+                ),
+            })
+
+    def summary(self) -> Dict:
+        faulted_bytes = min(self.faulted_pages * PAGE_SIZE, self.size)
+        if self.faulted_pages:
+            # 新常駐頁面中，緊接在前一頁之後的比例
+            sequential_ratio = (self.faulted_pages - self.faulted_runs) / self.faulted_pages
+        elif self.fd_steps:
+            sequential_ratio = (self.fd_steps - self.fd_seeks) / self.fd_steps
+        else:
+            sequential_ratio = None
+
+        return {
+            "file": self.path.name,
+            "size": self.size,
+            "initially_resident": self.initial_resident,
+            "bytes_read": max(self.fd_bytes, faulted_bytes),
+            "fd_bytes": self.fd_bytes,
+            "faulted_bytes": faulted_bytes,
+            "opened_ms": self.opened_ms,
+            "first_byte_ms": self.first_byte_ms,
+            # 相鄰兩次取樣間讀取位置的推進量（非單次 read 的大小）
+            "avg_fd_advance": (
+                sum(self.fd_advances) / len(self.fd_advances) if self.fd_advances else None
+            ),
+            "max_fd_advance": max(self.fd_advances) if self.fd_advances else None,
+            "sequential_ratio": sequential_ratio,
+        }
+
+
+class IOTracer:
+    """
+    在背景執行緒取樣模型目錄的 I/O，用法：
+
+        with IOTracer(model_path) as tracer:
+            pipe = ov_genai.LLMPipeline(model_path, device)
+        report = tracer.report()
+    """
+
+    def __init__(self, watch_dir: str, interval: float = 0.02, track_residency: bool = True):
+        """
+        Args:
+            watch_dir: 要追蹤的模型目錄
+            interval: 取樣間隔（秒）
+            track_residency: 是否以 mincore 追蹤 page cache 常駐頁面
+        """
+        self.watch_dir = Path(watch_dir).resolve()
+        self.interval = interval
+        self.track_residency = track_residency
+        self.available = _read_proc_io() is not None
+        self._files: Dict[str, _FileTrace] = {}
+        self._process: List[Dict] = []
+        self._stop = threading.Event()
+        self._thread = None
+        self._start = None
+        self._elapsed_ms = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def start(self):
+        """記錄基準狀態並開始取樣"""
+        if not self.available:
+            return
+
+        for path in model_files(str(self.watch_dir)):
+            baseline = resident_pages(path) if self.track_residency else None
+            self._files[str(path.resolve())] = _FileTrace(path, baseline)
+
+        self._start = time.perf_counter()
+        self._sample()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止取樣並記錄最後一筆"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self._sample()
+        self._elapsed_ms = (time.perf_counter() - self._start) * 1000
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def _sample(self):
+        t_ms = (time.perf_counter() - self._start) * 1000
+
+        io = _read_proc_io()
+        if io is not None:
+            self._process.append({
+                "t_ms": round(t_ms, 2),
+                "rchar": io.get("rchar"),
+                "read_bytes": io.get("read_bytes"),
+                "syscr": io.get("syscr"),
+            })
+
+        positions = _open_file_positions(self.watch_dir)
+        for key, trace in self._files.items():
+            residency = resident_pages(trace.path) if self.track_residency else None
+            trace.update(t_ms, positions.get(key), residency)
+
+    def report(self, include_timeline: bool = True) -> Dict:
+        """
+        產生追蹤報告
+
+        Returns:
+            dict: available, elapsed_ms, process（程序層級摘要）, files（每個檔案摘要與時間軸）
+        """
+        if not self.available:
+            return {"available": False, "elapsed_ms": None, "process": {}, "files": []}
+
+        process = {}
+        if len(self._process) >= 2:
+            first, last = self._process[0], self._process[-1]
+            calls = last["syscr"] - first["syscr"]
+            chars = last["rchar"] - first["rchar"]
+            process = {
+                "read_bytes": last["read_bytes"] - first["read_bytes"],
+                "rchar": chars,
+                "read_calls": calls,
+                "avg_read_size": chars / calls if calls else None,
+            }
+        if include_timeline:
+            process["timeline"] = self._process
+
+        files = []
+        for trace in self._files.values():
+            entry = trace.summary()
+            if include_timeline:
+                entry["timeline"] = trace.timeline
+            files.append(entry)
+
+        return {
+            "available": True,
+            "elapsed_ms": self._elapsed_ms,
+            "interval_ms": self.interval * 1000,
+            "process": process,
+            "files": files,
+        }
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+模型檔案的 page cache 控制工具
+
+用於量測冷啟動（模型檔案不在 page cache）與熱啟動的載入時間：
+- evict_model_files：以 posix_fadvise(DONTNEED) 或 drop_caches 將檔案移出 page cache
+- prefault_model_files：循序讀取檔案，使其常駐 page cache
+- prefetch_file：以平行大區塊讀取、fadvise(WILLNEED) 或 madvise(WILLNEED) 預取檔案
+- resident_pages：以 mincore 查詢檔案各頁是否在 page cache
+
+驅逐與 mincore 僅支援 Linux；其他平台會回傳 False / None 並由呼叫端提示。
+"""
+
+import ctypes
+import ctypes.util
+import mmap
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# 模型載入時會讀取的主要檔案（其餘檔案仍會一併處理）
+PRIMARY_MODEL_FILES = [
+    "openvino_model.bin",
+    "openvino_model.xml",
+    "openvino_tokenizer.bin",
+    "openvino_tokenizer.xml",
+    "openvino_detokenizer.bin",
+    "openvino_detokenizer.xml",
+]
+
+READ_CHUNK_SIZE = 16 * 1024 * 1024
+
+PAGE_SIZE = mmap.PAGESIZE
+
+# mincore 每頁只使用最低位元，其餘位元保留
+_RESIDENT_BIT = bytes(value & 1 for value in range(256))
+
+_libc = None
+
+
+def model_files(model_path: str) -> List[Path]:
+    """列出模型目錄中的檔案，主要檔案排在前面"""
+    model_dir = Path(model_path)
+    if model_dir.is_file():
+        return [model_dir]
+
+    files = [p for p in sorted(model_dir.iterdir()) if p.is_file()]
+    order = {name: i for i, name in enumerate(PRIMARY_MODEL_FILES)}
+    return sorted(files, key=lambda p: order.get(p.name, len(order)))
+
+
+def can_evict() -> bool:
+    """目前平台是否支援 page cache 驅逐"""
+    return sys.platform.startswith("linux") and hasattr(os, "posix_fadvise")
+
+
+def evict_file(path: Path) -> bool:
+    """以 posix_fadvise(DONTNEED) 將單一檔案移出 page cache"""
+    if not can_evict():
+        return False
+
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        return True
+    finally:
+        os.close(fd)
+
+
+def drop_caches() -> bool:
+    """
+    清空整個系統的 page cache（需要 root 權限）
+
+    寫入前先 sync，確保 dirty page 已回寫。
+    """
+    if not sys.platform.startswith("linux"):
+        return False
+
+    os.sync()
+    try:
+        with open("/proc/sys/vm/drop_caches", "w") as f:
+            f.write("1\n")
+        return True
+    except OSError:
+        return False
+
+
+def evict_model_files(model_path: str, method: str = "fadvise") -> bool:
+    """
+    將模型目錄的檔案移出 page cache
+
+    Args:
+        model_path: 模型目錄
+        method: "fadvise"（只處理模型檔案）或 "drop_caches"（整個系統）
+
+    Returns:
+        bool: 是否成功
+    """
+    if method == "drop_caches":
+        return drop_caches()
+
+    return all([evict_file(path) for path in model_files(model_path)])
+
+
+def prefault_model_files(model_path: str) -> int:
+    """
+    循序讀取模型檔案，使其載入 page cache
+
+    Returns:
+        int: 讀取的位元組數
+    """
+    total = 0
+    for path in model_files(model_path):
+        with open(path, "rb", buffering=0) as f:
+            while True:
+                chunk = f.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                total += len(chunk)
+    return total
+
+
+def prefetch_file(
+    path: Path,
+    method: str = "read",
+    workers: int = 4,
+    chunk_size: int = READ_CHUNK_SIZE,
+) -> int:
+    """
+    將檔案預取到 page cache
+
+    Args:
+        path: 檔案路徑
+        method: "read"（多執行緒 pread 大區塊）、"fadvise"（POSIX_FADV_WILLNEED，
+            非同步預讀）或 "madvise"（mmap 後 MADV_WILLNEED）
+        workers: read 模式的平行執行緒數
+        chunk_size: read 模式每次讀取的區塊大小
+
+    Returns:
+        int: 讀取（或要求預讀）的位元組數
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return 0
+
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        if method == "fadvise":
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            return size
+
+        if method == "madvise":
+            with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mapped:
+                mapped.madvise(mmap.MADV_WILLNEED)
+            return size
+
+        if not hasattr(os, "pread"):
+            return prefault_model_files(str(path))
+
+        # os.pread 會釋放 GIL，多執行緒可同時發出多個大區塊讀取
+        def read_range(offset: int) -> int:
+            return len(os.pread(fd, chunk_size, offset))
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            return sum(pool.map(read_range, range(0, size, chunk_size)))
+    finally:
+        os.close(fd)
+
+
+def _load_libc():
+    """載入 libc 並設定 mmap / mincore / munmap 的簽章"""
+    global _libc
+    if _libc is None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        libc.mmap.restype = ctypes.c_void_p
+        libc.mmap.argtypes = [
+            ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int,
+            ctypes.c_int, ctypes.c_int, ctypes.c_long,
+        ]
+        libc.mincore.argtypes = [
+            ctypes.c_void_p, ctypes.c_size_t, ctypes.POINTER(ctypes.c_ubyte),
+        ]
+        libc.munmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+        _libc = libc
+    return _libc
+
+
+def resident_pages(path: Path) -> Optional[bytes]:
+    """
+    以 mincore 取得檔案每一頁是否在 page cache
+
+    Returns:
+        bytes: 每頁一個位元組（1 = 常駐，0 = 不在 cache）；不支援時回傳 None
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+
+    size = os.path.getsize(path)
+    if size == 0:
+        return b""
+
+    libc = _load_libc()
+    num_pages = (size + PAGE_SIZE - 1) // PAGE_SIZE
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        addr = libc.mmap(None, size, mmap.PROT_READ, mmap.MAP_SHARED, fd, 0)
+        if addr is None or addr == ctypes.c_void_p(-1).value:
+            return None
+        try:
+            vec = (ctypes.c_ubyte * num_pages)()
+            if libc.mincore(addr, size, vec) != 0:
+                return None
+            return bytes(vec).translate(_RESIDENT_BIT)
+        finally:
+            libc.munmap(addr, size)
+    finally:
+        os.close(fd)
+
+
+def resident_bytes(path: Path) -> Tuple[Optional[int], int]:
+    """
+    查詢檔案在 page cache 中的位元組數
+
+    Returns:
+        (常駐位元組數, 檔案大小)；不支援時常駐位元組數為 None
+    """
+    size = os.path.getsize(path)
+    pages = resident_pages(path)
+    if pages is None:
+        return None, size
+    return min(pages.count(1) * PAGE_SIZE, size), size
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+模型 page cache 預取工具
+
+部署後立即將 models/ 下模型的 openvino_model.bin 與 tokenizer 檔案預先讀入
+page cache，避免第一個請求承擔數秒的磁碟讀取，並以 mincore 回報常駐比例。
+
+使用範例：
+    # 預取單一模型
+    python scripts/prefetch_model.py ./models/open_llama_7b_v2-int4-ov
+
+    # 預取 models/ 下所有模型，使用 8 個執行緒平行讀取
+    python scripts/prefetch_model.py --all --workers 8
+
+    # 常駐模式：每 60 秒檢查一次，常駐比例低於 95% 時重新預取
+    python scripts/prefetch_model.py --all --watch 60
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from page_cache import PRIMARY_MODEL_FILES, model_files, prefetch_file, resident_bytes
+
+# 顏色常數
+COLORS = {
+    "CYAN": "\033[96m",
+    "GREEN": "\033[92m",
+    "YELLOW": "\033[93m",
+    "RED": "\033[91m",
+    "BLUE": "\033[94m",
+    "RESET": "\033[0m",
+    "BOLD": "\033[1m",
+}
+
+# 與 run_benchmark.py 的 check_model_path 相同的模型目錄結構
+REQUIRED_FILES = ["openvino_model.xml", "openvino_model.bin", "config.json"]
+
+
+def colorize(text: str, color: str) -> str:
+    """為文字添加顏色"""
+    return f"{COLORS.get(color, '')}{text}{COLORS['RESET']}"
+
+
+def print_header(title: str):
+    """列印美化的標題"""
+    width = 70
+    print()
+    print("╔" + "═" * (width - 2) + "╗")
+    print(f"║ {colorize(title.center(width - 4), 'CYAN')} ║")
+    print("╚" + "═" * (width - 2) + "╝")
+    print()
+
+
+def print_status(message: str, status: str = "INFO"):
+    """列印狀態信息"""
+    status_map = {
+        "INFO": ("ℹ️  ", "BLUE"),
+        "SUCCESS": ("✅ ", "GREEN"),
+        "WARNING": ("⚠️  ", "YELLOW"),
+        "ERROR": ("❌ ", "RED"),
+        "PROGRESS": ("📦 ", "CYAN"),
+    }
+
+    icon, color = status_map.get(status, ("ℹ️  ", "BLUE"))
+    print(f"{icon} {colorize(message, color)}")
+
+
+def is_model_dir(path: Path) -> bool:
+    """檢查目錄是否為 OpenVINO 模型目錄"""
+    return path.is_dir() and all((path / name).exists() for name in REQUIRED_FILES)
+
+
+def find_model_dirs(models_root: str) -> list:
+    """列出 models_root 下所有模型目錄"""
+    root = Path(models_root)
+    if not root.exists():
+        return []
+    return [path for path in sorted(root.iterdir()) if is_model_dir(path)]
+
+
+def select_files(model_dir: Path, all_files: bool) -> list:
+    """選擇要預取的檔案：預設只處理權重與 tokenizer 檔案"""
+    files = model_files(str(model_dir))
+    if all_files:
+        return files
+    return [path for path in files if path.name in PRIMARY_MODEL_FILES]
+
+
+def residency_ratio(path: Path):
+    """回傳檔案在 page cache 的常駐比例（不支援時為 None）"""
+    resident, size = resident_bytes(path)
+    if resident is None:
+        return None
+    return resident / size if size else 1.0
+
+
+def format_ratio(ratio) -> str:
+    return f"{ratio * 100:5.1f}%" if ratio is not None else "  n/a"
+
+
+def prefetch_model(
+    model_dir: Path,
+    method: str = "read",
+    workers: int = 4,
+    all_files: bool = False,
+    min_residency: float = 0.0,
+) -> dict:
+    """
+    預取單一模型目錄
+
+    Args:
+        min_residency: 常駐比例已達此值的檔案略過（0 表示全部預取）
+
+    Returns:
+        dict: bytes（讀取位元組數）, seconds, files（每個檔案的前後常駐比例）
+    """
+    print_status(f"模型：{colorize(str(model_dir), 'BOLD')}", "PROGRESS")
+    print(f"  {'File':<28} {'Size(MB)':>9} {'Before':>7} {'After':>7} {'Time(s)':>8} {'MB/s':>8}")
+
+    total_bytes = 0
+    start_total = time.perf_counter()
+    files = []
+    for path in select_files(model_dir, all_files):
+        size = path.stat().st_size
+        before = residency_ratio(path)
+        if before is not None and min_residency and before >= min_residency:
+            files.append({"file": path.name, "before": before, "after": before, "skipped": True})
+            continue
+
+        start = time.perf_counter()
+        read = prefetch_file(path, method=method, workers=workers)
+        elapsed = time.perf_counter() - start
+        after = residency_ratio(path)
+        total_bytes += read
+
+        speed = f"{size / 1024 ** 2 / elapsed:8.1f}" if elapsed > 0 and method == "read" else "       -"
+        print(
+            f"  {path.name[:28]:<28} {size / 1024 ** 2:>9.1f} {format_ratio(before):>7} "
+            f"{format_ratio(after):>7} {elapsed:>8.2f} {speed}"
+        )
+        files.append({"file": path.name, "before": before, "after": after, "skipped": False})
+
+    return {
+        "bytes": total_bytes,
+        "seconds": time.perf_counter() - start_total,
+        "files": files,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="將模型檔案預取到 page cache，並回報常駐比例",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+預取方式：
+  read     多執行緒 pread 大區塊循序讀取（同步，完成後即常駐）
+  fadvise  posix_fadvise(WILLNEED)，交由核心非同步預讀（Linux）
+  madvise  mmap 後 madvise(WILLNEED)，交由核心非同步預讀（Linux）
+
+非同步方式的 After 欄位為發出請求當下的常駐比例，可稍後再次執行確認。
+        """
+    )
+    parser.add_argument("models", nargs="*", help="模型目錄（例如：./models/open_llama_7b_v2-int4-ov）")
+    parser.add_argument("--all", action="store_true", help="預取 --models-root 下所有模型")
+    parser.add_argument("--models-root", default="./models", help="模型根目錄（預設：./models）")
+    parser.add_argument(
+        "--method",
+        default="read",
+        choices=["read", "fadvise", "madvise"],
+        help="預取方式（預設：read）"
+    )
+    parser.add_argument("--workers", type=int, default=4, help="read 模式的平行執行緒數（預設：4）")
+    parser.add_argument("--all-files", action="store_true", help="預取模型目錄內所有檔案")
+    parser.add_argument(
+        "--watch",
+        type=float,
+        default=None,
+        help="常駐模式：每隔指定秒數檢查一次，常駐比例低於 --min-residency 時重新預取"
+    )
+    parser.add_argument(
+        "--min-residency",
+        type=float,
+        default=0.95,
+        help="常駐模式下重新預取的門檻（預設：0.95）"
+    )
+    args = parser.parse_args()
+
+    if args.method != "read" and not sys.platform.startswith("linux"):
+        parser.error(f"--method {args.method} 僅支援 Linux")
+
+    model_dirs = [Path(path) for path in args.models]
+    if args.all:
+        model_dirs += find_model_dirs(args.models_root)
+    if not model_dirs:
+        parser.error("請指定模型目錄或使用 --all")
+
+    for model_dir in model_dirs:
+        if not is_model_dir(model_dir):
+            print_status(f"不是有效的模型目錄（缺少 {', '.join(REQUIRED_FILES)}）：{model_dir}", "ERROR")
+            sys.exit(1)
+
+    print_header("模型 Page Cache 預取")
+
+    min_residency = 0.0
+    while True:
+        total_bytes = 0
+        start = time.perf_counter()
+        for model_dir in model_dirs:
+            result = prefetch_model(
+                model_dir,
+                method=args.method,
+                workers=args.workers,
+                all_files=args.all_files,
+                min_residency=min_residency,
+            )
+            total_bytes += result["bytes"]
+            print()
+
+        elapsed = time.perf_counter() - start
+        print_status(
+            f"預取完成：{total_bytes / 1024 ** 2:.1f} MB，耗時 {elapsed:.2f} 秒",
+            "SUCCESS",
+        )
+
+        if args.watch is None:
+            break
+
+        # 之後的循環只重新預取常駐比例不足的檔案
+        min_residency = args.min_residency
+        print_status(f"{args.watch:.0f} 秒後再次檢查（Ctrl+C 結束）", "INFO")
+        time.sleep(args.watch)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print()
+        print_status("用戶中止操作", "WARNING")
+        sys.exit(0)
@@ -3,23 +3,42 @@
 OpenVINO GenAI Benchmark 包裝腳本
 
 簡化 benchmark_genai.exe 的執行，提供友好的命令行介面。
+使用 --engine python 時改以 openvino_genai.LLMPipeline 在程序內執行，無需編譯。
 
 使用範例：
     python scripts/run_benchmark.py \\
         --model "./models/open_llama_7b_v2-int4-ov" \\
         --device GPU \\
         --prompt "The Sky is blue because" \\
-        --max-tokens 20
+        --max-tokens 20 \\
+        --json-out results/benchmark.json
 """
 
 import argparse
+import csv
+import itertools
+import multiprocessing
+import re
 import subprocess
 import sys
 import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 from pathlib import Path
 import time
 import json
 
+from benchmark_history import (
+    DEFAULT_HISTORY_PATH,
+    append_record,
+    compare_records,
+    load_records,
+    make_record,
+)
+from benchmark_stats import summarize
+from io_tracer import IOTracer
+from page_cache import evict_model_files, prefault_model_files
+
 # 顏色常數
 COLORS = {
     "CYAN": "\033[96m",
@@ -32,6 +51,49 @@ COLORS = {
 }
 
 
+# 結果格式版本（欄位變更時遞增）
+RESULT_SCHEMA_VERSION = 3
+
+# benchmark_genai 輸出的指標：(欄位名稱, 輸出標籤, 單位)
+METRIC_FIELDS = [
+    ("load_time", "Load time", "ms"),
+    ("generate_time", "Generate time", "ms"),
+    ("tokenization_time", "Tokenization time", "ms"),
+    ("detokenization_time", "Detokenization time", "ms"),
+    ("ttft", "TTFT", "ms"),
+    ("tpot", "TPOT", "ms/token"),
+    ("throughput", "Throughput", "tokens/s"),
+    ("cold_load_time", "Cold load time", "ms"),
+    ("warm_load_time", "Warm load time", "ms"),
+]
+
+# benchmark_genai 輸出的 token 數量：(欄位名稱, 輸出標籤)
+TOKEN_COUNT_FIELDS = [
+    ("input_tokens", "Input token size"),
+    ("output_tokens", "Output token size"),
+]
+
+# 跨迭代 / 跨程序啟動彙總的指標
+SUMMARY_METRICS = [
+    "load_time", "cold_load_time", "warm_load_time", "ttft", "tpot", "throughput", "generate_time",
+]
+
+PARAM_FIELDS = [
+    "model", "device", "prompt", "max_tokens", "num_warmup", "num_iter", "load_mode",
+]
+
+# CSV 欄位順序固定，方便跨機器比對
+CSV_COLUMNS = (
+    ["schema_version", "timestamp", "engine", "success"]
+    + PARAM_FIELDS
+    + [name for name, _ in TOKEN_COUNT_FIELDS]
+    + [f"{name}_{stat}" for name, _, _ in METRIC_FIELDS for stat in ("mean", "std")]
+    + ["error"]
+)
+
+_NUMBER = r"([-+]?\d+(?:\.\d+)?)"
+
+
 def colorize(text: str, color: str) -> str:
     """為文字添加顏色"""
     return f"{COLORS.get(color, '')}{text}{COLORS['RESET']}"
@@ -92,6 +154,221 @@ def check_model_path(model_path: str) -> bool:
     return True
 
 
+def parse_benchmark_output(output: str) -> dict:
+    """
+    解析 benchmark_genai 的文字輸出
+
+    支援 "TTFT: 113.03 ± 0.00 ms" 與舊版 "TTFT: 1919.00 ms" 兩種格式，
+    輸出中找不到的指標一律為 None，確保欄位固定。
+
+    Returns:
+        dict: {"metrics": {name: {"mean", "std", "unit"}}, "input_tokens", "output_tokens"}
+    """
+    metrics = {}
+    for name, label, unit in METRIC_FIELDS:
+        pattern = rf"^\s*{re.escape(label)}:\s*{_NUMBER}(?:\s*±\s*{_NUMBER})?"
+        match = re.search(pattern, output or "", re.MULTILINE)
+        metrics[name] = {
+            "mean": float(match.group(1)) if match else None,
+            "std": float(match.group(2)) if match and match.group(2) else None,
+            "unit": unit,
+        }
+
+    parsed = {"metrics": metrics}
+    for name, label in TOKEN_COUNT_FIELDS:
+        match = re.search(rf"^\s*{re.escape(label)}:\s*(\d+)", output or "", re.MULTILINE)
+        parsed[name] = int(match.group(1)) if match else None
+
+    return parsed
+
+
+def build_result(
+    params: dict,
+    success: bool,
+    output: str = "",
+    error: str = None,
+    engine: str = "exe",
+    parsed: dict = None,
+    samples: dict = None,
+) -> dict:
+    """
+    建立固定格式的 benchmark 結果
+
+    Args:
+        parsed: 已取得的指標（格式同 parse_benchmark_output），未提供時解析 output
+        samples: 每次迭代的原始數值 {name: [values]}，僅 python 引擎提供
+    """
+    if parsed is None:
+        parsed = parse_benchmark_output(output)
+    return {
+        "schema_version": RESULT_SCHEMA_VERSION,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "engine": engine,
+        "success": success,
+        "params": {key: params.get(key) for key in PARAM_FIELDS},
+        "input_tokens": parsed["input_tokens"],
+        "output_tokens": parsed["output_tokens"],
+        "metrics": parsed["metrics"],
+        "samples": samples or {},
+        "io_trace": None,
+        "output": output,
+        "error": error,
+    }
+
+
+def flatten_result(result: dict) -> dict:
+    """將結果攤平成 CSV 的一列"""
+    row = {
+        "schema_version": result.get("schema_version"),
+        "timestamp": result.get("timestamp"),
+        "engine": result.get("engine"),
+        "success": result.get("success"),
+        "error": result.get("error"),
+    }
+    row.update(result.get("params", {}))
+    for name, _ in TOKEN_COUNT_FIELDS:
+        row[name] = result.get(name)
+    for name, _, _ in METRIC_FIELDS:
+        metric = result.get("metrics", {}).get(name) or {}
+        row[f"{name}_mean"] = metric.get("mean")
+        row[f"{name}_std"] = metric.get("std")
+    return {column: row.get(column) for column in CSV_COLUMNS}
+
+
+def collect_samples(results: list) -> dict:
+    """
+    收集多次執行的量測值
+
+    有每次迭代數值（python 引擎）時使用迭代數值，否則每次程序啟動
+    貢獻一個平均值（exe 引擎）。
+    """
+    samples = {name: [] for name in SUMMARY_METRICS}
+    for result in results:
+        if not result.get("success"):
+            continue
+        for name in SUMMARY_METRICS:
+            iteration_values = result.get("samples", {}).get(name)
+            if iteration_values:
+                samples[name].extend(iteration_values)
+            elif result["metrics"].get(name, {}).get("mean") is not None:
+                samples[name].append(result["metrics"][name]["mean"])
+    return samples
+
+
+def summarize_results(
+    results: list, trim_outliers: bool = False, confidence: float = 0.95
+) -> dict:
+    """計算每個指標的中位數、p90、p99、標準差與信賴區間"""
+    return {
+        name: summarize(values, trim_outliers=trim_outliers, confidence=confidence)
+        for name, values in collect_samples(results).items()
+    }
+
+
+def run_repeated(runner, repeat: int = 1, **kwargs) -> list:
+    """以相同參數執行 runner repeat 次，回傳每次的結果"""
+    results = []
+    for i in range(max(1, repeat)):
+        if repeat > 1:
+            print_status(f"重複執行：{i + 1}/{repeat}", "PROGRESS")
+        results.append(runner(**kwargs))
+    return results
+
+
+def summarize_runs(
+    results: list, trim_outliers: bool = False, confidence: float = 0.95
+) -> dict:
+    """有多個樣本時計算統計彙總，只有單一樣本時回傳 None"""
+    if not any(len(values) > 1 for values in collect_samples(results).values()):
+        return None
+    return summarize_results(results, trim_outliers, confidence)
+
+
+def print_summary(summary: dict, confidence: float = 0.95):
+    """列印統計彙總表"""
+    print_header("統計彙總")
+
+    units = {name: unit for name, _, unit in METRIC_FIELDS}
+    ci_label = f"{int(confidence * 100)}% CI"
+    header = (
+        f"{'Metric':<14} {'n':>4} {'median':>10} {'p90':>10} {'p99':>10} "
+        f"{'stdev':>9} {ci_label:>23} {'outliers':>8}"
+    )
+    print(header)
+    print("-" * len(header))
+
+    for name, stats in summary.items():
+        if stats["n"] == 0:
+            continue
+        if stats["ci_low"] is not None:
+            ci = f"[{stats['ci_low']:.2f}, {stats['ci_high']:.2f}]"
+        else:
+            ci = "-"
+        print(
+            f"{name:<14} {stats['n']:>4} {stats['median']:>10.2f} {stats['p90']:>10.2f} "
+            f"{stats['p99']:>10.2f} {stats['stdev']:>9.2f} {ci:>23} "
+            f"{len(stats['outliers']):>8}  {units.get(name, '')}"
+        )
+
+
+def write_json_results(
+    results: list, output_path: str, summary: dict = None, sweep: list = None
+):
+    """
+    將結果寫入 JSON 檔案（可附帶統計彙總）
+
+    sweep 模式另寫入每個組合的參數、執行次數與統計彙總（run_sweep 的結果）
+    """
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    payload = {"schema_version": RESULT_SCHEMA_VERSION, "results": results}
+    if summary is not None:
+        payload["summary"] = summary
+    if sweep is not None:
+        payload["sweep"] = [
+            {
+                "params": run["results"][0]["params"],
+                "num_runs": len(run["results"]),
+                "summary": run["summary"],
+            }
+            for run in sweep
+        ]
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(
+            payload,
+            f,
+            indent=2,
+            ensure_ascii=False,
+        )
+
+
+def write_csv_results(results: list, output_path: str):
+    """將結果寫入 CSV 檔案（每個結果一列）"""
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
+        writer.writeheader()
+        for result in results:
+            writer.writerow(flatten_result(result))
+
+
+def print_metrics(result: dict):
+    """列印解析後的指標摘要"""
+    metrics = result.get("metrics", {})
+    if not any(metric["mean"] is not None for metric in metrics.values()):
+        print_status("無法從輸出中解析指標", "WARNING")
+        return
+
+    print_status("解析後的指標：", "PROGRESS")
+    for name, label, unit in METRIC_FIELDS:
+        metric = metrics.get(name, {})
+        if metric.get("mean") is None:
+            continue
+        value = f"{metric['mean']:.2f}"
+        if metric.get("std") is not None:
+            value += f" ± {metric['std']:.2f}"
+        print(f"  {label:<20} {value} {unit}")
+
+
 def run_benchmark(
     benchmark_exe: str,
     model_path: str,
@@ -100,13 +377,43 @@ def run_benchmark(
     max_tokens: int = 20,
     num_warmup: int = 0,
     num_iter: int = 1,
+    load_mode: str = None,
+    evict_method: str = "fadvise",
 ) -> dict:
     """
     執行 benchmark
     
+    Args:
+        load_mode: None（不處理 page cache）、cold、warm 或 both；
+            both 會先以冷啟動、再以熱啟動各執行一次
+        evict_method: 冷啟動時的驅逐方式（fadvise / drop_caches）
+    
     Returns:
-        dict: benchmark 結果
+        dict: benchmark 結果（格式見 build_result）
     """
+    if load_mode == "both":
+        kwargs = dict(
+            benchmark_exe=benchmark_exe, model_path=model_path, device=device,
+            prompt=prompt, max_tokens=max_tokens, num_warmup=num_warmup,
+            num_iter=num_iter, evict_method=evict_method,
+        )
+        cold = run_benchmark(load_mode="cold", **kwargs)
+        warm = run_benchmark(load_mode="warm", **kwargs)
+        warm["params"]["load_mode"] = "both"
+        warm["success"] = cold["success"] and warm["success"]
+        warm["metrics"]["cold_load_time"] = dict(cold["metrics"]["cold_load_time"])
+        warm["error"] = warm["error"] or cold["error"]
+        return warm
+    
+    params = {
+        "model": model_path,
+        "device": device,
+        "prompt": prompt,
+        "max_tokens": max_tokens,
+        "num_warmup": num_warmup,
+        "num_iter": num_iter,
+        "load_mode": load_mode,
+    }
     
     print_header("OpenVINO GenAI Benchmark")
     
@@ -118,8 +425,13 @@ def run_benchmark(
     print_status(f"最大令牌數：{colorize(str(max_tokens), 'BOLD')}")
     print_status(f"預熱次數：{colorize(str(num_warmup), 'BOLD')}")
     print_status(f"迭代次數：{colorize(str(num_iter), 'BOLD')}")
+    if load_mode:
+        print_status(f"載入模式：{colorize(load_mode, 'BOLD')}")
     print()
     
+    if not prepare_page_cache(model_path, load_mode, evict_method):
+        return build_result(params, False, error="page cache eviction unavailable")
+    
     # 構建命令
     cmd = [
         benchmark_exe,
@@ -155,15 +467,492 @@ def run_benchmark(
         if result.returncode == 0:
             print()
             print_status("Benchmark 完成！", "SUCCESS")
-            return {"success": True, "output": result.stdout}
+            benchmark_result = build_result(params, True, result.stdout)
+            if load_mode in ("cold", "warm"):
+                benchmark_result["metrics"][f"{load_mode}_load_time"].update(
+                    {key: benchmark_result["metrics"]["load_time"][key] for key in ("mean", "std")}
+                )
+            print_metrics(benchmark_result)
+            return benchmark_result
         else:
             print()
             print_status(f"Benchmark 失敗（退出碼：{result.returncode}）", "ERROR")
-            return {"success": False, "output": result.stdout, "error": result.stderr}
+            return build_result(params, False, result.stdout, result.stderr)
     
     except Exception as e:
         print_status(f"執行錯誤：{e}", "ERROR")
-        return {"success": False, "error": str(e)}
+        return build_result(params, False, error=str(e))
+
+
+# 合成指定長度提示詞時使用的基礎句子
+SWEEP_PROMPT_BASE = (
+    "The sky is blue because molecules in the atmosphere scatter shorter "
+    "wavelengths of sunlight more strongly than longer wavelengths. "
+)
+
+
+def build_prompt(num_words: int) -> str:
+    """以基礎句子重複組成約 num_words 個單字的提示詞"""
+    base_words = SWEEP_PROMPT_BASE.split()
+    words = [base_words[i % len(base_words)] for i in range(max(1, num_words))]
+    return " ".join(words)
+
+
+def load_sweep_matrix(matrix_path: str) -> dict:
+    """讀取 sweep 矩陣設定（YAML 或 JSON）"""
+    with open(matrix_path, "r", encoding="utf-8") as f:
+        if matrix_path.lower().endswith((".yaml", ".yml")):
+            import yaml
+            matrix = yaml.safe_load(f)
+        else:
+            matrix = json.load(f)
+
+    if not isinstance(matrix, dict):
+        raise ValueError(f"sweep 設定格式錯誤（需為 mapping）：{matrix_path}")
+    return matrix
+
+
+def _as_list(value) -> list:
+    return value if isinstance(value, list) else [value]
+
+
+def expand_sweep_cells(matrix: dict, defaults: dict) -> list:
+    """
+    將 sweep 矩陣展開為所有測試組合
+
+    未在矩陣中指定的維度使用命令列參數（defaults）作為單一值。
+    prompt_lengths 會合成對應長度的提示詞，與 prompts 一起展開。
+
+    Returns:
+        list: 每個元素為一組 run_benchmark 參數
+    """
+    models = _as_list(matrix.get("models", defaults["model"]))
+    devices = _as_list(matrix.get("devices", defaults["device"]))
+    max_tokens_list = _as_list(matrix.get("max_tokens", defaults["max_tokens"]))
+
+    prompts = list(_as_list(matrix["prompts"])) if "prompts" in matrix else []
+    prompts += [build_prompt(int(length)) for length in _as_list(matrix.get("prompt_lengths", []))]
+    if not prompts:
+        prompts = [defaults["prompt"]]
+
+    num_warmup = int(matrix.get("num_warmup", defaults["num_warmup"]))
+    num_iter = int(matrix.get("num_iter", defaults["num_iter"]))
+
+    cells = []
+    for model, device, max_tokens, prompt in itertools.product(
+        models, devices, max_tokens_list, prompts
+    ):
+        cells.append({
+            "model_path": model,
+            "device": str(device).upper(),
+            "prompt": prompt,
+            "max_tokens": int(max_tokens),
+            "num_warmup": num_warmup,
+            "num_iter": num_iter,
+        })
+    return cells
+
+
+def run_sweep(
+    runner,
+    cells: list,
+    repeat: int = 1,
+    trim_outliers: bool = False,
+    confidence: float = 0.95,
+) -> list:
+    """
+    依序執行所有 sweep 組合，單一組合失敗時繼續執行下一組
+
+    每個組合與單一設定相同：執行 repeat 次，有多個樣本時計算統計彙總。
+
+    Args:
+        runner: 執行單一組合的函數（run_benchmark 或 run_python_benchmark）
+        cells: expand_sweep_cells 的結果
+        repeat: 每個組合的重複執行次數
+        trim_outliers: 彙總前以 IQR 規則剔除離群值
+        confidence: 信賴區間的信賴水準
+
+    Returns:
+        list: 每個組合一個 dict，含 results（各次結果）與 summary（無彙總時為 None）
+    """
+    runs = []
+    for index, cell in enumerate(cells, 1):
+        print_status(f"Sweep 進度：{index}/{len(cells)}", "PROGRESS")
+
+        if not check_model_path(cell["model_path"]):
+            params = dict(cell, model=cell["model_path"])
+            runs.append({
+                "results": [build_result(params, False, error="模型路徑不存在或不完整")],
+                "summary": None,
+            })
+            continue
+
+        cell = dict(cell, model_path=os.path.abspath(cell["model_path"]))
+        results = run_repeated(runner, repeat, **cell)
+        runs.append({
+            "results": results,
+            "summary": summarize_runs(results, trim_outliers, confidence),
+        })
+
+    return runs
+
+
+def print_sweep_table(runs: list):
+    """列印 sweep 彙總表（有統計彙總時為中位數，否則為平均值）"""
+    print_header("Sweep 結果彙總")
+
+    header = (
+        f"{'Model':<28} {'Dev':<4} {'MaxTok':>6} {'Words':>6} {'n':>3} "
+        f"{'TTFT(ms)':>10} {'TPOT(ms)':>10} {'Tok/s':>8}  Status"
+    )
+    print(header)
+    print("-" * len(header))
+
+    def fmt(run, name):
+        stats = (run["summary"] or {}).get(name)
+        if stats and stats.get("median") is not None:
+            return f"{stats['median']:.2f}"
+        values = [
+            result["metrics"][name]["mean"]
+            for result in run["results"]
+            if result["success"] and (result["metrics"].get(name) or {}).get("mean") is not None
+        ]
+        return f"{sum(values) / len(values):.2f}" if values else "-"
+
+    failed = 0
+    for run in runs:
+        params = run["results"][0]["params"]
+        succeeded = [result for result in run["results"] if result["success"]]
+        if not succeeded:
+            failed += 1
+        model_name = os.path.basename(str(params["model"]).rstrip("/\\"))[:28]
+        words = len(str(params["prompt"] or "").split())
+        status = colorize("OK", "GREEN") if succeeded else colorize("FAIL", "RED")
+        print(
+            f"{model_name:<28} {params['device']:<4} {params['max_tokens']:>6} {words:>6} "
+            f"{len(run['results']):>3} {fmt(run, 'ttft'):>10} {fmt(run, 'tpot'):>10} "
+            f"{fmt(run, 'throughput'):>8}  {status}"
+        )
+
+    print()
+    print_status(
+        f"共 {len(runs)} 組，成功 {len(runs) - failed} 組，失敗 {failed} 組",
+        "SUCCESS" if failed == 0 else "WARNING",
+    )
+
+
+def prepare_page_cache(model_path: str, load_mode: str, evict_method: str = "fadvise") -> bool:
+    """
+    依載入模式準備 page cache：cold 將模型檔案移出、warm 預先讀入
+
+    Returns:
+        bool: 冷啟動但無法驅逐時回傳 False
+    """
+    if load_mode == "cold":
+        if not evict_model_files(model_path, evict_method):
+            print_status("無法將模型移出 page cache（僅支援 Linux，drop_caches 需 root 權限）", "ERROR")
+            return False
+        print_status("已將模型檔案移出 page cache（冷啟動）", "INFO")
+    elif load_mode == "warm":
+        size = prefault_model_files(model_path)
+        print_status(f"已預讀模型檔案 {size / 1024 ** 2:.1f} MB（熱啟動）", "INFO")
+    return True
+
+
+def print_io_trace(report: dict):
+    """列印模型載入 I/O 追蹤摘要"""
+    if not report.get("available"):
+        print_status("I/O 追蹤僅支援 Linux（需要 /proc/self/io）", "WARNING")
+        return
+
+    print_status(f"模型載入 I/O（追蹤載入 {report['elapsed_ms']:.0f} ms，不計入 load_time）：", "PROGRESS")
+    header = (
+        f"  {'File':<28} {'Size(MB)':>9} {'Read(MB)':>9} {'Cached(MB)':>10} "
+        f"{'TTFB(ms)':>9} {'Advance(KB)':>11} {'Seq':>6}"
+    )
+    print(header)
+    for entry in report["files"]:
+        if not entry["bytes_read"] and entry["opened_ms"] is None:
+            continue
+        ttfb = f"{entry['first_byte_ms']:.1f}" if entry["first_byte_ms"] is not None else "-"
+        advance = f"{entry['avg_fd_advance'] / 1024:.0f}" if entry["avg_fd_advance"] else "-"
+        seq = f"{entry['sequential_ratio']:.2f}" if entry["sequential_ratio"] is not None else "-"
+        print(
+            f"  {entry['file'][:28]:<28} {entry['size'] / 1024 ** 2:>9.1f} "
+            f"{entry['bytes_read'] / 1024 ** 2:>9.1f} {entry['initially_resident'] / 1024 ** 2:>10.1f} "
+            f"{ttfb:>9} {advance:>11} {seq:>6}"
+        )
+
+    process = report.get("process", {})
+    if process.get("read_calls"):
+        print(
+            f"  程序讀取：{process['rchar'] / 1024 ** 2:.1f} MB / {process['read_calls']} 次 read，"
+            f"平均 {process['avg_read_size'] / 1024:.0f} KB，"
+            f"實際磁碟讀取 {process['read_bytes'] / 1024 ** 2:.1f} MB"
+        )
+
+
+def _stat(mean_std) -> dict:
+    """將 openvino_genai 的 MeanStdPair 轉為 {"mean", "std"}"""
+    return {"mean": float(mean_std.mean), "std": float(mean_std.std)}
+
+
+def run_python_benchmark(
+    model_path: str,
+    device: str = "CPU",
+    prompt: str = "The Sky is blue because",
+    max_tokens: int = 20,
+    num_warmup: int = 0,
+    num_iter: int = 1,
+    load_mode: str = None,
+    evict_method: str = "fadvise",
+    trace_io: str = None,
+) -> dict:
+    """
+    以 openvino_genai.LLMPipeline 在程序內執行 benchmark（不需編譯 benchmark_genai）
+
+    預熱迭代不計入統計；每次迭代的 TTFT / TPOT / 吞吐量另存於 samples。
+    load_mode 為 both 時先量測冷啟動載入，釋放後再量測熱啟動載入，
+    之後的生成使用熱啟動的 pipeline。
+    指定 trace_io 時先以一次額外、不計時的載入追蹤 I/O（page cache 依第一個
+    載入模式準備），完整時間軸寫入該 JSON 檔；取樣執行緒的開銷不計入 load_time。
+    追蹤載入會改變 page cache，因此 trace_io 必須搭配 load_mode，
+    計時載入前會再依 load_mode 重新準備 page cache。
+
+    Returns:
+        dict: benchmark 結果（格式見 build_result）
+    """
+    params = {
+        "model": model_path,
+        "device": device,
+        "prompt": prompt,
+        "max_tokens": max_tokens,
+        "num_warmup": num_warmup,
+        "num_iter": num_iter,
+        "load_mode": load_mode,
+    }
+
+    print_header("OpenVINO GenAI Benchmark（Python 引擎）")
+    print_status(f"模型路徑：{colorize(model_path, 'BOLD')}")
+    print_status(f"設備：{colorize(device, 'BOLD')}")
+    print_status(f"提示詞：{colorize(prompt, 'BOLD')}")
+    print_status(f"最大令牌數：{colorize(str(max_tokens), 'BOLD')}")
+    print_status(f"預熱次數：{colorize(str(num_warmup), 'BOLD')}")
+    print_status(f"迭代次數：{colorize(str(num_iter), 'BOLD')}")
+    if load_mode:
+        print_status(f"載入模式：{colorize(load_mode, 'BOLD')}")
+    print()
+
+    try:
+        import openvino_genai as ov_genai
+    except ImportError:
+        print_status("未安裝 openvino_genai，請執行：pip install openvino-genai", "ERROR")
+        return build_result(params, False, error="openvino_genai not installed", engine="python")
+
+    if trace_io and not load_mode:
+        return build_result(
+            params, False, error="trace_io requires load_mode", engine="python"
+        )
+
+    try:
+        load_modes = ["cold", "warm"] if load_mode == "both" else [load_mode]
+        load_times = {}
+        io_report = None
+        if trace_io:
+            if not prepare_page_cache(model_path, load_modes[0], evict_method):
+                return build_result(
+                    params, False, error="page cache eviction unavailable", engine="python"
+                )
+            print_status("追蹤模型載入 I/O（不計入載入時間）...", "PROGRESS")
+            with IOTracer(model_path) as tracer:
+                traced_pipe = ov_genai.LLMPipeline(model_path, device)
+            io_report = tracer.report()
+            del traced_pipe
+
+        for mode in load_modes:
+            if not prepare_page_cache(model_path, mode, evict_method):
+                return build_result(
+                    params, False, error="page cache eviction unavailable", engine="python"
+                )
+            print_status("載入模型...", "PROGRESS")
+            start_load = time.perf_counter()
+            pipe = ov_genai.LLMPipeline(model_path, device)
+            load_times[mode] = (time.perf_counter() - start_load) * 1000
+            if mode != load_modes[-1]:
+                del pipe
+
+        config = ov_genai.GenerationConfig()
+        config.max_new_tokens = max_tokens
+
+        for i in range(num_warmup):
+            print_status(f"預熱 {i + 1}/{num_warmup}...", "PROGRESS")
+            pipe.generate([prompt], config)
+
+        perf_metrics = None
+        samples = {"ttft": [], "tpot": [], "throughput": [], "generate_time": []}
+        for i in range(max(1, num_iter)):
+            print_status(f"迭代 {i + 1}/{max(1, num_iter)}...", "PROGRESS")
+            iteration = pipe.generate([prompt], config).perf_metrics
+            samples["ttft"].append(float(iteration.get_ttft().mean))
+            samples["tpot"].append(float(iteration.get_tpot().mean))
+            samples["throughput"].append(float(iteration.get_throughput().mean))
+            samples["generate_time"].append(float(iteration.get_generate_duration().mean))
+            perf_metrics = iteration if perf_metrics is None else perf_metrics + iteration
+
+    except Exception as e:
+        print_status(f"執行錯誤：{e}", "ERROR")
+        return build_result(params, False, error=str(e), engine="python")
+
+    metrics = {
+        "load_time": {"mean": load_times[load_modes[-1]], "std": None},
+        "cold_load_time": {"mean": load_times.get("cold"), "std": None},
+        "warm_load_time": {"mean": load_times.get("warm"), "std": None},
+        "generate_time": _stat(perf_metrics.get_generate_duration()),
+        "tokenization_time": _stat(perf_metrics.get_tokenization_duration()),
+        "detokenization_time": _stat(perf_metrics.get_detokenization_duration()),
+        "ttft": _stat(perf_metrics.get_ttft()),
+        "tpot": _stat(perf_metrics.get_tpot()),
+        "throughput": _stat(perf_metrics.get_throughput()),
+    }
+    for name, _, unit in METRIC_FIELDS:
+        metrics[name]["unit"] = unit
+
+    parsed = {
+        "metrics": metrics,
+        "input_tokens": int(iteration.get_num_input_tokens()),
+        "output_tokens": int(iteration.get_num_generated_tokens()),
+    }
+
+    print()
+    print_status("Benchmark 完成！", "SUCCESS")
+    result = build_result(params, True, engine="python", parsed=parsed, samples=samples)
+    print_metrics(result)
+
+    if io_report is not None:
+        print_io_trace(io_report)
+        if io_report["available"]:
+            result["io_trace"] = {
+                # 追蹤載入（含取樣開銷）的耗時，與 load_time 分開記錄
+                "elapsed_ms": io_report["elapsed_ms"],
+                "process": {k: v for k, v in io_report["process"].items() if k != "timeline"},
+                "files": [
+                    {k: v for k, v in entry.items() if k != "timeline"}
+                    for entry in io_report["files"]
+                ],
+            }
+        Path(trace_io).parent.mkdir(parents=True, exist_ok=True)
+        with open(trace_io, "w", encoding="utf-8") as f:
+            json.dump(io_report, f, indent=2, ensure_ascii=False)
+        print_status(f"I/O 時間軸已保存到：{trace_io}", "SUCCESS")
+    return result
+
+
+def run_in_subprocess(func, **kwargs):
+    """
+    在新啟動的 Python 程序中執行 func 並取回結果
+
+    每次重新 import openvino_genai 並重新載入模型，讓 --repeat 的每個樣本
+    互相獨立（page cache 仍由作業系統共用，需搭配 --load-mode 控制）。
+    """
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(func, **kwargs).result()
+
+
+def record_history(args, results: list, summary: dict = None):
+    """將一組設定的執行結果寫入歷史記錄"""
+    if args.no_history:
+        return
+    try:
+        append_record(make_record(results, summary, args.tag), args.history)
+    except OSError as e:
+        print_status(f"無法寫入歷史記錄：{e}", "WARNING")
+
+
+def compare_command(argv: list):
+    """compare 子命令：比較基準與候選結果，回歸時以退出碼 1 結束"""
+    parser = argparse.ArgumentParser(
+        prog="run_benchmark.py compare",
+        description="比較歷史記錄中的基準與候選 benchmark 結果",
+    )
+    parser.add_argument("--baseline", required=True, help="基準記錄的 tag")
+    parser.add_argument(
+        "--candidate",
+        default=None,
+        help="候選記錄的 tag（預設：每組設定最新的非基準記錄）"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=5.0,
+        help="變差超過此百分比即視為回歸（預設：5）"
+    )
+    parser.add_argument(
+        "--history",
+        default=DEFAULT_HISTORY_PATH,
+        help=f"歷史記錄檔（預設：{DEFAULT_HISTORY_PATH}）"
+    )
+    parser.add_argument(
+        "--any-host",
+        action="store_true",
+        help="允許跨主機比較（預設只比較相同主機指紋的記錄）"
+    )
+    args = parser.parse_args(argv)
+
+    records = load_records(args.history)
+    if not records:
+        print_status(f"歷史記錄不存在或為空：{args.history}", "ERROR")
+        sys.exit(1)
+
+    comparisons = compare_records(
+        records,
+        baseline_tag=args.baseline,
+        candidate_tag=args.candidate,
+        threshold_pct=args.threshold,
+        match_host=not args.any_host,
+    )
+
+    print_header(f"Benchmark 比較：{args.baseline} → {args.candidate or 'latest'}")
+    if not comparisons:
+        print_status("找不到可比較的記錄（請確認 tag 與設定是否相符）", "WARNING")
+        sys.exit(1)
+
+    runtimes = set()
+    for item in comparisons:
+        base_rt, cand_rt = item["baseline_runtime"], item["candidate_runtime"]
+        runtimes.add((
+            base_rt.get("openvino_genai"), cand_rt.get("openvino_genai"),
+            base_rt.get("python"), cand_rt.get("python"),
+        ))
+    for base_genai, cand_genai, base_py, cand_py in sorted(runtimes, key=str):
+        changed = " (runtime 版本不同)" if (base_genai, base_py) != (cand_genai, cand_py) else ""
+        print_status(
+            f"openvino-genai {base_genai or '?'} → {cand_genai or '?'}，"
+            f"Python {base_py or '?'} → {cand_py or '?'}{changed}"
+        )
+    print()
+
+    header = (
+        f"{'Model':<28} {'Dev':<4} {'MaxTok':>6} {'Metric':<14} "
+        f"{'Baseline':>10} {'Candidate':>10} {'Change':>8}"
+    )
+    print(header)
+    print("-" * len(header))
+    for item in comparisons:
+        change = f"{item['change_pct']:+.1f}%"
+        if item["regression"]:
+            change = colorize(f"{change:>8}", "RED")
+        print(
+            f"{item['model'][:28]:<28} {item['device']:<4} {item['max_tokens']:>6} "
+            f"{item['metric']:<14} {item['baseline']:>10.2f} {item['candidate']:>10.2f} {change:>8}"
+        )
+
+    regressions = [item for item in comparisons if item["regression"]]
+    print()
+    if regressions:
+        print_status(f"偵測到 {len(regressions)} 項回歸（閾值 {args.threshold}%）", "ERROR")
+        sys.exit(1)
+    print_status(f"未偵測到回歸（閾值 {args.threshold}%）", "SUCCESS")
 
 
 def auto_setup_benchmark():
@@ -229,6 +1018,10 @@ def auto_setup_benchmark():
 
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "compare":
+        compare_command(sys.argv[2:])
+        return
+    
     parser = argparse.ArgumentParser(
         description="OpenVINO GenAI Benchmark 包裝腳本",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -252,14 +1045,51 @@ def main():
      python scripts/run_benchmark.py \\
        --model "./models/open_llama_7b_v2-int4-ov" \\
        --auto-setup
+
+  4. 輸出結構化結果（JSON / CSV）
+     python scripts/run_benchmark.py \\
+       --model "./models/open_llama_7b_v2-int4-ov" \\
+       --json-out results/benchmark.json \\
+       --csv-out results/benchmark.csv
+
+  5. 參數掃描（devices × max_tokens × prompts × models）
+     python scripts/run_benchmark.py \\
+       --sweep config/benchmark_sweep.yaml \\
+       --csv-out results/sweep.csv
+
+  6. 程序內 Python 引擎（不需 benchmark_genai.exe，可在 Linux 執行）
+     python scripts/run_benchmark.py \\
+       --model "./models/open_llama_7b_v2-int4-ov" \\
+       --engine python -nw 1 -n 5
+
+  7. 重複啟動並彙總統計（中位數 / p90 / p99 / 信賴區間）
+     python scripts/run_benchmark.py \\
+       --model "./models/open_llama_7b_v2-int4-ov" \\
+       -n 5 --repeat 5 --trim-outliers
+
+  8. 標記基準並比較回歸（結果預設寫入 results/benchmark_history.jsonl）
+     python scripts/run_benchmark.py -m ./models/open_llama_7b_v2-int4-ov --tag driver-old
+     python scripts/run_benchmark.py -m ./models/open_llama_7b_v2-int4-ov --tag driver-new
+     python scripts/run_benchmark.py compare \\
+       --baseline driver-old --candidate driver-new --threshold 3
+
+  9. 冷啟動 / 熱啟動載入時間（Linux，冷啟動前將模型移出 page cache）
+     python scripts/run_benchmark.py \\
+       --model "./models/open_llama_7b_v2-int4-ov" \\
+       --engine python --load-mode both
+
+  10. 追蹤模型載入的檔案讀取模式（Linux，Python 引擎）
+     python scripts/run_benchmark.py \\
+       --model "./models/open_llama_7b_v2-int4-ov" \\
+       --engine python --load-mode cold --trace-io results/load_io.json
         """
     )
     
     parser.add_argument(
         "--model", "-m",
         type=str,
-        required=True,
-        help="模型路徑（例如：./models/open_llama_7b_v2-int4-ov）"
+        default=None,
+        help="模型路徑（例如：./models/open_llama_7b_v2-int4-ov）；使用 --sweep 時可省略"
     )
     
     parser.add_argument(
@@ -298,6 +1128,38 @@ def main():
         help="迭代次數（預設：1）"
     )
     
+    parser.add_argument(
+        "--engine",
+        type=str,
+        default="exe",
+        choices=["exe", "python"],
+        help="benchmark 引擎：exe 使用 benchmark_genai.exe，python 直接使用 openvino_genai（預設：exe）"
+    )
+    
+    parser.add_argument(
+        "--load-mode",
+        type=str,
+        default=None,
+        choices=["cold", "warm", "both"],
+        help="模型載入模式：cold 先將模型移出 page cache，warm 先預讀，both 兩者皆量測"
+    )
+    
+    parser.add_argument(
+        "--evict-method",
+        type=str,
+        default="fadvise",
+        choices=["fadvise", "drop_caches"],
+        help="冷啟動的驅逐方式：fadvise 只驅逐模型檔案，drop_caches 清空系統 page cache（需 root）"
+    )
+    
+    parser.add_argument(
+        "--trace-io",
+        type=str,
+        default=None,
+        help="追蹤模型載入時的檔案 I/O 並將時間軸寫入此 JSON 檔"
+             "（僅 --engine python，Linux；需搭配 --load-mode）"
+    )
+    
     parser.add_argument(
         "--auto-setup",
         action="store_true",
@@ -311,24 +1173,150 @@ def main():
         help="benchmark_genai.exe 的路徑（自動偵測）"
     )
     
+    parser.add_argument(
+        "--json-out",
+        type=str,
+        default=None,
+        help="將解析後的結果寫入 JSON 檔案"
+    )
+    
+    parser.add_argument(
+        "--csv-out",
+        type=str,
+        default=None,
+        help="將解析後的結果寫入 CSV 檔案"
+    )
+    
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=1,
+        help="重複執行 benchmark 的次數（每次為獨立的程序啟動 / 模型載入，"
+             "python 引擎會為每次重複啟動新的子程序；page cache 狀態由 --load-mode 控制；"
+             "搭配 --sweep 時每個組合各執行此次數，預設：1）"
+    )
+    
+    parser.add_argument(
+        "--trim-outliers",
+        action="store_true",
+        help="統計彙總前以 IQR 規則剔除離群值"
+    )
+    
+    parser.add_argument(
+        "--confidence",
+        type=float,
+        default=0.95,
+        help="bootstrap 信賴區間的信賴水準（預設：0.95）"
+    )
+    
+    parser.add_argument(
+        "--history",
+        type=str,
+        default=DEFAULT_HISTORY_PATH,
+        help=f"歷史記錄檔（預設：{DEFAULT_HISTORY_PATH}）"
+    )
+    
+    parser.add_argument(
+        "--no-history",
+        action="store_true",
+        help="不寫入歷史記錄"
+    )
+    
+    parser.add_argument(
+        "--tag",
+        type=str,
+        default=None,
+        help="歷史記錄的標籤（例如基準名稱），供 compare 子命令使用"
+    )
+    
+    parser.add_argument(
+        "--sweep",
+        type=str,
+        default=None,
+        help="sweep 矩陣設定檔（YAML/JSON），執行所有 devices × max_tokens × prompts × models 組合"
+    )
+    
     args = parser.parse_args()
     
-    # 自動設置
-    if args.auto_setup:
-        if not auto_setup_benchmark():
-            sys.exit(1)
+    if not args.model and not args.sweep:
+        parser.error("必須指定 --model 或 --sweep")
     
-    # 查找 benchmark 可執行文件
-    benchmark_exe = args.benchmark_exe or find_benchmark_exe()
+    load_options = {"load_mode": args.load_mode, "evict_method": args.evict_method}
     
-    if not benchmark_exe:
-        print_status("未找到 benchmark_genai.exe", "ERROR")
-        print()
-        print_status("請執行以下操作之一：", "INFO")
-        print("  1. 使用 --auto-setup 自動設置")
-        print("  2. 手動編譯並使用 --benchmark-exe 指定路徑")
-        print("  3. 查看 docs/setup/STAGE_9_GUIDE.md 獲取詳細說明")
-        sys.exit(1)
+    if args.trace_io and args.engine != "python":
+        parser.error("--trace-io 需要搭配 --engine python")
+    if args.trace_io and not args.load_mode:
+        # 追蹤載入會把模型讀入 page cache，未控制 page cache 時計時載入會變成熱啟動
+        parser.error("--trace-io 需要搭配 --load-mode（cold、warm 或 both）")
+    
+    if args.engine == "python":
+        def runner(**kwargs):
+            kwargs.update(load_options, trace_io=args.trace_io)
+            if args.repeat > 1:
+                # 每次重複在新程序中載入模型，避免沿用同一程序內已暖機的狀態
+                return run_in_subprocess(run_python_benchmark, **kwargs)
+            return run_python_benchmark(**kwargs)
+    else:
+        # 自動設置
+        if args.auto_setup:
+            if not auto_setup_benchmark():
+                sys.exit(1)
+        
+        # 查找 benchmark 可執行文件
+        benchmark_exe = args.benchmark_exe or find_benchmark_exe()
+        
+        if not benchmark_exe:
+            print_status("未找到 benchmark_genai.exe", "ERROR")
+            print()
+            print_status("請執行以下操作之一：", "INFO")
+            print("  1. 使用 --auto-setup 自動設置")
+            print("  2. 手動編譯並使用 --benchmark-exe 指定路徑")
+            print("  3. 使用 --engine python 改用程序內引擎（不需編譯）")
+            print("  4. 查看 docs/setup/STAGE_9_GUIDE.md 獲取詳細說明")
+            sys.exit(1)
+        
+        def runner(**kwargs):
+            return run_benchmark(benchmark_exe=benchmark_exe, **load_options, **kwargs)
+    
+    # 參數掃描模式
+    if args.sweep:
+        defaults = {
+            "model": args.model,
+            "device": args.device,
+            "prompt": args.prompt,
+            "max_tokens": args.max_tokens,
+            "num_warmup": args.num_warmup,
+            "num_iter": args.num_iter,
+        }
+        cells = expand_sweep_cells(load_sweep_matrix(args.sweep), defaults)
+        if any(cell["model_path"] is None for cell in cells):
+            parser.error("sweep 設定未指定 models，請在設定檔或 --model 中提供")
+        
+        runs = run_sweep(runner, cells, args.repeat, args.trim_outliers, args.confidence)
+        print_sweep_table(runs)
+        for run in runs:
+            if run["summary"] is not None:
+                params = run["results"][0]["params"]
+                print_status(
+                    f"組合：{os.path.basename(str(params['model']).rstrip('/'))}，{params['device']}，"
+                    f"max_tokens {params['max_tokens']}，提示詞 {len(str(params['prompt'] or '').split())} 字",
+                    "INFO",
+                )
+                print_summary(run["summary"], args.confidence)
+            record_history(args, run["results"], run["summary"])
+
+        results = [result for run in runs for result in run["results"]]
+        if args.json_out:
+            write_json_results(results, args.json_out, sweep=runs)
+            print_status(f"JSON 結果已保存到：{args.json_out}", "SUCCESS")
+
+        if args.csv_out:
+            write_csv_results(results, args.csv_out)
+            print_status(f"CSV 結果已保存到：{args.csv_out}", "SUCCESS")
+
+        if not any(result["success"] for result in results):
+            sys.exit(1)
+        return
     
     # 檢查模型
     if not check_model_path(args.model):
@@ -340,8 +1328,9 @@ def main():
         sys.exit(1)
     
     # 執行 benchmark
-    result = run_benchmark(
-        benchmark_exe=benchmark_exe,
+    results = run_repeated(
+        runner,
+        args.repeat,
         model_path=os.path.abspath(args.model),
         device=args.device,
         prompt=args.prompt,
@@ -350,7 +1339,22 @@ def main():
         num_iter=args.num_iter,
     )
     
-    if not result["success"]:
+    # 有多個樣本時彙總統計
+    summary = summarize_runs(results, args.trim_outliers, args.confidence)
+    if summary is not None:
+        print_summary(summary, args.confidence)
+    
+    record_history(args, results, summary)
+    
+    if args.json_out:
+        write_json_results(results, args.json_out, summary)
+        print_status(f"JSON 結果已保存到：{args.json_out}", "SUCCESS")
+    
+    if args.csv_out:
+        write_csv_results(results, args.csv_out)
+        print_status(f"CSV 結果已保存到：{args.csv_out}", "SUCCESS")
+    
+    if not any(result["success"] for result in results):
         sys.exit(1)
 
 
@@ -0,0 +1,16 @@
+"""
+測試共用設定
+
+examples/、examples/agent/ 與 scripts/ 的模組以同目錄匯入彼此
+（例如 `from pipeline_factory import ...`），測試以相同方式匯入。
+"""
+
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+for directory in ("examples", "examples/agent", "scripts"):
+    path = str(PROJECT_ROOT / directory)
+    if path not in sys.path:
+        sys.path.insert(0, path)
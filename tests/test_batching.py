@@ -0,0 +1,59 @@
+"""llama_batch_inference 批次分組與 CPU 清單解析測試"""
+
+import pytest
+
+from llama_batch_inference import apportion_tokens, format_cpu_list, make_batches, parse_cpu_list
+
+
+def test_make_batches_buckets_by_length():
+    lengths = [50, 10, 40, 20, 30]
+    assert make_batches(lengths, 2) == [[1, 3], [4, 2], [0]]
+
+
+def test_make_batches_keeps_order_without_bucketing():
+    assert make_batches([50, 10, 40, 20, 30], 2, bucket=False) == [[0, 1], [2, 3], [4]]
+
+
+def test_make_batches_covers_every_index_once():
+    lengths = [3, 1, 2, 3, 1, 2, 3]
+    batches = make_batches(lengths, 3)
+    assert sorted(i for batch in batches for i in batch) == list(range(len(lengths)))
+    assert all(len(batch) <= 3 for batch in batches)
+
+
+def test_make_batches_empty():
+    assert make_batches([], 4) == []
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("0-3", [0, 1, 2, 3]),
+    ("0-3,8-11\n", [0, 1, 2, 3, 8, 9, 10, 11]),
+    ("5", [5]),
+    ("0,2,4-5", [0, 2, 4, 5]),
+    ("", []),
+])
+def test_parse_cpu_list(text, expected):
+    assert parse_cpu_list(text) == expected
+
+
+def test_format_cpu_list_round_trip():
+    assert format_cpu_list([8, 0, 1, 2, 3]) == "0-3,8"
+    assert parse_cpu_list(format_cpu_list([0, 2, 3, 4, 9])) == [0, 2, 3, 4, 9]
+
+
+@pytest.mark.parametrize("estimates, total", [
+    ([3, 5, 2], 20),
+    ([1, 1, 1], 10),
+    ([None, 4], 4),
+    ([0, 0], 5),
+    ([7], 9),
+])
+def test_apportion_tokens_matches_batch_total(estimates, total):
+    counts = apportion_tokens(estimates, total)
+    assert len(counts) == len(estimates)
+    assert sum(counts) == total
+    assert all(count >= 0 for count in counts)
+
+
+def test_apportion_tokens_is_proportional():
+    assert apportion_tokens([3, 5, 2], 20) == [6, 10, 4]
@@ -0,0 +1,93 @@
+"""benchmark_history 回歸比較測試"""
+
+import pytest
+
+from benchmark_history import compare_records
+
+PARAMS = {"model": "./models/m", "device": "CPU", "max_tokens": 20}
+
+
+def _record(tag, timestamp, ttft, throughput, host_id="host-a", config_id="cfg", success=True):
+    return {
+        "run_id": f"{tag}-{timestamp}",
+        "timestamp": timestamp,
+        "tag": tag,
+        "config_id": config_id,
+        "host_id": host_id,
+        "params": PARAMS,
+        "success": success,
+        "metrics": {"ttft": ttft, "throughput": throughput},
+        "runtime": {"openvino_genai": "2025.0"},
+    }
+
+
+def _by_metric(comparisons):
+    return {item["metric"]: item for item in comparisons}
+
+
+def test_regression_threshold():
+    records = [
+        _record("base", "2026-01-01T00:00:00", ttft=100.0, throughput=50.0),
+        _record("new", "2026-01-02T00:00:00", ttft=106.0, throughput=48.0),
+    ]
+    items = _by_metric(compare_records(records, "base", "new", threshold_pct=5.0))
+
+    # TTFT 越低越好：+6% 超過門檻
+    assert items["ttft"]["change_pct"] == pytest.approx(6.0)
+    assert items["ttft"]["regression"]
+    # 吞吐量越高越好：-4% 未超過門檻
+    assert items["throughput"]["change_pct"] == pytest.approx(-4.0)
+    assert not items["throughput"]["regression"]
+
+    looser = _by_metric(compare_records(records, "base", "new", threshold_pct=10.0))
+    assert not looser["ttft"]["regression"]
+
+
+def test_change_exactly_at_threshold_is_not_a_regression():
+    records = [
+        _record("base", "2026-01-01T00:00:00", ttft=100.0, throughput=50.0),
+        _record("new", "2026-01-02T00:00:00", ttft=105.0, throughput=47.5),
+    ]
+    items = _by_metric(compare_records(records, "base", "new", threshold_pct=5.0))
+    assert not items["ttft"]["regression"]
+    assert not items["throughput"]["regression"]
+
+
+def test_improvement_is_not_a_regression():
+    records = [
+        _record("base", "2026-01-01T00:00:00", ttft=100.0, throughput=50.0),
+        _record("new", "2026-01-02T00:00:00", ttft=50.0, throughput=100.0),
+    ]
+    items = _by_metric(compare_records(records, "base", "new"))
+    assert not any(item["regression"] for item in items.values())
+
+
+def test_latest_candidate_without_tag():
+    records = [
+        _record("base", "2026-01-01T00:00:00", ttft=100.0, throughput=50.0),
+        _record(None, "2026-01-02T00:00:00", ttft=200.0, throughput=50.0),
+        _record(None, "2026-01-03T00:00:00", ttft=101.0, throughput=50.0),
+    ]
+    items = _by_metric(compare_records(records, "base"))
+    assert items["ttft"]["candidate"] == 101.0
+    assert items["ttft"]["candidate_run"] == "None-2026-01-03T00:00:00"
+
+
+def test_failed_and_other_host_records_are_skipped():
+    records = [
+        _record("base", "2026-01-01T00:00:00", ttft=100.0, throughput=50.0),
+        _record("new", "2026-01-02T00:00:00", ttft=100.0, throughput=50.0, host_id="host-b"),
+        _record("new", "2026-01-03T00:00:00", ttft=300.0, throughput=50.0, success=False),
+    ]
+    assert compare_records(records, "base", "new") == []
+
+    across_hosts = _by_metric(compare_records(records, "base", "new", match_host=False))
+    assert across_hosts["ttft"]["candidate"] == 100.0
+
+
+def test_missing_baseline_values_are_skipped():
+    records = [
+        _record("base", "2026-01-01T00:00:00", ttft=None, throughput=0.0),
+        _record("new", "2026-01-02T00:00:00", ttft=100.0, throughput=50.0),
+    ]
+    assert compare_records(records, "base", "new") == []
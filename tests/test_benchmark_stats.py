@@ -0,0 +1,103 @@
+"""benchmark_stats 統計彙總測試"""
+
+import statistics
+
+import pytest
+
+from benchmark_stats import bootstrap_ci, iqr_trim, percentile, summarize
+
+
+def test_percentile_interpolates_like_numpy():
+    values = [1.0, 2.0, 3.0, 4.0]
+    assert percentile(values, 0) == 1.0
+    assert percentile(values, 100) == 4.0
+    assert percentile(values, 50) == pytest.approx(2.5)
+    assert percentile(values, 90) == pytest.approx(3.7)
+
+
+def test_percentile_ignores_input_order():
+    assert percentile([5.0, 1.0, 3.0], 50) == 3.0
+
+
+def test_percentile_edge_cases():
+    assert percentile([], 50) is None
+    assert percentile([7.0], 99) == 7.0
+
+
+@pytest.mark.parametrize("values", [[], [1.0], [1.0, 100.0], [1.0, 2.0, 1000.0]])
+def test_iqr_trim_keeps_small_samples(values):
+    kept, outliers = iqr_trim(values)
+    assert kept == values
+    assert outliers == []
+
+
+def test_iqr_trim_all_equal_values():
+    kept, outliers = iqr_trim([5.0] * 6)
+    assert kept == [5.0] * 6
+    assert outliers == []
+
+
+def test_iqr_trim_removes_outliers_on_both_sides():
+    values = [10.0, 11.0, 10.5, 10.2, 10.8, 50.0, -30.0]
+    kept, outliers = iqr_trim(values)
+    assert sorted(outliers) == [-30.0, 50.0]
+    assert kept == [10.0, 11.0, 10.5, 10.2, 10.8]
+
+
+def test_bootstrap_ci_needs_two_samples():
+    assert bootstrap_ci([]) == (None, None)
+    assert bootstrap_ci([3.0]) == (None, None)
+
+
+def test_bootstrap_ci_bounds_bracket_the_mean():
+    values = [9.0, 10.0, 11.0, 10.5, 9.5, 10.2, 9.8, 10.1]
+    low, high = bootstrap_ci(values)
+    assert min(values) <= low <= statistics.fmean(values) <= high <= max(values)
+
+
+def test_bootstrap_ci_narrows_with_lower_confidence():
+    values = [9.0, 10.0, 11.0, 10.5, 9.5, 10.2, 9.8, 10.1]
+    low_95, high_95 = bootstrap_ci(values, 0.95)
+    low_50, high_50 = bootstrap_ci(values, 0.50)
+    assert low_95 <= low_50 <= high_50 <= high_95
+
+
+def test_bootstrap_ci_is_reproducible_and_degenerate_for_constant_values():
+    values = [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert bootstrap_ci(values) == bootstrap_ci(values)
+    assert bootstrap_ci([4.0, 4.0, 4.0]) == (4.0, 4.0)
+
+
+def test_summarize_reports_all_fields():
+    summary = summarize([1, 2, 3, 4, None])
+    assert summary["n"] == 4
+    assert summary["mean"] == pytest.approx(2.5)
+    assert summary["median"] == pytest.approx(2.5)
+    assert summary["p90"] == pytest.approx(3.7)
+    assert summary["stdev"] == pytest.approx(statistics.stdev([1, 2, 3, 4]))
+    assert (summary["min"], summary["max"]) == (1.0, 4.0)
+    assert summary["ci_low"] <= summary["mean"] <= summary["ci_high"]
+    assert summary["outliers"] == []
+
+
+def test_summarize_single_value():
+    summary = summarize([3.0])
+    assert summary["n"] == 1
+    assert summary["stdev"] == 0.0
+    assert (summary["ci_low"], summary["ci_high"]) == (None, None)
+
+
+def test_summarize_empty():
+    summary = summarize([None])
+    assert summary["n"] == 0
+    assert summary["mean"] is None and summary["ci_low"] is None
+
+
+def test_summarize_trims_outliers_only_when_asked():
+    values = [10.0, 11.0, 10.5, 10.2, 10.8, 50.0]
+    assert summarize(values)["max"] == 50.0
+
+    trimmed = summarize(values, trim_outliers=True)
+    assert trimmed["n"] == 5
+    assert trimmed["max"] == 11.0
+    assert trimmed["outliers"] == [50.0]
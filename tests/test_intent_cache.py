@@ -0,0 +1,161 @@
+"""IntentCache 測試"""
+
+import json
+
+import pytest
+
+import intent_cache
+from intent_cache import MIN_CONFIDENCE, IntentCache
+
+
+def command(text, confidence=0.95):
+    return {'intent': 'execute_command', 'parameters': {'command': text}, 'confidence': confidence}
+
+
+CHAT = {'intent': 'chat', 'parameters': {}, 'confidence': 0.95}
+
+
+class _Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(intent_cache.time, 'time', clock)
+    return clock
+
+
+def test_ttl_expiry(clock):
+    cache = IntentCache(ttl_seconds=60)
+    cache.put('run dir', command('dir'))
+    clock.now += 59
+    assert cache.get('run dir') == command('dir')
+    clock.now += 2
+    assert cache.get('run dir') is None
+    assert cache.stats()['expired'] == 1
+    assert cache.stats()['entries'] == 0
+
+
+def test_no_ttl_never_expires(clock):
+    cache = IntentCache(ttl_seconds=None)
+    cache.put('run dir', command('dir'))
+    clock.now += 10 ** 9
+    assert cache.get('run dir') is not None
+
+
+def test_lru_eviction():
+    cache = IntentCache(max_entries=2)
+    cache.put('run a', command('a'))
+    cache.put('run b', command('b'))
+    # 讀取 a 使 b 成為最久未使用
+    assert cache.get('run a') is not None
+    cache.put('run c', command('c'))
+    assert cache.get('run b') is None
+    assert cache.get('run a') is not None
+    assert cache.get('run c') is not None
+    assert cache.stats()['evictions'] == 1
+
+
+@pytest.mark.parametrize('confidence, cached', [
+    (0.3, False),
+    (0.6, False),  # regex fallback 的信心值
+    (MIN_CONFIDENCE - 0.01, False),
+    (MIN_CONFIDENCE, True),
+    (0.95, True),
+])
+def test_min_confidence_gate(confidence, cached):
+    cache = IntentCache()
+    assert cache.put('run dir', command('dir', confidence)) is cached
+    assert (cache.get('run dir') is not None) is cached
+
+
+@pytest.mark.parametrize('result', [
+    {'intent': 'write_file', 'parameters': {'path': 'a', 'content': 'b'}, 'confidence': 0.95},
+    {'intent': 'run_python', 'parameters': {'code': 'print(1)'}, 'confidence': 0.95},
+    {'intent': 'chat', 'parameters': {}, 'confidence': 'high'},
+])
+def test_uncacheable_results(result):
+    assert IntentCache().put('x', result) is False
+
+
+def test_commands_use_exact_key():
+    cache = IntentCache()
+    cache.put('run DIR', command('DIR'))
+    assert cache.get('  run DIR  ') == command('DIR')
+    assert cache.get('run dir') is None
+    assert cache.get('run  DIR') is None
+
+
+def test_chat_uses_normalized_key():
+    cache = IntentCache()
+    cache.put('Hello  There', CHAT)
+    assert cache.get('hello there') == CHAT
+    assert cache.get('HELLO THERE ') == CHAT
+
+
+def test_get_returns_copy():
+    cache = IntentCache()
+    cache.put('run dir', command('dir'))
+    cache.get('run dir')['parameters']['command'] = 'del *'
+    assert cache.get('run dir') == command('dir')
+
+
+def test_save_load_round_trip(tmp_path):
+    path = tmp_path / 'cache.json'
+    cache = IntentCache(persist_path=str(path))
+    cache.put('run a', command('a'))
+    cache.put('run b', command('b'))
+    cache.put('Hi', CHAT)
+    cache.save()
+
+    loaded = IntentCache(max_entries=2, persist_path=str(path))
+    assert loaded.stats()['loaded'] == 2
+    # 依 LRU 順序保存，超過上限時捨棄最舊的 a
+    assert loaded.get('run a') is None
+    assert loaded.get('run b') == command('b')
+    assert loaded.get('hi') == CHAT
+
+
+def test_load_skips_expired(tmp_path, clock):
+    path = tmp_path / 'cache.json'
+    cache = IntentCache(ttl_seconds=60, persist_path=str(path))
+    cache.put('run a', command('a'))
+    cache.save()
+    clock.now += 120
+    assert IntentCache(ttl_seconds=60, persist_path=str(path)).stats()['loaded'] == 0
+
+
+@pytest.mark.parametrize('payload', [
+    [],
+    {'entries': {}},
+    {'entries': [['exact:run a']]},
+    {'entries': ['exact:run a']},
+    {'entries': [['exact:run a', {'result': command('a')}]]},
+    {'entries': [['exact:run a', {'stored_at': 'yesterday', 'result': command('a')}]]},
+    {'entries': [['exact:run a', {'stored_at': 1000.0, 'result': 'a'}]]},
+    {'entries': [[1, {'stored_at': 1000.0, 'result': command('a')}]]},
+])
+def test_load_skips_malformed_entries(tmp_path, clock, payload):
+    path = tmp_path / 'cache.json'
+    good = ['exact:run b', {'stored_at': clock.now, 'result': command('b')}]
+    if isinstance(payload, dict) and isinstance(payload['entries'], list):
+        payload = {'entries': payload['entries'] + [good]}
+    path.write_text(json.dumps(payload), encoding='utf-8')
+
+    cache = IntentCache(persist_path=str(path))
+    if isinstance(payload, dict) and isinstance(payload['entries'], list):
+        assert cache.stats()['loaded'] == 1
+        assert cache.get('run b') == command('b')
+    else:
+        assert cache.stats()['loaded'] == 0
+
+
+def test_load_ignores_invalid_json(tmp_path):
+    path = tmp_path / 'cache.json'
+    path.write_text('{not json', encoding='utf-8')
+    assert IntentCache(persist_path=str(path)).stats()['loaded'] == 0
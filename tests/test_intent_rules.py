@@ -0,0 +1,90 @@
+"""RuleRecognizer 規則快速路徑測試"""
+
+import pytest
+
+from intent_rules import RULE_CONFIDENCE, RuleRecognizer
+
+
+@pytest.fixture(scope="module")
+def rules():
+    return RuleRecognizer()
+
+
+@pytest.mark.parametrize("text, command", [
+    ("run dir", "dir"),
+    ("run dir command", "dir"),
+    ("run git status", "git status"),
+    ("run dir /s", "dir /s"),
+    ("execute test.bat", "test.bat"),
+    ("run C:\\path\\to\\file.bat", "C:\\path\\to\\file.bat"),
+    ("run setup.ps1 -Force", "setup.ps1 -Force"),
+    ("run echo 'hi there'", "echo 'hi there'"),
+])
+def test_execute_command(rules, text, command):
+    result = rules.match(text)
+    assert result == {
+        "intent": "execute_command",
+        "parameters": {"command": command},
+        "confidence": RULE_CONFIDENCE,
+    }
+
+
+@pytest.mark.parametrize("text", [
+    "run dir && del /q *",
+    "run dir & del /q *",
+    "run cat | sh",
+    "run dir; rm -rf /",
+    "run type secrets.txt > out.txt",
+    "run type < in.txt",
+    "exec echo $(whoami)",
+    "exec echo `whoami`",
+    "run echo $HOME",
+    "run echo \"$(whoami)\"",
+    "run echo 'a & b'",
+    "run a&b.bat",
+])
+def test_shell_operators_go_to_llm(rules, text):
+    assert rules.match(text) is None
+
+
+@pytest.mark.parametrize("text", [
+    "run dir and tell me which file is biggest",
+    "run the tests and tell me what failed",
+])
+def test_prose_tail_goes_to_llm(rules, text):
+    assert rules.match(text) is None
+
+
+@pytest.mark.parametrize("text, path", [
+    ("list files", "."),
+    ("list the current folder", "."),
+    ("list files in examples directory", "examples"),
+    ("list files in examples", "examples"),
+    ("list the scripts folder", "scripts"),
+    ("list ./docs", "./docs"),
+    ('list "my docs"', "my docs"),
+])
+def test_list_directory(rules, text, path):
+    result = rules.match(text)
+    assert result["intent"] == "list_directory"
+    assert result["parameters"] == {"path": path}
+
+
+@pytest.mark.parametrize("text", ["list examples", "list processes", "ls -la"])
+def test_list_bare_word_goes_to_llm(rules, text, tmp_path, monkeypatch):
+    # 結果不可取決於啟動目錄：即使同名資料夾存在也交給 LLM
+    (tmp_path / "examples").mkdir()
+    (tmp_path / "processes").mkdir()
+    monkeypatch.chdir(tmp_path)
+    assert rules.match(text) is None
+
+
+def test_other_intents(rules):
+    assert rules.match("read README.md")["parameters"] == {"path": "README.md"}
+    assert rules.match("calculate 2+2")["parameters"] == {"code": "print(2+2)"}
+    assert rules.match("create test.txt with content 'hello world'")["parameters"] == {
+        "path": "test.txt",
+        "content": "hello world",
+    }
+    assert rules.match("hello")["intent"] == "chat"
+    assert rules.match("   ") is None
@@ -0,0 +1,36 @@
+"""回應快取的確定性判斷測試"""
+
+from types import SimpleNamespace
+
+from response_cache import effective_generation_config, is_deterministic
+
+
+class _Pipe:
+    """只提供 get_generation_config 的 pipeline 替身"""
+
+    def __init__(self, **config):
+        self.config = SimpleNamespace(**config)
+
+    def get_generation_config(self):
+        return self.config
+
+
+def test_model_default_sampling_is_not_deterministic():
+    pipe = _Pipe(do_sample=True, temperature=0.6)
+    assert not is_deterministic(effective_generation_config(pipe, {"max_new_tokens": 100}))
+
+
+def test_caller_override_wins():
+    pipe = _Pipe(do_sample=True)
+    assert is_deterministic(effective_generation_config(pipe, {"do_sample": False}))
+    assert not is_deterministic(effective_generation_config(_Pipe(do_sample=False), {"do_sample": True}))
+
+
+def test_greedy_model_default():
+    pipe = _Pipe(do_sample=False)
+    assert is_deterministic(effective_generation_config(pipe, {"temperature": 0.7, "top_p": 0.9}))
+
+
+def test_continuous_batching_get_config():
+    pipe = SimpleNamespace(get_config=lambda: SimpleNamespace(do_sample=True))
+    assert not is_deterministic(effective_generation_config(pipe, {}))
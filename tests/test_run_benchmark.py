@@ -0,0 +1,99 @@
+"""run_benchmark 輸出解析與 sweep 展開測試"""
+
+import pytest
+
+from run_benchmark import build_prompt, expand_sweep_cells, parse_benchmark_output
+
+NEW_FORMAT = """
+Load time: 3188.00 ms
+Generate time: 1450.41 ± 12.30 ms
+Tokenization time: 0.52 ± 0.01 ms
+Detokenization time: 0.10 ± 0.00 ms
+TTFT: 113.03 ± 0.00 ms
+TPOT: 13.49 ± -0.50 ms/token
+Throughput: 74.13 ± 1.20 tokens/s
+Input token size: 8
+Output token size: 100
+"""
+
+LEGACY_FORMAT = """
+Load time: 1919.00 ms
+TTFT: 1919.00 ms
+TPOT: 20.5 ms/token
+Throughput: 48 tokens/s
+"""
+
+DEFAULTS = {
+    "model": "./models/m",
+    "device": "cpu",
+    "prompt": "hello",
+    "max_tokens": 20,
+    "num_warmup": 1,
+    "num_iter": 3,
+}
+
+
+def test_parse_mean_and_std():
+    parsed = parse_benchmark_output(NEW_FORMAT)
+    metrics = parsed["metrics"]
+    assert metrics["ttft"] == {"mean": 113.03, "std": 0.0, "unit": "ms"}
+    assert metrics["generate_time"]["mean"] == pytest.approx(1450.41)
+    assert metrics["generate_time"]["std"] == pytest.approx(12.30)
+    assert metrics["tpot"]["std"] == pytest.approx(-0.50)
+    assert metrics["throughput"]["unit"] == "tokens/s"
+    assert parsed["input_tokens"] == 8
+    assert parsed["output_tokens"] == 100
+
+
+def test_parse_legacy_format_without_std():
+    metrics = parse_benchmark_output(LEGACY_FORMAT)["metrics"]
+    assert metrics["load_time"] == {"mean": 1919.0, "std": None, "unit": "ms"}
+    assert metrics["throughput"]["mean"] == 48.0
+    assert metrics["throughput"]["std"] is None
+
+
+@pytest.mark.parametrize("output", ["", None, "garbage"])
+def test_parse_missing_fields_are_none(output):
+    parsed = parse_benchmark_output(output)
+    assert all(metric["mean"] is None and metric["std"] is None for metric in parsed["metrics"].values())
+    assert parsed["input_tokens"] is None
+    assert parsed["output_tokens"] is None
+
+
+def test_parse_does_not_confuse_cold_load_with_load():
+    parsed = parse_benchmark_output("Cold load time: 900.0 ms\n")
+    assert parsed["metrics"]["cold_load_time"]["mean"] == 900.0
+    assert parsed["metrics"]["load_time"]["mean"] is None
+
+
+def test_expand_uses_defaults_for_missing_dimensions():
+    cells = expand_sweep_cells({}, DEFAULTS)
+    assert cells == [{
+        "model_path": "./models/m",
+        "device": "CPU",
+        "prompt": "hello",
+        "max_tokens": 20,
+        "num_warmup": 1,
+        "num_iter": 3,
+    }]
+
+
+def test_expand_cartesian_product():
+    matrix = {
+        "devices": ["cpu", "gpu"],
+        "max_tokens": [16, "32"],
+        "prompts": ["a", "b"],
+        "num_iter": 5,
+    }
+    cells = expand_sweep_cells(matrix, DEFAULTS)
+    assert len(cells) == 8
+    assert {cell["device"] for cell in cells} == {"CPU", "GPU"}
+    assert {cell["max_tokens"] for cell in cells} == {16, 32}
+    assert all(cell["num_iter"] == 5 and cell["num_warmup"] == 1 for cell in cells)
+
+
+def test_expand_prompt_lengths_are_added_to_prompts():
+    cells = expand_sweep_cells({"prompts": ["short"], "prompt_lengths": [4, 64]}, DEFAULTS)
+    prompts = [cell["prompt"] for cell in cells]
+    assert prompts == ["short", build_prompt(4), build_prompt(64)]
+    assert len(build_prompt(64).split()) == 64